@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# coding: UTF-8
+
+"""
+Benchmark of the decision stage of a tick.
+Compares the per-group decisions (a `MetricDiff` and `Isolator.decide_next_step()` per group)
+with `BatchDecision.prime()` and `BatchDecision.decide()` for a growing number of groups.
+Synthetic workloads and isolators are used, so the cost of the decisions is measured without any kernel interface.
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from typing import Callable, Dict, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from libs.isolation.batch_decision import BatchDecision  # noqa: E402
+from libs.isolation.isolators import Isolator  # noqa: E402
+from libs.metric_container.basic_metric import BasicMetric, MetricDiff  # noqa: E402
+from libs.metric_container.streaming_stats import MetricStats  # noqa: E402
+from libs.utils import tick  # noqa: E402
+from libs.workload import Workload  # noqa: E402
+
+
+def _random_metric() -> BasicMetric:
+    return BasicMetric(*(random.uniform(1e6, 1e9) for _ in range(11)), 100)
+
+
+class _SyntheticWorkload:
+    """The part of `Workload` that the decisions use"""
+
+    def __init__(self) -> None:
+        self.metric_stats = MetricStats(Workload.STATS_WINDOW, Workload.STATS_ALPHA)
+        for _ in range(Workload.STATS_WINDOW):
+            self.metric_stats.update(_random_metric())
+        self.avg_solorun_data = _random_metric()
+        self._metric_diffs: Dict[float, MetricDiff] = dict()
+
+    def memoize_metric_diff(self, metric_diff: MetricDiff, core_norm: float = 1) -> None:
+        self._metric_diffs[core_norm] = metric_diff
+
+    def calc_metric_diff(self, core_norm: float = 1) -> MetricDiff:
+        metric_diff = self._metric_diffs.get(core_norm)
+        if metric_diff is None:
+            metric_diff = MetricDiff.from_stats(self.metric_stats, self.avg_solorun_data, core_norm,
+                                                Workload.METRIC_ESTIMATOR, Workload.DECISION_CONFIDENCE)
+            self._metric_diffs[core_norm] = metric_diff
+        return metric_diff
+
+
+class _SyntheticIsolator(Isolator):
+    _METRIC_TYPE = 'l3_hit_ratio'
+
+    def __init__(self, foreground_wl) -> None:
+        super().__init__(foreground_wl, ())
+
+    def strengthen(self) -> 'Isolator':
+        return self
+
+    def weaken(self) -> 'Isolator':
+        return self
+
+    @property
+    def is_max_level(self) -> bool:
+        return False
+
+    @property
+    def is_min_level(self) -> bool:
+        return False
+
+    def enforce(self) -> None:
+        pass
+
+    def reset(self) -> None:
+        pass
+
+    def store_cur_config(self) -> None:
+        pass
+
+    def load_cur_config(self) -> None:
+        pass
+
+
+def _measure(func: Callable[[], object], repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Measure the cost of the decisions of a tick.')
+    parser.add_argument('-g', '--groups', default=[10, 100, 1000, 5000], type=int, nargs='+',
+                        help='numbers of groups (default : 10 100 1000 5000)')
+    parser.add_argument('-r', '--repeat', default=20, type=int, help='number of ticks (default : 20)')
+    args = parser.parse_args()
+
+    for num_groups in args.groups:
+        workloads: List[_SyntheticWorkload] = [_SyntheticWorkload() for _ in range(num_groups)]
+        isolators = [_SyntheticIsolator(wl) for wl in workloads]
+
+        def per_group() -> None:
+            tick.advance()
+            for workload, isolator in zip(workloads, isolators):
+                workload._metric_diffs.clear()
+                isolator.decide_next_step()
+
+        def batch() -> None:
+            tick.advance()
+            for workload in workloads:
+                workload._metric_diffs.clear()
+            BatchDecision.prime(workloads)
+            BatchDecision.decide(isolators)
+
+        per_group_time = _measure(per_group, args.repeat)
+        batch_time = _measure(batch, args.repeat)
+        print(f'groups: {num_groups:>5}, per group: {per_group_time * 1000:>8.3f} ms, '
+              f'batch: {batch_time * 1000:>8.3f} ms ({per_group_time / batch_time:.1f}x)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# coding: UTF-8
+
+"""
+Microbenchmark of the cgroup access paths.
+Compares forking `cgset`/`cgget` (the former implementation) with the file descriptor based `CpuSet`.
+
+The cpuset group must exist beforehand. e.g.
+    sudo cgcreate -a $USER -t $USER -g cpuset:bench && cgset -r cpuset.mems=0 -r cpuset.cpus=0 bench
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+from typing import Callable
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from libs.utils.cgroup import CpuSet  # noqa: E402
+
+
+def _measure(name: str, func: Callable[[], None], iterations: int) -> float:
+    func()  # warm up
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    elapsed = time.perf_counter() - start
+
+    print(f'{name:<28}: {elapsed / iterations * 1_000_000:>10.2f} us/op ({iterations} ops)')
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Compare the subprocess and the sysfs cgroup access paths.')
+    parser.add_argument('group', help='name of an existing cpuset group')
+    parser.add_argument('-c', '--cores', default='0', help='cores to assign (default : 0)')
+    parser.add_argument('-n', '--iterations', default=200, type=int, help='number of operations (default : 200)')
+    args = parser.parse_args()
+
+    cpuset = CpuSet(args.group)
+    cores = tuple(map(int, args.cores.split(',')))
+
+    sub_read = _measure('subprocess read_cpus',
+                        lambda: subprocess.check_output(args=('cgget', '-nvr', 'cpuset.cpus', args.group)),
+                        args.iterations)
+    sysfs_read = _measure('sysfs read_cpus', cpuset.read_cpus, args.iterations)
+
+    sub_write = _measure('subprocess assign_cpus',
+                         lambda: subprocess.check_call(args=('cgset', '-r', f'cpuset.cpus={args.cores}', args.group)),
+                         args.iterations)
+    sysfs_write = _measure('sysfs assign_cpus', lambda: cpuset.assign_cpus(cores), args.iterations)
+
+    print(f'speedup (read) : {sub_read / sysfs_read:>8.1f}x')
+    print(f'speedup (write): {sub_write / sysfs_write:>8.1f}x')
+
+    cpuset.close()
+
+
+if __name__ == '__main__':
+    main()
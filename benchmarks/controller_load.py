@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+# coding: UTF-8
+
+"""
+Load test of `Controller` on an emulated sysfs tree (see `libs/sysfs_emulator.py`).
+Hundreds of synthetic isolation groups (`sleep` processes fed with synthetic metrics) are isolated for a number of
+ticks and the tick latency and the number of writes (actuations) per tick are reported.
+The groups are spread over the sockets, whose groups are isolated in parallel by `--workers` threads.
+`--write-latency` emulates a kernel interface that blocks on each write (e.g. `cpuset.cpus`).
+No RDT, cpufreq or root privilege is required.
+"""
+
+import argparse
+import gc
+import logging
+import math
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+from collections import Counter
+from typing import List
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from libs.sysfs_emulator import SysfsEmulator  # noqa: E402
+
+_FG_NAMES = ('canneal', 'streamcluster', 'kmeans', 'SP', 'nn')
+_BG_NAMES = ('bfs', 'CG', 'LU', 'MG', 'FT')
+
+
+def _noisy_metric(base, factor: float, interval: int):
+    from libs.metric_container.basic_metric import BasicMetric
+
+    def jitter(value: float) -> float:
+        return value * factor * random.uniform(0.95, 1.05)
+
+    # the solorun data is normalized by 1000ms, so it is scaled to the perf interval
+    scale = interval / 1000
+    return BasicMetric(jitter(base.l2miss * scale), base.l3miss * scale, jitter(base.instruction * scale),
+                       base.cycles * scale, base.stall_cycle * scale, base.wall_cycles * scale,
+                       base.intra_coh * scale, base.inter_coh * scale, base.llc_size,
+                       jitter(base.local_mem * scale), base.remote_mem * scale, interval)
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Load test the controller with synthetic groups.')
+    parser.add_argument('-g', '--groups', default=100, type=int, help='number of isolation groups (default : 100)')
+    parser.add_argument('-t', '--ticks', default=100, type=int, help='number of controller ticks (default : 100)')
+    parser.add_argument('-c', '--cores-per-workload', default=2, type=int,
+                        help='number of cores of each workload (default : 2)')
+    parser.add_argument('-i', '--perf-interval', default=200, type=int,
+                        help='interval (ms) of the synthetic metrics (default : 200)')
+    parser.add_argument('-s', '--sockets', default=2, type=int, help='number of sockets (default : 2)')
+    parser.add_argument('-w', '--workers', default=4, type=int,
+                        help='number of threads that isolate the sockets in parallel (default : 4)')
+    parser.add_argument('--write-latency', dest='write_latency', default=0, type=float,
+                        help='emulated latency (us) of each write to the kernel interfaces (default : 0)')
+    parser.add_argument('--swap-on', action='store_true', help='turn on the swapper')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    cores_per_socket = math.ceil(args.groups / args.sockets) * args.cores_per_workload * 2
+    emulator = SysfsEmulator(num_sockets=args.sockets, cores_per_socket=cores_per_socket)
+    emulator.install()
+
+    # `libs` reads the tree on import, so everything is imported after the emulator is installed
+    from controller import Controller
+    from libs.isolation.policies import AggressiveWViolationPolicy
+    from libs.solorun_data.datas import data_map, solorun_profile
+    from libs.solorun_data.profile_store import ProfileStore
+    from libs.utils import sysfs
+    from libs.workload import Workload
+
+    # the stored profiles of the former runs must not skip the solorun profiling of this one
+    ProfileStore.PATH = str(emulator.root / 'solorun_profiles.db')
+
+    if args.write_latency > 0:
+        # a blocking syscall releases the GIL as the sleep does
+        sysfs.add_write_observer(lambda _path, _latency: time.sleep(args.write_latency / 1_000_000))
+
+    controller = Controller(metric_buf_size=50, swap_off=not args.swap_on, num_workers=args.workers)
+
+    procs: List[subprocess.Popen] = list()
+    workloads = list()
+
+    try:
+        for idx in range(args.groups):
+            socket_id = idx % args.sockets
+            first_core = socket_id * cores_per_socket + (idx // args.sockets) * args.cores_per_workload * 2
+            group_wls = list()
+
+            for wl_type, names, cores in (
+                    ('fg', _FG_NAMES, range(first_core, first_core + args.cores_per_workload)),
+                    ('bg', _BG_NAMES, range(first_core + args.cores_per_workload,
+                                            first_core + args.cores_per_workload * 2))):
+                name = names[idx % len(names)]
+                proc = subprocess.Popen(('sleep', 'infinity'))
+                procs.append(proc)
+
+                emulator.add_group(f'{name}_{proc.pid}', cores, (socket_id,))
+                workload = Workload(name, wl_type, proc.pid, proc.pid, args.perf_interval)
+                if wl_type == 'fg':
+                    workload.avg_solorun_data = data_map[name]
+
+                group_wls.append(workload)
+
+            fg, bg = group_wls
+            workloads.append((fg, bg))
+            controller._isolation_groups[AggressiveWViolationPolicy(fg, (bg,))] = 0
+
+        tick_latencies: List[float] = list()
+        writes_per_tick: List[int] = list()
+        write_latencies: List[float] = list()
+        writes_by_file: Counter = Counter()
+        emulator.reset_stats()
+
+        for _ in range(args.ticks):
+            for fg, bg in workloads:
+                # FGs suffer from random contention, BGs run as solo
+                fg.append_metrics((_noisy_metric(data_map[fg.name], random.uniform(0.6, 1.1), args.perf_interval),), 50)
+                bg.append_metrics((_noisy_metric(solorun_profile(bg.name, len(bg.bound_cores)), 1,
+                                                 args.perf_interval),), 50)
+
+            # every foreground has received a new metric. the worst case that every period has passed is measured
+            controller._isolated_at.clear()
+            start = time.perf_counter()
+            controller._isolate_workloads()
+            tick_latencies.append(time.perf_counter() - start)
+
+            stats = emulator.reset_stats()
+            writes_per_tick.append(stats.count)
+            write_latencies.append(stats.avg_latency)
+            writes_by_file.update(stats.count_by_file)
+
+        print(f'groups: {args.groups}, ticks: {args.ticks}, sockets: {args.sockets}, workers: {args.workers}, '
+              f'write latency: {args.write_latency:.0f} us')
+        print(f'tick latency (ms)   : mean {statistics.mean(tick_latencies) * 1000:>9.3f}, '
+              f'p50 {_percentile(tick_latencies, 0.5) * 1000:>9.3f}, '
+              f'p99 {_percentile(tick_latencies, 0.99) * 1000:>9.3f}')
+        print(f'writes per tick     : mean {statistics.mean(writes_per_tick):>9.2f}, max {max(writes_per_tick)}')
+        print(f'write latency (us)  : mean {statistics.mean(write_latencies) * 1_000_000:>9.2f}')
+        print(f'writes by file      : {dict(writes_by_file)}')
+
+    finally:
+        for proc in procs:
+            proc.kill()
+            proc.wait()
+
+        # the isolators reset the tree when they are collected
+        controller._isolation_groups.clear()
+        del controller, workloads
+        gc.collect()
+
+        emulator.cleanup()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# coding: UTF-8
+
+"""
+Startup benchmark of the controller.
+Measures the time to import `controller` (and so all of `libs`) in a fresh interpreter, and the first access to the
+hardware constants that are loaded lazily. The cost of `cpuinfo.get_cpu_info()`, which was called on every import to
+get the LLC size, is printed as a reference.
+
+With `--emulate`, the modules are imported on an emulated tree without resctrl and cpufreq (see
+`libs/sysfs_emulator.py`), which used to crash the import.
+"""
+
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional
+
+_REPO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+sys.path.insert(0, _REPO_DIR)
+
+from libs.sysfs_emulator import SysfsEmulator  # noqa: E402
+
+_IMPORT_SCRIPT = '''
+import time
+start = time.perf_counter()
+import controller
+print(time.perf_counter() - start)
+'''
+
+_FIRST_ACCESS_SCRIPT = '''
+import time
+import controller
+from libs.utils import capabilities
+from libs.isolation.policies import AggressiveWViolationPolicy
+start = time.perf_counter()
+capabilities.llc_size()
+AggressiveWViolationPolicy.available_isolator_types()
+print(time.perf_counter() - start)
+'''
+
+_CPUINFO_SCRIPT = '''
+import time
+start = time.perf_counter()
+from cpuinfo import cpuinfo
+cpuinfo.get_cpu_info()
+print(time.perf_counter() - start)
+'''
+
+
+def _run(script: str, env: Dict[str, str], iterations: int) -> Optional[List[float]]:
+    results = list()
+
+    for _ in range(iterations):
+        proc = subprocess.run((sys.executable, '-W', 'ignore', '-c', script), cwd=_REPO_DIR, env=env,
+                              stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+        if proc.returncode != 0:
+            print(proc.stderr.strip().splitlines()[-1])
+            return None
+        results.append(float(proc.stdout.strip()))
+
+    return results
+
+
+def _report(name: str, results: Optional[List[float]]) -> None:
+    if results is None:
+        print(f'{name:<28}: failed')
+    else:
+        print(f'{name:<28}: mean {statistics.mean(results) * 1000:>9.2f} ms, '
+              f'min {min(results) * 1000:>9.2f} ms ({len(results)} runs)')
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Measure the startup time of the controller.')
+    parser.add_argument('-n', '--iterations', default=10, type=int, help='number of runs (default : 10)')
+    parser.add_argument('--emulate', action='store_true',
+                        help='run on an emulated tree that has neither resctrl nor cpufreq')
+    parser.add_argument('--skip-cpuinfo', action='store_true', help='do not measure the cost of cpuinfo')
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    emulator = None
+
+    if args.emulate:
+        emulator = SysfsEmulator()
+        shutil.rmtree(emulator.root / 'sys' / 'fs' / 'resctrl')
+        for cpufreq in (emulator.root / 'sys' / 'devices' / 'system' / 'cpu').glob('cpu*/cpufreq'):
+            shutil.rmtree(cpufreq)
+        env['ISO_SCHED_SYSFS_ROOT'] = str(emulator.root)
+
+    try:
+        _report('import controller', _run(_IMPORT_SCRIPT, env, args.iterations))
+        _report('first hardware access', _run(_FIRST_ACCESS_SCRIPT, env, args.iterations))
+        if not args.skip_cpuinfo:
+            _report('cpuinfo.get_cpu_info()', _run(_CPUINFO_SCRIPT, env, min(args.iterations, 3)))
+
+    finally:
+        if emulator is not None:
+            emulator.cleanup()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# coding: UTF-8
+
+"""
+Load test of `IngestionEngine` against the in-process `FakeBroker` on an emulated sysfs tree.
+Hundreds of synthetic workloads (`sleep` processes) are created through the creation queue, then every workload
+publishes a metric message per round while a few "flooding" workloads publish many more.
+The latency until every normal workload received its metric of a round is reported,
+which shows whether the flooding workloads hold back the others.
+No RabbitMQ, RDT, cpufreq or root privilege is required.
+"""
+
+import argparse
+import gc
+import logging
+import math
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import List
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from libs.sysfs_emulator import SysfsEmulator  # noqa: E402
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Load test the metric ingestion engine with a fake broker.')
+    parser.add_argument('-w', '--workloads', default=500, type=int, help='number of workloads (default : 500)')
+    parser.add_argument('-r', '--rounds', default=50, type=int, help='number of metric rounds (default : 50)')
+    parser.add_argument('-f', '--flooders', default=4, type=int,
+                        help='number of workloads that flood their queues (default : 4)')
+    parser.add_argument('--flood-factor', default=200, type=int,
+                        help='number of messages that a flooding workload publishes per round (default : 200)')
+    parser.add_argument('-s', '--shards', default=4, type=int, help='number of channels (default : 4)')
+    parser.add_argument('-p', '--prefetch', default=256, type=int,
+                        help='prefetch window per channel (default : 256)')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    cores_per_socket = math.ceil(args.workloads / 2)
+    emulator = SysfsEmulator(num_sockets=2, cores_per_socket=cores_per_socket)
+    emulator.install()
+
+    # `libs` reads the tree on import, so everything is imported after the emulator is installed
+    from libs.ingestion import FakeBroker, IngestionEngine
+    from libs.isolation.policies import AggressiveWViolationPolicy
+    from libs.metric_container.wire import MetricCodec
+    from pending_queue import PendingQueue
+
+    broker = FakeBroker()
+    pending_queue = PendingQueue(AggressiveWViolationPolicy)
+    engine = IngestionEngine(broker, 50, pending_queue, num_shards=args.shards, prefetch=args.prefetch)
+    engine.start()
+    engine.wait_ready(10)
+
+    procs: List[subprocess.Popen] = list()
+
+    try:
+        start = time.perf_counter()
+        for idx in range(args.workloads):
+            proc = subprocess.Popen(('sleep', 'infinity'))
+            procs.append(proc)
+            emulator.add_group(f'bfs_{proc.pid}', (idx,), (idx // cores_per_socket,))
+            broker.publish(IngestionEngine.CREATION_QUEUE, f'bfs_{proc.pid},bg,{proc.pid},{proc.pid},100'.encode())
+
+        while engine.num_consumers < args.workloads:
+            time.sleep(0.01)
+        print(f'workloads: {args.workloads}, registered in {(time.perf_counter() - start) * 1000:.1f} ms')
+
+        workloads = {wl.pid: wl for wl in pending_queue._ready_queue[0] + pending_queue._ready_queue[1]}
+        flooders = frozenset(proc.pid for proc in procs[:args.flooders])
+        normal = tuple(wl for pid, wl in workloads.items() if pid not in flooders)
+
+        round_latencies: List[float] = list()
+        num_messages = 0
+
+        for round_id in range(1, args.rounds + 1):
+            start = time.perf_counter()
+
+            # the round id is carried in `l2miss`
+            record = (float(round_id),) + (1.0,) * (len(MetricCodec.FIELDS) - 1)
+            for proc in procs:
+                repeat = args.flood_factor if proc.pid in flooders else 1
+                for _ in range(repeat):
+                    broker.publish(f'bfs({proc.pid})', MetricCodec.encode((record,), 100))
+                    num_messages += 1
+
+            while not all(wl.metrics and wl.metrics[0].l2miss >= round_id for wl in normal):
+                time.sleep(0.0005)
+
+            round_latencies.append(time.perf_counter() - start)
+
+        print(f'rounds: {args.rounds}, messages: {num_messages}, flooders: {args.flooders} x {args.flood_factor}')
+        print(f'round latency (ms)  : mean {statistics.mean(round_latencies) * 1000:>9.3f}, '
+              f'p50 {_percentile(round_latencies, 0.5) * 1000:>9.3f}, '
+              f'p99 {_percentile(round_latencies, 0.99) * 1000:>9.3f}')
+        print(f'delivered           : {broker.num_delivered} / {broker.num_published}, '
+              f'unacked: {broker.num_unacked}')
+
+    finally:
+        engine.stop()
+        engine.join(5)
+
+        for proc in procs:
+            proc.kill()
+            proc.wait()
+
+        del pending_queue
+        gc.collect()
+
+        emulator.cleanup()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# coding: UTF-8
+
+"""
+Benchmark of the metric buffer of a workload.
+Compares the deque of `BasicMetric` with the averaging of `statistics.mean()` that `MetricBuffer` replaced,
+on the memory of a full buffer and the time to average it (the solorun averaging).
+No broker or sysfs is required.
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from collections import deque
+from typing import Callable, Deque
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from libs.metric_container.basic_metric import BasicMetric  # noqa: E402
+from libs.metric_container.metric_buffer import MetricBuffer  # noqa: E402
+
+
+def _random_metric() -> BasicMetric:
+    return BasicMetric(*(float(random.randrange(1, 1 << 32)) for _ in range(11)), 100)
+
+
+def _deque_avg(metrics: Deque[BasicMetric]) -> BasicMetric:
+    # `BasicMetric.calc_avg()` before the buffer
+    return BasicMetric(*(statistics.mean(metric.astuple()[idx] for metric in metrics) for idx in range(12)))
+
+
+def _measure_memory(build: Callable[[], object]) -> int:
+    # the first call allocates the caches of the interpreter and numpy
+    build()
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    buf = build()
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del buf
+    return size
+
+
+def _measure_time(func: Callable[[], object], repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Compare the metric buffers of a workload.')
+    parser.add_argument('-b', '--metric-buf-size', dest='buf_size', default=50, type=int,
+                        help='metric buffer size (default : 50)')
+    parser.add_argument('-r', '--repeat', default=200, type=int, help='number of the averages (default : 200)')
+    args = parser.parse_args()
+
+    metrics = [_random_metric() for _ in range(args.buf_size)]
+
+    def build_deque() -> Deque[BasicMetric]:
+        # the metrics are decoded from the messages, so each of them is a new object
+        return deque(BasicMetric(*(value + 0.0 for value in metric.astuple())) for metric in metrics)
+
+    def build_buffer() -> MetricBuffer:
+        buf = MetricBuffer(args.buf_size)
+        buf.extend(metrics)
+        return buf
+
+    deque_size = _measure_memory(build_deque)
+    buffer_size = _measure_memory(build_buffer)
+    print(f'memory of {args.buf_size} metrics: deque {deque_size:>8,} bytes, buffer {buffer_size:>8,} bytes '
+          f'({deque_size / buffer_size:.1f}x)')
+
+    old, new = build_deque(), build_buffer()
+    deque_time = _measure_time(lambda: _deque_avg(old), args.repeat)
+    buffer_time = _measure_time(new.mean, args.repeat)
+    print(f'average             : deque + statistics.mean {deque_time * 1_000_000:>9.1f} us, '
+          f'buffer {buffer_time * 1_000_000:>7.1f} us ({deque_time / buffer_time:.0f}x)')
+
+    print(f'percentile / ewma   : {_measure_time(lambda: new.percentile(90), args.repeat) * 1_000_000:.1f} us, '
+          f'{_measure_time(lambda: new.ewma(0.3), args.repeat) * 1_000_000:.1f} us')
+    print(f'append              : {_measure_time(lambda: new.append(metrics[0]), args.repeat * 10) * 1_000_000:.1f} us')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+# coding: UTF-8
+
+"""
+Throughput benchmark of the metric decode path of the polling thread.
+Compares the legacy JSON messages (one sample per message) with the binary messages of `MetricCodec`,
+with and without batching, and reports how many samples per second are decoded into `BasicMetric`.
+No broker is required.
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from typing import Callable, List, Sequence
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from libs.metric_container.wire import MetricCodec  # noqa: E402
+
+
+def _random_samples(num_samples: int) -> List[Sequence[float]]:
+    return [tuple(float(random.randrange(1, 1 << 32)) for _ in MetricCodec.FIELDS) for _ in range(num_samples)]
+
+
+def _measure(name: str, messages: Sequence[bytes], num_samples: int, decode: Callable[[bytes], list]) -> None:
+    start = time.perf_counter()
+    decoded = 0
+    for body in messages:
+        decoded += len(decode(body))
+    elapsed = time.perf_counter() - start
+
+    assert decoded == num_samples
+    print(f'{name:<24}: {num_samples / elapsed:>12,.0f} samples/s, {elapsed / num_samples * 1_000_000:>7.3f} us/sample')
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Measure the decode throughput of the metric messages.')
+    parser.add_argument('-n', '--samples', default=200_000, type=int, help='number of samples (default : 200000)')
+    parser.add_argument('-b', '--batch', default=32, type=int,
+                        help='number of samples per batched message (default : 32)')
+    parser.add_argument('-i', '--perf-interval', default=100, type=int, help='perf interval (ms) (default : 100)')
+    args = parser.parse_args()
+
+    samples = _random_samples(args.samples)
+    interval = args.perf_interval
+
+    json_messages = [json.dumps(dict(zip(MetricCodec.FIELDS, sample))).encode() for sample in samples]
+    binary_messages = [MetricCodec.encode((sample,), interval) for sample in samples]
+    batched_messages = [MetricCodec.encode(samples[i:i + args.batch], interval)
+                        for i in range(0, len(samples), args.batch)]
+
+    print(f'message size (bytes)    : json {sum(map(len, json_messages)) / args.samples:.1f}, '
+          f'binary {sum(map(len, binary_messages)) / args.samples:.1f}, '
+          f'batched {sum(map(len, batched_messages)) / args.samples:.1f} per sample')
+
+    _measure('json', json_messages, args.samples, lambda body: MetricCodec.decode(body, interval))
+    _measure('binary', binary_messages, args.samples, lambda body: MetricCodec.decode(body, interval))
+    _measure(f'binary (batch of {args.batch})', batched_messages, args.samples,
+             lambda body: MetricCodec.decode(body, interval))
+
+
+if __name__ == '__main__':
+    main()
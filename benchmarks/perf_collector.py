@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# coding: UTF-8
+
+"""
+Benchmark of the in-process perf event collector.
+Spawns busy workloads without perf agents on an emulated sysfs tree, counts them with `PerfCollector`
+and reports the cost of a `collect()` of all workloads (a single `read(2)` per group) and the collected metrics.
+The software events are used where the hardware counters are not exposed (e.g. in a VM),
+which only measures the cost: the controller does not collect the metrics of the software events.
+"""
+
+import argparse
+import gc
+import logging
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import List
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from libs.sysfs_emulator import SysfsEmulator  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Measure the cost of the in-process perf event collector.')
+    parser.add_argument('-w', '--workloads', default=50, type=int, help='number of workloads (default : 50)')
+    parser.add_argument('-t', '--ticks', default=20, type=int, help='number of collections (default : 20)')
+    parser.add_argument('-i', '--interval', default=0.05, type=float,
+                        help='interval (sec) between the collections (default : 0.05)')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    emulator = SysfsEmulator(num_sockets=1, cores_per_socket=args.workloads)
+    emulator.install()
+
+    # `libs` reads the tree on import, so everything is imported after the emulator is installed
+    from libs.metric_container.perf_collector import PerfCollector
+    from libs.solorun_data.profile_store import ProfileStore
+    from libs.utils import capabilities
+    from libs.workload import Workload
+
+    ProfileStore.PATH = str(emulator.root / 'solorun_profiles.db')
+
+    procs: List[subprocess.Popen] = list()
+    collector = PerfCollector(args.ticks, software=not capabilities.has_hw_perf_counters())
+    workloads: List[Workload] = list()
+
+    try:
+        for idx in range(args.workloads):
+            proc = subprocess.Popen((sys.executable, '-c', 'while True: pass'))
+            procs.append(proc)
+            emulator.add_group(f'bfs_{proc.pid}', (idx,), (0,))
+            workload = Workload('bfs', 'bg', proc.pid, 0, int(args.interval * 1000))
+            collector.register(workload)
+            workloads.append(workload)
+
+        print(f'workloads: {args.workloads}, events: {"hardware" if collector.hardware else "software"}')
+
+        elapsed: List[float] = list()
+        for _ in range(args.ticks):
+            time.sleep(args.interval)
+
+            start = time.perf_counter()
+            collector.collect()
+            elapsed.append(time.perf_counter() - start)
+
+        print(f'collect (ms)        : mean {statistics.mean(elapsed) * 1000:>8.3f}, max {max(elapsed) * 1000:>8.3f}, '
+              f'{statistics.mean(elapsed) / args.workloads * 1_000_000:.1f} us per workload')
+
+        metric = workloads[0].metrics[0]
+        print(f'latest metric of {workloads[0]}: cycles {metric.cycles:.0f}, instructions {metric.instruction:.0f}, '
+              f'collected {len(workloads[0].metrics)}')
+
+    finally:
+        for proc in procs:
+            proc.kill()
+            proc.wait()
+
+        for workload in workloads:
+            collector.unregister(workload)
+        del workloads
+        gc.collect()
+
+        emulator.cleanup()
+
+
+if __name__ == '__main__':
+    main()
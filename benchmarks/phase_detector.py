@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+# coding: UTF-8
+
+"""
+Benchmark of the triggers of the solorun profiling.
+A foreground goes through phases of random lengths whose code (L2 misses per kilo instruction,
+cycles per instruction except the stalls and LLC hit ratio) shifts by at least `--min-shift`, with noisy metrics.
+Its co-run metrics are also shifted by the contention, which changes when a background changes its phase
+and on every actuation of the isolator search that follows a profiling or a contention change.
+The solorun profiling is triggered either by the former polling (`profile_needed()` every second:
+3 failed verifications of the solorun data), by a `PhaseDetector` on the co-run rates that is reset on every
+actuation, or by `PhaseDetector` on the rates that the contention does not shift, checked every tick
+(both plus the consecutive failed verifications every second).
+Reports the number of profilings, the pause time of the backgrounds,
+the profilings without a phase change of the foreground since the last profiling and the detection delay.
+"""
+
+import argparse
+import os
+import random
+import sys
+from typing import List, NamedTuple, Optional, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from libs.metric_container.basic_metric import BasicMetric, MetricDiff  # noqa: E402
+from libs.metric_container.phase_detector import PhaseDetector  # noqa: E402
+
+_TICK = 0.2  # sec
+_PROFILE_TICKS = 5  # `_profile_interval` of the controller
+_SOLORUN_TICKS = 10  # `_solorun_interval` of the controller
+_VERIFY_THRESHOLD = 3
+_SEARCH_STEPS = 10  # actuations of an isolator search, one per tick
+_SEARCH_RELIEF = 0.9  # contention left by each actuation
+_CYCLES = 1e9 * _TICK
+_BASE_STALL = 0.2  # fraction of the cycles that stall without contention
+
+
+class _Phase(NamedTuple):
+    start: int
+    l2_mpki: float
+    core_cpi: float
+    l3hit_ratio: float
+
+
+class _CorunRateDetector(PhaseDetector):
+    """the former detector on the co-run rates that `MetricDiff` compares"""
+    RATES = ('l3hit_ratio', 'local_mem_ps', 'instruction_ps')
+
+
+def _metric(phase: _Phase, contention: float, noise: float) -> BasicMetric:
+    # the contention stalls the backend and evicts the LLC, but the code of the foreground stays the same
+    stall = _CYCLES * min(0.9, _BASE_STALL + contention) * random.gauss(1, noise)
+    instructions = (_CYCLES - stall) / (phase.core_cpi * random.gauss(1, noise))
+    l2miss = instructions * phase.l2_mpki / 1000 * random.gauss(1, noise)
+    l3hit = phase.l3hit_ratio * (1 - contention) * random.gauss(1, noise)
+    l3miss = l2miss * min(1.0, max(0.0, 1 - l3hit))
+    return BasicMetric(l2miss, l3miss, instructions, _CYCLES, stall, _CYCLES, 0, 0, 1e6, l3miss * 64, 1e7,
+                       _TICK * 1000)
+
+
+def _phases(args: argparse.Namespace) -> List[_Phase]:
+    phases = list()
+    tick = 0
+    mpki, cpi, l3hit = 10.0, 0.8, 0.6
+    while tick < args.ticks:
+        phases.append(_Phase(tick, mpki, cpi, l3hit))
+        tick += int(random.expovariate(1 / args.phase_ticks)) + _SOLORUN_TICKS * 2
+        factor = random.choice((-1, 1)) * random.uniform(args.min_shift, 0.5)
+        mpki, cpi = mpki * (1 + factor), cpi * (1 - factor / 2)
+        l3hit = min(0.95, max(0.05, l3hit * (1 - factor / 2)))
+    return phases
+
+
+def _bg_changes(args: argparse.Namespace) -> List[Tuple[int, float]]:
+    """
+    :return: (tick, contention) of each phase change of the backgrounds
+    """
+    changes = list()
+    tick = 0
+    while tick < args.ticks:
+        changes.append((tick, random.uniform(0.05, args.max_contention)))
+        tick += int(random.expovariate(1 / args.bg_phase_ticks)) + 1
+    return changes
+
+
+def _simulate(args: argparse.Namespace, mode: str) -> Tuple[int, int, int, List[int], int]:
+    """
+    :return: number of the profilings, the ones without a phase change of the foreground
+             (triggered by the detector, by the verifications), detection delays (ticks), missed phases
+    """
+    random.seed(args.seed)
+    phases = _phases(args)
+    bg_changes = _bg_changes(args)
+    random.seed(args.seed + 1)
+
+    detector = _CorunRateDetector() if mode == 'co-run' else PhaseDetector()
+    solorun: Optional[BasicMetric] = None
+    solorun_samples: List[BasicMetric] = list()
+    profiling_until = -1
+    violations = 0
+    contention = 0.0
+    search_left = 0
+
+    profilings = steady_detections = steady_violations = 0
+    delays: List[int] = list()
+    phase_idx = bg_idx = 0
+    # the tick of the phase change that has not been profiled yet
+    pending_change: Optional[int] = None
+
+    for tick in range(args.ticks):
+        if phase_idx + 1 < len(phases) and phases[phase_idx + 1].start == tick:
+            phase_idx += 1
+            pending_change = tick
+        if bg_idx < len(bg_changes) and bg_changes[bg_idx][0] == tick:
+            contention = bg_changes[bg_idx][1]
+            bg_idx += 1
+            search_left = _SEARCH_STEPS
+        phase = phases[phase_idx]
+
+        if tick < profiling_until:
+            solorun_samples.append(_metric(phase, 0, args.noise))
+            continue
+        elif tick == profiling_until:
+            solorun = BasicMetric.calc_avg(solorun_samples)
+            solorun_samples.clear()
+            detector.reset()
+            search_left = _SEARCH_STEPS
+
+        if search_left > 0:
+            search_left -= 1
+            contention *= _SEARCH_RELIEF
+            if mode == 'co-run':
+                detector.reset()
+
+        metric = _metric(phase, contention, args.noise)
+        detector.update(metric)
+
+        detected = False
+        if solorun is None:
+            needed = True
+        else:
+            needed = False
+            if mode != 'polling' and detector.changed:
+                needed = detected = True
+            elif tick % _PROFILE_TICKS == 0:
+                if MetricDiff(metric, solorun).verify():
+                    # the former polling counts all violations, the detectors only the consecutive ones
+                    violations = violations if mode == 'polling' else 0
+                else:
+                    violations += 1
+                    needed = violations == _VERIFY_THRESHOLD
+
+        if needed:
+            profilings += 1
+            violations = 0
+            profiling_until = tick + _SOLORUN_TICKS
+            if pending_change is not None:
+                delays.append(tick - pending_change)
+                pending_change = None
+            elif detected:
+                steady_detections += 1
+            elif solorun is not None:
+                steady_violations += 1
+
+    missed = len(phases) - 1 - len(delays)
+    return profilings, steady_detections, steady_violations, delays, missed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Compare the triggers of the solorun profiling.')
+    parser.add_argument('-t', '--ticks', default=50000, type=int, help='number of ticks (default : 50000)')
+    parser.add_argument('-p', '--phase-ticks', default=500, type=int,
+                        help='mean number of ticks of a phase of the foreground (default : 500)')
+    parser.add_argument('-b', '--bg-phase-ticks', default=200, type=int,
+                        help='mean number of ticks of a phase of the backgrounds (default : 200)')
+    parser.add_argument('-m', '--min-shift', default=0.2, type=float,
+                        help='min. relative shift of the L2 MPKI of a phase change (default : 0.2)')
+    parser.add_argument('-n', '--noise', default=0.05, type=float,
+                        help='relative standard deviation of the metrics (default : 0.05)')
+    parser.add_argument('-c', '--max-contention', default=0.5, type=float,
+                        help='max. fraction of the cycles stalled by the backgrounds (default : 0.5)')
+    parser.add_argument('--seed', default=0, type=int, help='random seed (default : 0)')
+    args = parser.parse_args()
+
+    for mode in ('polling', 'co-run', 'detector'):
+        profilings, steady_detections, steady_violations, delays, missed = _simulate(args, mode)
+        mean_delay = sum(delays) / len(delays) * _TICK if delays else float('nan')
+        print(f'{mode:>8}: {profilings:>4} profilings (without a FG phase change: {steady_detections:>3} detected, '
+              f'{steady_violations:>3} by violations), '
+              f'BG paused {profilings * _SOLORUN_TICKS * _TICK:>7.1f} s, '
+              f'detected {len(delays):>3} phase changes (mean delay {mean_delay:.2f} s), missed {missed:>3}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# coding: UTF-8
+
+"""
+Benchmark of the solorun profile store.
+A stream of foreground instances of a few applications in a few configurations arrives at the controller,
+over several runs of the controller (a new `ProfileStore` on the same database per run).
+Reports the initial solorun profilings (and the pause time of the backgrounds) with and without the store,
+and the cost of loading the table, a lookup and a store.
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from libs.metric_container.basic_metric import BasicMetric  # noqa: E402
+from libs.solorun_data.profile_store import ProfileKey, ProfileStore  # noqa: E402
+
+_SOLORUN_INTERVAL = 2.0  # sec. `_solorun_interval` of the controller
+
+
+def _random_key(args: argparse.Namespace) -> ProfileKey:
+    num_threads = random.choice((1, 2, 4, 8))
+    return ProfileKey(f'app{random.randrange(args.apps)}', num_threads, num_threads, random.randrange(2))
+
+
+def _random_metric() -> BasicMetric:
+    return BasicMetric(*(random.uniform(1e6, 1e9) for _ in range(11)), 1000)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Measure the reuse of the solorun profiles.')
+    parser.add_argument('-a', '--apps', default=20, type=int, help='number of applications (default : 20)')
+    parser.add_argument('-i', '--instances', default=200, type=int,
+                        help='number of foreground instances per run (default : 200)')
+    parser.add_argument('-r', '--runs', default=5, type=int, help='number of runs of the controller (default : 5)')
+    parser.add_argument('--seed', default=0, type=int, help='random seed (default : 0)')
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'solorun_profiles.db')
+        profiled = 0
+
+        for _ in range(args.runs):
+            store = ProfileStore(path)
+            for _ in range(args.instances):
+                key = _random_key(args)
+                if store.get(key) is None:
+                    profiled += 1
+                    store.put(key, _random_metric())
+
+        total = args.runs * args.instances
+        print(f'initial profilings: without store {total:>5} (BG paused {total * _SOLORUN_INTERVAL:>7.0f} s), '
+              f'with store {profiled:>5} (BG paused {profiled * _SOLORUN_INTERVAL:>7.0f} s)')
+
+        # a table of many profiles
+        store = ProfileStore(path)
+        keys = [ProfileKey(f'app{i}', 1, 1, 0) for i in range(10000)]
+        start = time.perf_counter()
+        for key in keys:
+            store.put(key, _random_metric())
+        put_time = (time.perf_counter() - start) / len(keys)
+
+        start = time.perf_counter()
+        store = ProfileStore(path)
+        store.get(keys[0])
+        load_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for key in keys:
+            store.get(key)
+        get_time = (time.perf_counter() - start) / len(keys)
+
+        print(f'{len(store)} profiles: load {load_time * 1000:.1f} ms, '
+              f'lookup {get_time * 1_000_000:.2f} us, store {put_time * 1_000_000:.1f} us')
+
+
+if __name__ == '__main__':
+    main()
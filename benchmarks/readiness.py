@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+# coding: UTF-8
+
+"""
+Benchmark of the wakeups of the controller on the arrival of the metrics.
+Synthetic groups (see `controller_load.py`) are fed from another thread at their perf intervals, with random phases,
+and the control loop runs for a while, either isolating every group on every tick (the former loop)
+or woken up by the metrics of the foregrounds on their own control periods.
+Reports the delay from the arrival of a foreground metric to the isolation of its group,
+the isolations that saw no new metric of the foreground and the CPU time of the controller (excluding the feeder).
+With `--shift-at`, the contention of the foregrounds changes at that time, and the delay until each group isolates
+on a metric of the new contention is reported too.
+"""
+
+import argparse
+import functools
+import gc
+import heapq
+import logging
+import math
+import os
+import random
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from typing import List, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from libs.sysfs_emulator import SysfsEmulator  # noqa: E402
+
+_FG_NAMES = ('canneal', 'streamcluster', 'kmeans', 'SP', 'nn')
+_BG_NAMES = ('bfs', 'CG', 'LU', 'MG', 'FT')
+
+
+def _metric(base, factor: float, interval: int):
+    from libs.metric_container.basic_metric import BasicMetric
+
+    scale = interval / 1000 * factor * random.uniform(0.95, 1.05)
+    return BasicMetric(*(value * scale for value in base.astuple()[:8]), base.llc_size,
+                       base.local_mem * scale, base.remote_mem * scale, interval)
+
+
+def _feed(groups: List[Tuple], contentions: List[Tuple[float, float]], stop: threading.Event,
+          cpu_times: List[float]) -> None:
+    """
+    Append a metric to each workload of the groups every its perf interval
+    :param contentions: the range of the slowdown of the foregrounds is the last one, so it can be appended to
+    :param cpu_times: the CPU time (sec) of this thread is appended on the exit
+    """
+    from libs.solorun_data.datas import data_map, solorun_profile
+
+    cpu_start = time.thread_time()
+    now = time.monotonic()
+    schedule = [(now + random.uniform(0, fg.perf_interval / 1000), idx) for idx, (fg, _) in enumerate(groups)]
+    heapq.heapify(schedule)
+
+    while not stop.is_set():
+        due, idx = heapq.heappop(schedule)
+        stop.wait(max(0.0, due - time.monotonic()))
+
+        fg, bg = groups[idx]
+        bg.append_metrics((_metric(solorun_profile(bg.name, len(bg.bound_cores)), 1, bg.perf_interval),), 50)
+        fg.append_metrics((_metric(data_map[fg.name], random.uniform(*contentions[-1]), fg.perf_interval),), 50)
+
+        heapq.heappush(schedule, (due + fg.perf_interval / 1000, idx))
+
+    cpu_times.append(time.thread_time() - cpu_start)
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def _run(emulator: SysfsEmulator, args: argparse.Namespace, cores_per_socket: int, event_driven: bool) -> None:
+    from controller import Controller
+    from libs.isolation.policies import AggressiveWViolationPolicy
+    from libs.solorun_data.datas import data_map
+    from libs.workload import Workload
+
+    random.seed(args.seed)
+    controller = Controller(metric_buf_size=50, swap_off=True, num_workers=args.workers)
+    groups: List[Tuple] = list()
+    procs: List[subprocess.Popen] = list()
+
+    try:
+        for idx in range(args.groups):
+            socket_id = idx % 2
+            first_core = socket_id * cores_per_socket + (idx // 2) * 4
+            perf_interval = args.perf_intervals[idx % len(args.perf_intervals)]
+            workloads = list()
+
+            for wl_type, names, cores in (('fg', _FG_NAMES, range(first_core, first_core + 2)),
+                                          ('bg', _BG_NAMES, range(first_core + 2, first_core + 4))):
+                name = names[idx % len(names)]
+                proc = subprocess.Popen(('sleep', 'infinity'))
+                procs.append(proc)
+
+                emulator.add_group(f'{name}_{proc.pid}', cores, (socket_id,))
+                workload = Workload(name, wl_type, proc.pid, proc.pid, perf_interval)
+                if wl_type == 'fg':
+                    workload.avg_solorun_data = data_map[name]
+                workloads.append(workload)
+
+            fg, bg = workloads
+            group = AggressiveWViolationPolicy(fg, (bg,))
+            controller._isolation_groups[group] = 0
+            if event_driven:
+                fg.metric_listener = functools.partial(controller._on_fg_metrics, group)
+            groups.append((fg, bg))
+
+        # delay from the arrival of a metric of the foreground to the first isolation that sees it
+        delays: List[float] = list()
+        num_stale = 0
+        seen_at = dict()
+        # delay from the shift of the contention to the first isolation of each group that sees a shifted metric
+        shifted_at = None
+        reactions = dict()
+        prepare_group = controller._prepare_group
+
+        def prepare_and_measure(group_) -> bool:
+            nonlocal num_stale
+            received_at = group_.foreground_workload.metrics_received_at
+            if seen_at.get(group_) == received_at:
+                num_stale += 1
+            elif received_at != float('-inf'):
+                seen_at[group_] = received_at
+                delays.append(time.monotonic() - received_at)
+                if shifted_at is not None and received_at > shifted_at and group_ not in reactions:
+                    reactions[group_] = time.monotonic() - shifted_at
+            return prepare_group(group_)
+
+        controller._prepare_group = prepare_and_measure
+
+        stop = threading.Event()
+        # the foregrounds of a converged host run as fast as solo
+        contentions = [(0.98, 1.02) if args.converged else (0.6, 1.1)]
+        feeder_cpu_times: List[float] = list()
+        feeder = threading.Thread(target=_feed, args=(groups, contentions, stop, feeder_cpu_times), daemon=True)
+        feeder.start()
+
+        start = time.monotonic()
+        cpu_start = time.process_time()
+        while time.monotonic() - start < args.duration:
+            if args.shift_at is not None and shifted_at is None and time.monotonic() - start >= args.shift_at:
+                contentions.append((0.4, 0.6))
+                shifted_at = time.monotonic()
+
+            if event_driven:
+                controller._wait_and_isolate()
+            else:
+                # the former loop: every group on every tick
+                controller._ticker.wait()
+                controller._remove_ended_groups()
+                controller._isolate(controller._isolation_groups, time.monotonic())
+        stop.set()
+        feeder.join()
+        # the CPU time of the controller, including its workers
+        cpu_time = time.process_time() - cpu_start - feeder_cpu_times[0]
+
+        num_isolations = len(delays) + num_stale
+        print(f'{"metric wakeups" if event_driven else "every tick":>14}: '
+              f'delay (ms) mean {statistics.mean(delays) * 1000:>6.1f}, '
+              f'p99 {_percentile(delays, 0.99) * 1000:>6.1f} | '
+              f'isolations/s {num_isolations / args.duration:>6.1f}, '
+              f'on stale metrics {num_stale / max(1, num_isolations) * 100:>5.1f} % | '
+              f'CPU time {cpu_time / args.duration * 100:>5.1f} % | {controller._ticker.summary()}')
+        if shifted_at is not None:
+            print(f'{"":>14}  reaction to the shift (ms) mean {statistics.mean(reactions.values()) * 1000:>6.1f}, '
+                  f'max {max(reactions.values()) * 1000:>6.1f}, '
+                  f'{args.groups - len(reactions)} groups did not react')
+
+    finally:
+        for proc in procs:
+            proc.kill()
+            proc.wait()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Measure the reaction of the controller to the metrics.')
+    parser.add_argument('-g', '--groups', default=100, type=int, help='number of isolation groups (default : 100)')
+    parser.add_argument('-d', '--duration', default=10, type=float, help='duration (sec) of each mode (default : 10)')
+    parser.add_argument('-i', '--perf-intervals', dest='perf_intervals', default=[200, 500, 1000], type=int,
+                        nargs='+', help='perf intervals (ms) that the groups are given in turn '
+                                        '(default : 200 500 1000)')
+    parser.add_argument('-w', '--workers', default=4, type=int,
+                        help='number of threads that isolate the sockets in parallel (default : 4)')
+    parser.add_argument('--converged', action='store_true',
+                        help='feed the foregrounds without contention, so the groups converge')
+    parser.add_argument('--shift-at', dest='shift_at', default=None, type=float,
+                        help='time (sec) that the foregrounds are slowed down to 40-60 %% of solo')
+    parser.add_argument('--seed', default=0, type=int, help='random seed (default : 0)')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    cores_per_socket = math.ceil(args.groups / 2) * 4
+    emulator = SysfsEmulator(num_sockets=2, cores_per_socket=cores_per_socket)
+    emulator.install()
+
+    # `libs` reads the tree on import, so everything is imported after the emulator is installed
+    from libs.solorun_data.profile_store import ProfileStore
+    ProfileStore.PATH = str(emulator.root / 'solorun_profiles.db')
+
+    try:
+        for event_driven in (False, True):
+            _run(emulator, args, cores_per_socket, event_driven)
+            # the isolators reset the tree when they are collected
+            gc.collect()
+    finally:
+        emulator.cleanup()
+
+
+if __name__ == '__main__':
+    main()
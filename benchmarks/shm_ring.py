@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+# coding: UTF-8
+
+"""
+Benchmark of the shared memory ring transport of the metrics.
+Reports the read throughput of `ShmRingReader`, and the delivery latency (from writing a record until it is appended
+to `Workload.metrics`) of a workload registered with a ring, compared with one that sends its metrics through
+the in-process `FakeBroker`. The latency of a real broker adds a network round trip to the latter.
+No RabbitMQ, RDT, cpufreq or root privilege is required.
+"""
+
+import argparse
+import gc
+import logging
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Callable, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from libs.sysfs_emulator import SysfsEmulator  # noqa: E402
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def _report(name: str, latencies: List[float]) -> None:
+    print(f'{name:<20}: mean {statistics.mean(latencies) * 1_000_000:>9.1f} us, '
+          f'p50 {_percentile(latencies, 0.5) * 1_000_000:>9.1f} us, '
+          f'p99 {_percentile(latencies, 0.99) * 1_000_000:>9.1f} us')
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Measure the shared memory ring transport of the metrics.')
+    parser.add_argument('-n', '--samples', default=200_000, type=int,
+                        help='number of records for the throughput (default : 200000)')
+    parser.add_argument('-r', '--rounds', default=500, type=int,
+                        help='number of records for the latency (default : 500)')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    emulator = SysfsEmulator(num_sockets=1, cores_per_socket=4)
+    emulator.install()
+
+    # `libs` reads the tree on import, so everything is imported after the emulator is installed
+    from libs.ingestion import FakeBroker, IngestionEngine
+    from libs.isolation.policies import AggressiveWViolationPolicy
+    from libs.metric_container.shm_ring import ShmRing, ShmRingReader, ShmRingWriter
+    from libs.metric_container.wire import MetricCodec
+    from pending_queue import PendingQueue
+
+    def record_of(value: float):
+        # the value is carried in `l2miss`
+        return (value,) + (1.0,) * (len(MetricCodec.FIELDS) - 1)
+
+    # read throughput
+    path = ShmRing.path_of(f'iso_sched_bench.{os.getpid()}')
+    writer = ShmRingWriter.create(path, args.samples, 100)
+    reader = ShmRingReader.open(path)
+    writer.write(record_of(float(i)) for i in range(args.samples))
+
+    start = time.perf_counter()
+    metrics = reader.read()
+    elapsed = time.perf_counter() - start
+
+    assert len(metrics) == args.samples and reader.num_dropped == 0
+    print(f'ring read           : {args.samples / elapsed:>12,.0f} samples/s, '
+          f'{elapsed / args.samples * 1_000_000:>7.3f} us/sample')
+    reader.close()
+    writer.unlink()
+
+    # delivery latency
+    broker = FakeBroker()
+    pending_queue = PendingQueue(AggressiveWViolationPolicy)
+    engine = IngestionEngine(broker, 50, pending_queue)
+    engine.start()
+    engine.wait_ready(10)
+
+    procs = [subprocess.Popen(('sleep', 'infinity')) for _ in range(2)]
+    ring_proc, queue_proc = procs
+    ring_name = f'iso_sched_bench.{ring_proc.pid}'
+    writer = ShmRingWriter.create(ShmRing.path_of(ring_name), 1024, 100)
+
+    try:
+        for idx, proc in enumerate(procs):
+            emulator.add_group(f'bfs_{proc.pid}', (idx,), (0,))
+
+        broker.publish(IngestionEngine.CREATION_QUEUE,
+                       f'bfs_{ring_proc.pid},bg,{ring_proc.pid},{ring_proc.pid},100,{ring_name}'.encode())
+        broker.publish(IngestionEngine.CREATION_QUEUE,
+                       f'bfs_{queue_proc.pid},bg,{queue_proc.pid},{queue_proc.pid},100'.encode())
+
+        while engine.num_rings < 1 or engine.num_consumers < 1:
+            time.sleep(0.01)
+
+        workloads = {wl.pid: wl for wl in pending_queue._ready_queue[0] + pending_queue._ready_queue[1]}
+
+        def measure(pid: int, send: Callable[[float], None]) -> List[float]:
+            workload = workloads[pid]
+            latencies = list()
+            for i in range(1, args.rounds + 1):
+                start = time.perf_counter()
+                send(float(i))
+                # sleeps to release the GIL to the engine
+                while not workload.metrics or workload.metrics[0].l2miss < i:
+                    time.sleep(0.00002)
+                latencies.append(time.perf_counter() - start)
+                # the agents send a record every perf interval, not back to back
+                time.sleep(0.002)
+            return latencies
+
+        _report('shm ring', measure(ring_proc.pid, lambda v: writer.write((record_of(v),))))
+        _report('fake broker', measure(queue_proc.pid, lambda v: broker.publish(
+                f'bfs({queue_proc.pid})', MetricCodec.encode((record_of(v),), 100))))
+
+    finally:
+        engine.stop()
+        engine.join(5)
+        writer.unlink()
+
+        for proc in procs:
+            proc.kill()
+            proc.wait()
+
+        del pending_queue
+        gc.collect()
+
+        emulator.cleanup()
+
+
+if __name__ == '__main__':
+    main()
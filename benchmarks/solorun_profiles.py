@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+# coding: UTF-8
+
+"""
+Benchmark of the core-count-aware solorun profiles.
+For each application profiled with several numbers of cores, a background that runs solo with each of them
+is compared (`MetricDiff`) against the fixed 8-core profile (the former `data_map`)
+and against `solorun_profile()` of its number of cores. A solo background should have no diff.
+The swap benefit estimate is checked the same way: the diff of a background moved from 8 to N cores,
+with the former linear `core_norm` and with the one of the profiles.
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from libs.metric_container.basic_metric import MetricDiff  # noqa: E402
+from libs.solorun_data.datas import data_map, profile_map, solorun_profile  # noqa: E402
+
+
+def main() -> None:
+    for name, profiles in sorted(profile_map.items()):
+        if len(profiles) < 2 or name not in data_map:
+            continue
+
+        for num_cores, measured in sorted(profiles.items()):
+            fixed = MetricDiff(measured, data_map[name])
+            by_cores = MetricDiff(measured, solorun_profile(name, num_cores))
+
+            # a swap estimate of the background on 8 cores taking `num_cores` cores
+            linear = MetricDiff(data_map[name], data_map[name], num_cores / 8)
+            profiled = MetricDiff(data_map[name], data_map[name],
+                                  solorun_profile(name, num_cores).instruction_ps / data_map[name].instruction_ps)
+            truth = MetricDiff(data_map[name], measured)
+
+            print(f'{name:>13} {num_cores:>2} cores: instructions diff, fixed profile {fixed.instruction_ps:>+7.3f}, '
+                  f'by cores {by_cores.instruction_ps:>+7.3f} | swap estimate, linear {linear.instruction_ps:>+7.3f}, '
+                  f'by cores {profiled.instruction_ps:>+7.3f}, measured {truth.instruction_ps:>+7.3f}')
+
+    repeat = 100000
+    start = time.perf_counter()
+    for i in range(repeat):
+        solorun_profile('kmeans', 1 + i % 24)
+    print(f'lookup with interpolation: {(time.perf_counter() - start) / repeat * 1_000_000:.2f} us')
+
+
+if __name__ == '__main__':
+    main()
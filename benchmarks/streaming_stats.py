@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# coding: UTF-8
+
+"""
+Benchmark of the estimators of the current metric of a workload.
+A foreground workload whose instructions per second are stationary but noisy is monitored by an isolator
+for a number of ticks, and the actuations (STRENGTHEN or WEAKEN) that the monitoring decisions chose
+and the reversals of their direction are counted for each estimator and confidence level.
+The actuations are synthetic and do not change the metrics, so every actuation of the monitoring is spurious.
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from typing import Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from libs.isolation import NextStep  # noqa: E402
+from libs.isolation.isolators import Isolator  # noqa: E402
+from libs.metric_container.basic_metric import BasicMetric, MetricDiff  # noqa: E402
+from libs.metric_container.streaming_stats import Estimator, MetricStats  # noqa: E402
+
+
+def _metric(instructions: float, interval: float) -> BasicMetric:
+    return BasicMetric(1e6, 4e5, instructions, 1e9, 1e8, 1e9, 0, 0, 1e6, 1e7, 1e6, interval)
+
+
+class _Workload:
+    """The part of `Workload` that the decisions use"""
+
+    def __init__(self, window: int, alpha: float, estimator: Estimator, confidence: float) -> None:
+        self.metric_stats = MetricStats(window, alpha)
+        self.avg_solorun_data = _metric(1e9, 100)
+        self.estimator = estimator
+        self.confidence = confidence
+
+    def calc_metric_diff(self, core_norm: float = 1) -> MetricDiff:
+        return MetricDiff.from_stats(self.metric_stats, self.avg_solorun_data, core_norm,
+                                     self.estimator, self.confidence)
+
+
+class _Isolator(Isolator):
+    _METRIC_TYPE = 'instruction_ps'
+
+    def __init__(self, foreground_wl) -> None:
+        super().__init__(foreground_wl, ())
+
+    def strengthen(self) -> 'Isolator':
+        return self
+
+    def weaken(self) -> 'Isolator':
+        return self
+
+    @property
+    def is_max_level(self) -> bool:
+        return False
+
+    @property
+    def is_min_level(self) -> bool:
+        return False
+
+    def enforce(self) -> None:
+        pass
+
+    def reset(self) -> None:
+        pass
+
+    def store_cur_config(self) -> None:
+        pass
+
+    def load_cur_config(self) -> None:
+        pass
+
+
+def _simulate(args: argparse.Namespace, estimator: Estimator, confidence: float) -> Tuple[int, int]:
+    """
+    :return: number of the actuations of the monitoring decisions and the reversals of their direction
+    """
+    random.seed(args.seed)
+
+    workload = _Workload(args.window, args.alpha, estimator, confidence)
+    isolator = _Isolator(workload)
+
+    actuations = reversals = 0
+    last_step = NextStep.IDLE
+
+    for _ in range(args.ticks):
+        instructions = 1e9 * (1 + args.slowdown) * random.gauss(1, args.noise)
+        workload.metric_stats.update(_metric(instructions, 100))
+
+        is_monitoring = not isolator.is_first_decision
+        step = isolator.decide_next_step()
+
+        if step is NextStep.STOP:
+            # the controller moves on to the next isolator, which starts with its first decision
+            isolator.yield_isolation()
+            last_step = NextStep.IDLE
+            continue
+
+        if is_monitoring:
+            actuations += 1
+            if last_step is not NextStep.IDLE and step is not last_step:
+                reversals += 1
+        last_step = step
+
+    return actuations, reversals
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Count the spurious actuations of the estimators.')
+    parser.add_argument('-t', '--ticks', default=10000, type=int, help='number of ticks (default : 10000)')
+    parser.add_argument('-n', '--noise', default=0.05, type=float,
+                        help='relative standard deviation of the instructions per second (default : 0.05)')
+    parser.add_argument('-s', '--slowdown', default=-0.1, type=float,
+                        help='true diff of the instructions per second from the solorun data (default : -0.1)')
+    parser.add_argument('-w', '--window', default=10, type=int, help='window of the statistics (default : 10)')
+    parser.add_argument('-a', '--alpha', default=0.5, type=float, help='smoothing factor of EWMA (default : 0.5)')
+    parser.add_argument('--seed', default=0, type=int, help='random seed (default : 0)')
+    args = parser.parse_args()
+
+    for estimator in Estimator:
+        for confidence in (0, 0.95):
+            actuations, reversals = _simulate(args, estimator, confidence)
+            print(f'{estimator.value:>6}, confidence {confidence:.2f}: '
+                  f'{actuations:>5} actuations while monitoring, {reversals:>5} reversals')
+
+    stats = MetricStats(args.window, args.alpha)
+    metric = _metric(1e9, 100)
+    start = time.perf_counter()
+    for _ in range(args.ticks):
+        stats.update(metric)
+    print(f'update of the statistics of a metric: {(time.perf_counter() - start) / args.ticks * 1_000_000:.1f} us')
+
+
+if __name__ == '__main__':
+    main()
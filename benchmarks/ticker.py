@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+# coding: UTF-8
+
+"""
+Benchmark of the period of the control loop.
+The work of a tick is emulated by a sleep of a random duration (a fraction of the interval given by `--loads`).
+Compares the former loop (a fixed sleep of the interval before the work) with `Ticker`,
+by the mean period, the drift of the last tick from its ideal start and the overruns.
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from typing import List
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from libs.utils.ticker import Ticker  # noqa: E402
+
+
+def _work(interval: float, load: float) -> None:
+    time.sleep(interval * load * random.uniform(0.5, 1.5))
+
+
+def _report(name: str, starts: List[float], interval: float, ticker: Ticker = None) -> None:
+    period = (starts[-1] - starts[0]) / (len(starts) - 1)
+    drift = starts[-1] - (starts[0] + (len(starts) - 1) * interval)
+    print(f'{name:>16}: mean period {period * 1000:>7.2f} ms, drift {drift * 1000:>8.1f} ms'
+          + (f', {ticker.summary()}' if ticker is not None else ''))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Measure the period of the control loop.')
+    parser.add_argument('-i', '--interval', default=0.02, type=float, help='interval (sec) (default : 0.02)')
+    parser.add_argument('-t', '--ticks', default=200, type=int, help='number of ticks (default : 200)')
+    parser.add_argument('-l', '--loads', default=[0.3, 0.9], type=float, nargs='+',
+                        help='mean work of a tick relative to the interval (default : 0.3 0.9)')
+    parser.add_argument('--seed', default=0, type=int, help='random seed (default : 0)')
+    args = parser.parse_args()
+
+    for load in args.loads:
+        print(f'load {load:.1f}')
+
+        random.seed(args.seed)
+        starts: List[float] = list()
+        for _ in range(args.ticks):
+            time.sleep(args.interval)
+            starts.append(time.monotonic())
+            _work(args.interval, load)
+        _report('fixed sleep', starts, args.interval)
+
+        for catch_up in (False, True):
+            random.seed(args.seed)
+            ticker = Ticker(args.interval, catch_up)
+            starts = list()
+            for _ in range(args.ticks):
+                ticker.wait()
+                starts.append(time.monotonic())
+                _work(args.interval, load)
+            _report('ticker, catch up' if catch_up else 'ticker, skip', starts, args.interval, ticker)
+
+
+if __name__ == '__main__':
+    main()
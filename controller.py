@@ -3,20 +3,37 @@
 
 import argparse
 import datetime
+import functools
 import logging
 import os
 import subprocess
 import sys
 import time
-from typing import Dict, Optional
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
+from threading import Thread
+from typing import ClassVar, Dict, Iterable, List, Optional, Set, Tuple
 
 import psutil
 
 import libs
 from libs.isolation import NextStep
+from libs.isolation.batch_decision import BatchDecision
 from libs.isolation.isolators import Isolator
 from libs.isolation.policies import AggressiveWViolationPolicy, IsolationPolicy
+from libs.ingestion import IngestionEngine, PikaBroker
 from libs.isolation.swapper import SwapIsolator
+from libs.metric_container.perf_collector import PerfCollector
+from libs.metric_container.resctrl_sampler import ResCtrlSampler
+from libs.metric_container.streaming_stats import Estimator
+from libs.solorun_data.profile_store import ProfileStore
+from libs.utils import capabilities, tick
+from libs.utils import numa_topology
+from libs.utils.actuator import Actuator
+from libs.utils.privileged_writer import PrivilegedWriter
+from libs.utils.readiness import Readiness
+from libs.utils.ticker import Ticker
+from libs.workload import Workload
 from pending_queue import PendingQueue
 from polling_thread import PollingThread
 
@@ -24,83 +41,261 @@ MIN_PYTHON = (3, 6)
 
 
 class Controller:
-    def __init__(self, metric_buf_size: int, swap_off: bool) -> None:
+    # interval (sec) of the report of the overruns of the ticks
+    _OVERRUN_REPORT_INTERVAL: ClassVar[float] = 10.0
+
+    def __init__(self, metric_buf_size: int, swap_off: bool, rdt_interval: float = 0,
+                 ingestion: str = 'asyncio', num_shards: int = 4, prefetch: int = 256,
+                 catch_up: bool = False, num_workers: int = 4) -> None:
         self._pending_queue: PendingQueue = PendingQueue(AggressiveWViolationPolicy)
 
         self._interval: float = 0.2  # scheduling interval (sec)
-        self._profile_interval: float = 1.0  # check interval for phase change (sec)
+        self._profile_interval: float = 1.0  # check interval for the solorun data and the number of threads (sec)
         self._solorun_interval: float = 2.0  # the FG's solorun profiling interval (sec)
-        self._solorun_count: Dict[IsolationPolicy, Optional[int]] = dict()
+        # `time.monotonic()` when the solorun profiling of a group started
+        self._solorun_started_at: Dict[IsolationPolicy, float] = dict()
+        # `time.monotonic()` when `profile_needed()` of a group was checked
+        self._profile_checked_at: Dict[IsolationPolicy, float] = dict()
+
+        # the ticks are on a grid of the monotonic clock, so the period does not stretch with the work of a tick
+        self._ticker: Ticker = Ticker(self._interval, catch_up)
+        # the groups whose foregrounds received new metrics. they are isolated without waiting for the next tick
+        self._readiness: Readiness[IsolationPolicy] = Readiness()
+        # the groups that get ready within this (sec) after the first one are isolated together
+        self._coalesce_interval: float = 0.01
+        # `time.monotonic()` when a group was isolated last, and when the latest metric that it evaluated arrived
+        self._isolated_at: Dict[IsolationPolicy, float] = dict()
+        self._evaluated_metric_at: Dict[IsolationPolicy, float] = dict()
 
         self._isolation_groups: Dict[IsolationPolicy, int] = dict()
 
-        self._polling_thread = PollingThread(metric_buf_size, self._pending_queue)
+        # the resctrl monitoring counters are sampled in-process if the hardware supports
+        self._rdt_sampler: Optional[ResCtrlSampler] = None
+        if rdt_interval > 0 and (capabilities.has_cmt() or capabilities.has_mbm()):
+            self._rdt_sampler = ResCtrlSampler(rdt_interval)
+
+        # the workloads without a perf agent are counted in-process.
+        # their metrics are compared with the solorun profiles, so only the hardware counters will do
+        self._perf_collector: Optional[PerfCollector] = None
+        if capabilities.has_perf_events() and capabilities.has_hw_perf_counters():
+            self._perf_collector = PerfCollector(metric_buf_size, self._rdt_sampler)
+
+        self._polling_thread: Thread
+        if ingestion == 'blocking':
+            self._polling_thread = PollingThread(metric_buf_size, self._pending_queue, self._rdt_sampler)
+        else:
+            self._polling_thread = IngestionEngine(PikaBroker('localhost'), metric_buf_size, self._pending_queue,
+                                                   self._rdt_sampler, num_shards, prefetch)
         self._swap_off: bool = swap_off
 
         # Swapper init
         self._swapper: SwapIsolator = SwapIsolator(self._isolation_groups)
 
+        self._actuator: Actuator = Actuator.instance()
+
+        # the groups on different sockets are isolated in parallel by these workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        if num_workers > 1:
+            self._executor = ThreadPoolExecutor(max_workers=num_workers, thread_name_prefix='isolation')
+
     def _isolate_workloads(self) -> None:
+        """
+        Isolate the groups that are due on a tick, then swap the workloads if needed
+        """
+        # the periods are compared on the grid of the ticks, so the jitter of a wakeup does not postpone a group
+        now = self._ticker.deadline if self._ticker.deadline is not None else time.monotonic()
+        self._isolate((group for group in self._isolation_groups if self._isolation_due(group, now)), now)
+
+        if not self._swap_off and len(tuple(g for g in self._isolation_groups if g.safe_to_swap)) >= 2:
+            if self._swapper.swap_is_needed():
+                self._swapper.do_swap()
+
+    def _isolation_due(self, group: IsolationPolicy, now: float) -> bool:
+        """
+        A group is isolated once per its control period, on the metric of the foreground that arrives closest to
+        the end of the period, and right away on a phase change. A metric is evaluated twice only if the metrics of
+        the foreground stall: then the group is isolated every `MAX_PERIOD`, so its checks (e.g. of the number of
+        threads) keep running.
+        """
+        # the solorun profiling is timed by the clock, not by the metrics
+        if group.in_solorun_profiling:
+            return True
+
+        foreground = group.foreground_workload
+        elapsed = now - self._isolated_at.get(group, float('-inf'))
+        if foreground.metrics_received_at <= self._evaluated_metric_at.get(group, float('-inf')):
+            return elapsed >= group.MAX_PERIOD
+
+        if group.phase_changed:
+            return True
+
+        return elapsed >= group.period - foreground.perf_interval / 1000 / 2
+
+    def _isolate(self, groups: Iterable[IsolationPolicy], now: float) -> None:
+        """
+        :param now: `time.monotonic()` that the timers of the groups are restarted from
+        """
         logger = logging.getLogger(__name__)
 
-        for group, iteration_num in self._isolation_groups.items():
+        # the groups may have ended after they got ready
+        groups = tuple(group for group in groups if group in self._isolation_groups)
+        if not groups:
+            return
+
+        # the metrics and their diffs are computed once per workload in a tick
+        tick.advance()
+
+        # the diffs of all workloads are computed in a single pass
+        try:
+            BatchDecision.prime(chain.from_iterable((group.foreground_workload, *group.background_workloads)
+                                                    for group in groups))
+        except OSError as e:
+            logger.warning(f'Error occurred while computing the metrics. the tick is skipped: {e}')
+            return
+
+        for group in groups:
+            self._isolated_at[group] = now
+            self._evaluated_metric_at[group] = group.foreground_workload.metrics_received_at
+
+        domains = self._socket_domains(groups)
+
+        if self._executor is None or len(domains) < 2:
+            for domain in domains:
+                self._isolate_groups(domain)
+        else:
+            # the swapper has to see the configurations of all domains, so it waits for all of them
+            for future in tuple(self._executor.submit(self._isolate_groups, domain) for domain in domains):
+                future.result()
+
+    def _socket_domains(self, groups: Iterable[IsolationPolicy]) -> List[List[IsolationPolicy]]:
+        """
+        Partition the groups into the domains that are isolated independently of each other.
+        The groups that have cores on the same socket (so share its LLC, memory bandwidth and cores)
+        are in the same domain, so they are serialized. A group that spans sockets merges their domains.
+        """
+        domains: List[Tuple[Set[int], List[IsolationPolicy]]] = list()
+
+        for group in groups:
+            sockets = set(numa_topology.core_to_node[core_id]
+                          for workload in (group.foreground_workload, *group.background_workloads)
+                          for core_id in workload.bound_cores)
+            merged = [group]
+
+            for domain in tuple(domains):
+                domain_sockets, domain_groups = domain
+                if not domain_sockets.isdisjoint(sockets):
+                    sockets |= domain_sockets
+                    merged = domain_groups + merged
+                    domains.remove(domain)
+
+            domains.append((sockets, merged))
+
+        return [domain_groups for _, domain_groups in domains]
+
+    def _isolate_groups(self, groups: List[IsolationPolicy]) -> None:
+        """
+        Isolators only stage their configurations, and the diff of them are applied at the end of the transaction.
+        Each group has its own transaction, because the isolators have already moved to their new steps when it is
+        applied: a failed write (e.g. of a vanished background) must not roll back the other groups behind them.
+        """
+        logger = logging.getLogger(__name__)
+
+        deciding: List[IsolationPolicy] = list()
+
+        for group in groups:
             logger.info('')
-            logger.info(f'***************isolation of {group.name} #{iteration_num}***************')
+            logger.info(f'***************isolation of {group.name} #{self._isolation_groups[group]}***************')
 
             try:
-                if group.in_solorun_profiling:
-                    if iteration_num - self._solorun_count[group] >= int(self._solorun_interval / self._interval):
-                        logger.info('Stopping solorun profiling...')
-
-                        group.stop_solorun_profiling()
-                        del self._solorun_count[group]
+                with self._actuator.transaction():
+                    if self._prepare_group(group):
+                        deciding.append(group)
 
-                        logger.info('skipping isolation... because corun data isn\'t collected yet')
-                    else:
-                        logger.info('skipping isolation because of solorun profiling...')
-
-                    continue
-
-                # TODO: first expression can lead low reactivity
-                elif iteration_num % int(self._profile_interval / self._interval) == 0 and group.profile_needed():
-                    logger.info('Starting solorun profiling...')
-                    group.start_solorun_profiling()
-                    self._solorun_count[group] = iteration_num
-                    group.set_idle_isolator()
-                    logger.info('skipping isolation because of solorun profiling...')
-                    continue
-
-                if group.new_isolator_needed:
-                    group.choose_next_isolator()
-
-                cur_isolator: Isolator = group.cur_isolator
-
-                decided_next_step: NextStep = cur_isolator.decide_next_step()
-                logger.info(f'Monitoring Result : {decided_next_step.name}')
-
-                if decided_next_step is NextStep.STRENGTHEN:
-                    cur_isolator.strengthen()
-                elif decided_next_step is NextStep.WEAKEN:
-                    cur_isolator.weaken()
-                elif decided_next_step is NextStep.STOP:
-                    group.set_idle_isolator()
-                    continue
-                elif decided_next_step is NextStep.IDLE:
-                    continue
-                else:
-                    raise NotImplementedError(f'unknown isolation result : {decided_next_step}')
-
-                cur_isolator.enforce()
-
-            except (psutil.NoSuchProcess, subprocess.CalledProcessError, ProcessLookupError):
+            except (psutil.NoSuchProcess, subprocess.CalledProcessError, OSError):
                 pass
 
             finally:
                 self._isolation_groups[group] += 1
 
-        if not self._swap_off and len(tuple(g for g in self._isolation_groups if g.safe_to_swap)) >= 2:
-            if self._swapper.swap_is_needed():
-                self._swapper.do_swap()
+        # the next steps of all groups of the domain are decided at once, then each group applies its own
+        isolators: List[Isolator] = [group.cur_isolator for group in deciding]
+
+        # an isolator that fails to decide is idle in this tick, without affecting the others
+        decided_next_steps: List[NextStep] = BatchDecision.decide(isolators)
+
+        for group, cur_isolator, decided_next_step in zip(deciding, isolators, decided_next_steps):
+            logger.info(f'Monitoring Result of {group.name} : {decided_next_step.name}')
+
+            try:
+                with self._actuator.transaction():
+                    if decided_next_step is NextStep.STRENGTHEN:
+                        group.tighten_period()
+                        cur_isolator.strengthen()
+                    elif decided_next_step is NextStep.WEAKEN:
+                        group.tighten_period()
+                        cur_isolator.weaken()
+                    elif decided_next_step is NextStep.STOP:
+                        group.back_off_period()
+                        group.set_idle_isolator()
+                        continue
+                    elif decided_next_step is NextStep.IDLE:
+                        group.back_off_period()
+                        continue
+                    else:
+                        raise NotImplementedError(f'unknown isolation result : {decided_next_step}')
+
+                    cur_isolator.enforce()
+
+            except (psutil.NoSuchProcess, subprocess.CalledProcessError, OSError) as e:
+                logger.warning(f'Error occurred while applying isolation. {group.name} is rolled back: {e}')
+
+    def _prepare_group(self, group: IsolationPolicy) -> bool:
+        """
+        Run the solorun profiling of the group and choose its isolator
+        :return: `True` if the current isolator of the group has to decide its next step in this tick
+        """
+        logger = logging.getLogger(__name__)
+
+        now = time.monotonic()
+
+        if group.in_solorun_profiling:
+            if now - self._solorun_started_at[group] >= self._solorun_interval:
+                logger.info('Stopping solorun profiling...')
+
+                try:
+                    group.stop_solorun_profiling()
+                finally:
+                    # the start time goes with the profiling flag, which a failed stop may leave set
+                    if not group.in_solorun_profiling:
+                        del self._solorun_started_at[group]
+
+                logger.info('skipping isolation... because corun data isn\'t collected yet')
+            else:
+                logger.info('skipping isolation because of solorun profiling...')
+
+            return False
+
+        # the phase detector is checked every tick, the others of `profile_needed()` every `_profile_interval`
+        elif (group.phase_changed or self._profile_check_due(group, now)) and group.profile_needed():
+            logger.info('Starting solorun profiling...')
+            group.start_solorun_profiling()
+            self._solorun_started_at[group] = now
+            group.set_idle_isolator()
+            logger.info('skipping isolation because of solorun profiling...')
+            return False
+
+        if group.new_isolator_needed:
+            group.choose_next_isolator()
+
+        return True
+
+    def _profile_check_due(self, group: IsolationPolicy, now: float) -> bool:
+        checked_at = self._profile_checked_at.get(group)
+        if checked_at is not None and now - checked_at < self._profile_interval:
+            return False
+
+        self._profile_checked_at[group] = now
+        return True
 
     def _register_pending_workloads(self) -> None:
         """
@@ -114,6 +309,28 @@ class Controller:
             logger.info(f'{pending_group} is created')
 
             self._isolation_groups[pending_group] = 0
+            pending_group.foreground_workload.metric_listener = functools.partial(self._on_fg_metrics, pending_group)
+
+            if self._perf_collector is not None:
+                self._register_to_perf_collector(pending_group)
+
+    def _on_fg_metrics(self, group: IsolationPolicy, _: Workload) -> None:
+        """Called from the ingestion thread when the foreground of `group` receives new metrics"""
+        # a group that backed off is due right away if its contention changed
+        group.contention_changed()
+        self._readiness.signal(group)
+
+    def _register_to_perf_collector(self, group: IsolationPolicy) -> None:
+        logger = logging.getLogger(__name__)
+
+        for workload in (group.foreground_workload, *group.background_workloads):
+            if workload.has_perf_agent:
+                continue
+
+            try:
+                self._perf_collector.register(workload)
+            except OSError as e:
+                logger.warning(f'failed to count the perf events of {workload}: {e}')
 
     def _remove_ended_groups(self) -> None:
         """
@@ -131,24 +348,77 @@ class Controller:
 
             # remove from containers
             group.reset()
+            group.foreground_workload.metric_listener = None
             del self._isolation_groups[group]
+            self._readiness.discard(group)
+            self._isolated_at.pop(group, None)
+            self._evaluated_metric_at.pop(group, None)
+            self._profile_checked_at.pop(group, None)
             if group.in_solorun_profiling:
                 for bg in filter(lambda w: w.is_running, group.background_workloads):
                     bg.resume()
-                del self._solorun_count[group]
+                del self._solorun_started_at[group]
+
+    def _wait_and_isolate(self) -> None:
+        """
+        Wait until the next tick or until the foreground of any group receives new metrics, whichever comes first,
+        and isolate the groups that are due
+        """
+        ready = self._readiness.wait(self._ticker.time_left())
+
+        # the groups that get ready right after the first one are isolated together,
+        # and with the tick if it is that close, so the isolation does not delay the tick
+        if self._ticker.time_left() > self._coalesce_interval:
+            # the metrics of the groups that backed off do not start an isolation
+            if not any(self._isolation_due(group, time.monotonic()) for group in ready
+                       if group in self._isolation_groups):
+                return
+
+            time.sleep(self._coalesce_interval)
+            ready |= self._readiness.wait(0)
+
+            now = time.monotonic()
+            self._isolate((group for group in ready
+                           if group in self._isolation_groups and self._isolation_due(group, now)), now)
+            return
+
+        self._ticker.wait()
+        # checking every workload is too costly for the wakeups on the metrics
+        self._remove_ended_groups()
+        if self._perf_collector is not None:
+            self._perf_collector.collect()
+        # every group is checked on a tick
+        self._readiness.wait(0)
+        self._isolate_workloads()
 
     def run(self) -> None:
         self._polling_thread.start()
+        if self._rdt_sampler is not None:
+            self._rdt_sampler.start()
 
         logger = logging.getLogger(__name__)
+        logger.info(f'hardware capabilities: {capabilities.summary()}')
+        available = AggressiveWViolationPolicy.available_isolator_types()
+        logger.info(f'available isolators: {", ".join(t.__name__ for t in available)}')
+        if self._perf_collector is not None:
+            logger.info('the workloads without a perf agent are counted in-process')
+        else:
+            logger.warning('the hardware counters are not available. the workloads without a perf agent get no metric')
         logger.info('starting isolation loop')
 
+        reported_at = time.monotonic()
+        reported_overruns = 0
+
         while True:
-            self._remove_ended_groups()
             self._register_pending_workloads()
 
-            time.sleep(self._interval)
-            self._isolate_workloads()
+            self._wait_and_isolate()
+
+            now = time.monotonic()
+            if now - reported_at >= self._OVERRUN_REPORT_INTERVAL:
+                if self._ticker.num_overruns > reported_overruns:
+                    logger.warning(f'ticks of {self._interval * 1000:.0f} ms overran: {self._ticker.summary()}')
+                reported_at, reported_overruns = now, self._ticker.num_overruns
 
 
 def main() -> None:
@@ -157,6 +427,42 @@ def main() -> None:
                         help='metric buffer size per thread. (default : 50)')
 
     parser.add_argument('--swap-off', action='store_true', help='turn off swapper')
+    parser.add_argument('--cache-verify-interval', dest='cache_verify_interval', default='5.0', type=float,
+                        help='interval (sec) to verify the cached workload configurations against the kernel. '
+                             '(default : 5.0)')
+    parser.add_argument('--rdt-interval', dest='rdt_interval', default='0.1', type=float,
+                        help='interval (sec) to sample the resctrl monitoring counters in-process. '
+                             '0 turns it off (default : 0.1)')
+    parser.add_argument('--ingestion', choices=('asyncio', 'blocking'), default='asyncio',
+                        help='metric ingestion engine. `blocking` is the legacy single connection thread '
+                             '(default : asyncio)')
+    parser.add_argument('--ingestion-shards', dest='num_shards', default='4', type=int,
+                        help='number of channels that the metric queues are sharded over (default : 4)')
+    parser.add_argument('--prefetch', default='256', type=int,
+                        help='max number of unacknowledged metric messages per channel (default : 256)')
+    parser.add_argument('--catch-up', dest='catch_up', action='store_true',
+                        help='run the ticks that missed their deadlines back to back instead of skipping them')
+    parser.add_argument('--workers', dest='num_workers', default='4', type=int,
+                        help='number of threads that isolate the groups on different sockets in parallel. '
+                             '1 isolates all groups in the main thread (default : 4)')
+    parser.add_argument('--max-period', dest='max_period', default=IsolationPolicy.MAX_PERIOD, type=float,
+                        help=f'max control period (sec) that a converged group backs off to '
+                             f'(default : {IsolationPolicy.MAX_PERIOD})')
+    parser.add_argument('--profile-store', dest='profile_store', default=ProfileStore.PATH,
+                        help=f'SQLite database of the solorun profiles reused across runs '
+                             f'(default : {ProfileStore.PATH})')
+    parser.add_argument('--profile-max-age', dest='profile_max_age', default=ProfileStore.MAX_AGE, type=float,
+                        help=f'max age (sec) of a stored solorun profile to be reused. 0 always profiles '
+                             f'(default : {ProfileStore.MAX_AGE:.0f})')
+    parser.add_argument('--estimator', choices=tuple(e.value for e in Estimator), default='ewma',
+                        help='estimator of the current metric of a workload from its recent metrics (default : ewma)')
+    parser.add_argument('--stats-window', dest='stats_window', default='10', type=int,
+                        help='number of the latest metrics of the windowed median and variance (default : 10)')
+    parser.add_argument('--ewma-alpha', dest='ewma_alpha', default='0.5', type=float,
+                        help='smoothing factor of the EWMA estimator in (0, 1] (default : 0.5)')
+    parser.add_argument('--confidence', default='0.95', type=float,
+                        help='confidence level that a change of a metric must reach to be acted on. '
+                             '0 acts on any change beyond the fixed thresholds (default : 0.95)')
 
     os.makedirs('logs', exist_ok=True)
 
@@ -183,7 +489,19 @@ def main() -> None:
     monitoring_logger.addHandler(stream_handler)
     monitoring_logger.addHandler(file_handler)
 
-    controller = Controller(args.buf_size, args.swap_off)
+    Workload.CACHE_VERIFY_INTERVAL = args.cache_verify_interval
+    Workload.METRIC_ESTIMATOR = Estimator(args.estimator)
+    Workload.STATS_WINDOW = args.stats_window
+    Workload.STATS_ALPHA = args.ewma_alpha
+    Workload.DECISION_CONFIDENCE = args.confidence
+    IsolationPolicy.MAX_PERIOD = args.max_period
+    ProfileStore.PATH = args.profile_store
+    ProfileStore.MAX_AGE = args.profile_max_age
+    # a batch of each worker is applied by its own helper
+    PrivilegedWriter.MAX_HELPERS = max(1, args.num_workers)
+
+    controller = Controller(args.buf_size, args.swap_off, args.rdt_interval,
+                            args.ingestion, args.num_shards, args.prefetch, args.catch_up, args.num_workers)
     controller.run()
 
 
@@ -0,0 +1,6 @@
+# coding: UTF-8
+
+from .broker import Broker, Channel
+from .engine import IngestionEngine
+from .fake_broker import FakeBroker
+from .pika_broker import PikaBroker
@@ -0,0 +1,56 @@
+# coding: UTF-8
+
+import asyncio
+from abc import ABCMeta, abstractmethod
+from typing import Callable
+
+# called with the delivery tag and the body of a message
+DeliveryCallback = Callable[[int, bytes], None]
+
+
+class Channel(metaclass=ABCMeta):
+    """A channel of the message broker. All methods must be called on the event loop of its broker"""
+
+    @abstractmethod
+    async def set_prefetch(self, count: int) -> None:
+        """Limit the number of the unacknowledged messages that delivered to this channel (0 means unlimited)"""
+        pass
+
+    @abstractmethod
+    async def declare_queue(self, name: str) -> None:
+        pass
+
+    @abstractmethod
+    async def consume(self, queue: str, callback: DeliveryCallback) -> str:
+        """
+        :return: consumer tag to cancel the consumption
+        """
+        pass
+
+    @abstractmethod
+    async def cancel(self, consumer_tag: str) -> None:
+        pass
+
+    @abstractmethod
+    def ack(self, delivery_tag: int, multiple: bool = False) -> None:
+        pass
+
+    @abstractmethod
+    async def close(self) -> None:
+        pass
+
+
+class Broker(metaclass=ABCMeta):
+    """Connection to a message broker that runs on an asyncio event loop"""
+
+    @abstractmethod
+    async def connect(self, loop: asyncio.AbstractEventLoop) -> None:
+        pass
+
+    @abstractmethod
+    async def channel(self) -> Channel:
+        pass
+
+    @abstractmethod
+    async def close(self) -> None:
+        pass
@@ -0,0 +1,268 @@
+# coding: UTF-8
+
+import asyncio
+import functools
+import logging
+from threading import Event, Thread
+from typing import ClassVar, Dict, List, Optional, Tuple
+
+import psutil
+
+from .broker import Broker, Channel
+from ..metric_container.basic_metric import BasicMetric
+from ..metric_container.resctrl_sampler import ResCtrlSampler
+from ..metric_container.shm_ring import ShmRing, ShmRingError, ShmRingReader
+from ..metric_container.wire import MetricCodec
+from ..workload import Workload
+
+
+class _AckBatcher:
+    """Acknowledges the messages of a channel at once, every `batch` messages or when flushed"""
+
+    def __init__(self, channel: Channel, batch: int) -> None:
+        self._channel = channel
+        self._batch = batch
+        self._last_delivery_tag: int = 0
+        self._num_unacked: int = 0
+
+    def ack(self, delivery_tag: int) -> None:
+        self._last_delivery_tag = delivery_tag
+        self._num_unacked += 1
+
+        if self._num_unacked >= self._batch:
+            self.flush()
+
+    def flush(self) -> None:
+        if self._num_unacked > 0:
+            self._channel.ack(self._last_delivery_tag, multiple=True)
+            self._num_unacked = 0
+
+
+class IngestionEngine(Thread):
+    """
+    Consumes the workload creation queue and the per-workload metric queues on an asyncio event loop.
+
+    The metric queues are sharded over `num_shards` channels by the pid of the workload, and each channel has its own
+    prefetch window, so a flood of metrics of some workloads can not hold back the others.
+    The delivery callbacks only decode and append the metrics.
+    Creating a `Workload` (which reads procfs and cgroups) runs on an executor,
+    and the queues are declared and consumed by tasks, out of the delivery callbacks.
+
+    The agents on the same host can name a shared memory ring (`ShmRing`) as the optional 6th field of the creation
+    message. The metrics of those workloads are read from the rings every `SHM_POLL_INTERVAL` seconds
+    (only while any ring is registered) and the broker is used only for their creation.
+    """
+
+    CREATION_QUEUE: ClassVar[str] = 'workload_creation'
+    ACK_BATCH: ClassVar[int] = 64
+    ACK_INTERVAL: ClassVar[float] = 0.1
+    # interval (sec) to stop consuming the queues of the ended workloads
+    REAP_INTERVAL: ClassVar[float] = 5.0
+    # interval (sec) to read the shared memory rings. far shorter than the perf intervals of the agents,
+    # and within the window (10 ms) that the controller coalesces the wakeups on the metrics in
+    SHM_POLL_INTERVAL: ClassVar[float] = 0.005
+
+    def __init__(self, broker: Broker, metric_buf_size: int, pending_queue,
+                 rdt_sampler: Optional[ResCtrlSampler] = None, num_shards: int = 4, prefetch: int = 256) -> None:
+        """
+        :param broker: connection to the message broker
+        :param metric_buf_size: metric buffer size of each workload
+        :param pending_queue: `PendingQueue` that the created workloads are added to
+        :param rdt_sampler: the in-process resctrl sampler whose samples are merged into the metrics
+        :param num_shards: number of the channels that the metric queues are sharded over
+        :param prefetch: max number of the unacknowledged metric messages per channel
+        """
+        super().__init__(daemon=True)
+
+        self._broker = broker
+        self._metric_buf_size = metric_buf_size
+        self._pending_wl = pending_queue
+        self._rdt_sampler = rdt_sampler
+        self._num_shards = num_shards
+        self._prefetch = prefetch
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._shards: List[Tuple[Channel, _AckBatcher]] = list()
+        # workload -> (shard index, consumer tag)
+        self._consumers: Dict[Workload, Tuple[int, str]] = dict()
+        self._rings: Dict[Workload, ShmRingReader] = dict()
+        self._ring_poller: Optional[asyncio.Future] = None
+        self._started = Event()
+        self._tasks: List[asyncio.Future] = list()
+
+    @property
+    def num_consumers(self) -> int:
+        return len(self._consumers)
+
+    @property
+    def num_rings(self) -> int:
+        return len(self._rings)
+
+    def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        """
+        Block until the engine starts consuming the creation queue
+        :return: `False` if timed out
+        """
+        return self._started.wait(timeout)
+
+    def stop(self) -> None:
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+
+    def run(self) -> None:
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        self._loop = loop
+
+        try:
+            loop.run_until_complete(self._start())
+            loop.run_forever()
+        finally:
+            if self._ring_poller is not None:
+                self._tasks.append(self._ring_poller)
+            for task in self._tasks:
+                task.cancel()
+            loop.run_until_complete(asyncio.gather(*self._tasks, return_exceptions=True))
+            loop.run_until_complete(self._broker.close())
+            for ring in self._rings.values():
+                ring.close()
+            loop.close()
+
+    async def _start(self) -> None:
+        await self._broker.connect(self._loop)
+
+        for _ in range(self._num_shards):
+            channel = await self._broker.channel()
+            await channel.set_prefetch(self._prefetch)
+            # the batch must be smaller than the prefetch window, or the delivery stalls until the periodic flush
+            batch = min(self.ACK_BATCH, max(1, self._prefetch // 2)) if self._prefetch > 0 else self.ACK_BATCH
+            self._shards.append((channel, _AckBatcher(channel, batch)))
+
+        creation_channel = await self._broker.channel()
+        await creation_channel.declare_queue(self.CREATION_QUEUE)
+        await creation_channel.consume(self.CREATION_QUEUE,
+                                       functools.partial(self._on_creation, creation_channel))
+
+        self._tasks.append(asyncio.ensure_future(self._flush_acks_periodically()))
+        self._tasks.append(asyncio.ensure_future(self._reap_periodically()))
+
+        logger = logging.getLogger('monitoring')
+        logger.debug(f'ingestion engine is started with {self._num_shards} shards')
+        self._started.set()
+
+    def _on_creation(self, channel: Channel, delivery_tag: int, body: bytes) -> None:
+        channel.ack(delivery_tag)
+
+        arr = body.decode().strip().split(',')
+
+        logger = logging.getLogger('monitoring.workload_creation')
+        logger.debug(f'{arr} is received from workload_creation queue')
+
+        if len(arr) not in (5, 6):
+            return
+
+        wl_identifier, wl_type, pid, perf_pid, perf_interval = arr[:5]
+        wl_name = wl_identifier.split('_')[0]
+        ring_path = ShmRing.path_of(arr[5]) if len(arr) == 6 else None
+
+        asyncio.ensure_future(self._register(wl_name, wl_type, int(pid), int(perf_pid), int(perf_interval),
+                                             ring_path))
+
+    async def _register(self, wl_name: str, wl_type: str, pid: int, perf_pid: int, perf_interval: int,
+                        ring_path: Optional[str]) -> None:
+        logger = logging.getLogger('monitoring.workload_creation')
+
+        if not psutil.pid_exists(pid):
+            return
+
+        try:
+            workload = await self._loop.run_in_executor(None, Workload,
+                                                        wl_name, wl_type, pid, perf_pid, perf_interval)
+            ring = await self._loop.run_in_executor(None, ShmRingReader.open, ring_path) if ring_path else None
+        except (psutil.NoSuchProcess, OSError, ShmRingError) as e:
+            logger.warning(f'failed to register {wl_name}({pid}): {e}')
+            return
+
+        if wl_type == 'bg':
+            logger.info(f'{workload} is background process')
+        else:
+            logger.info(f'{workload} is foreground process')
+
+        if self._rdt_sampler is not None:
+            self._rdt_sampler.register(workload)
+
+        self._pending_wl.add(workload)
+
+        if ring is not None:
+            logger.debug(f'metrics of {workload} are read from {ring.path}')
+            self._rings[workload] = ring
+
+            if self._ring_poller is None or self._ring_poller.done():
+                self._ring_poller = asyncio.ensure_future(self._poll_rings_periodically())
+            return
+
+        shard_idx = pid % self._num_shards
+        channel, batcher = self._shards[shard_idx]
+
+        wl_queue_name = '{}({})'.format(wl_name, pid)
+        await channel.declare_queue(wl_queue_name)
+        consumer_tag = await channel.consume(wl_queue_name,
+                                             functools.partial(self._on_metric, workload, batcher))
+        self._consumers[workload] = (shard_idx, consumer_tag)
+
+    def _on_metric(self, workload: Workload, batcher: _AckBatcher, delivery_tag: int, body: bytes) -> None:
+        try:
+            # a message holds a batch of binary records, or a single JSON document from old agents
+            metrics: List[BasicMetric] = MetricCodec.decode(body, workload.perf_interval)
+        except (ValueError, KeyError) as e:
+            logger = logging.getLogger(f'monitoring.metric.{workload}')
+            logger.warning(f'malformed metric message is dropped: {e}')
+            metrics = list()
+
+        batcher.ack(delivery_tag)
+
+        # the in-process resctrl samples are fresher than the ones relayed by the perf agent
+        if self._rdt_sampler is not None and metrics:
+            metrics[-1] = self._rdt_sampler.merge(workload, metrics[-1])
+
+        workload.append_metrics(metrics, self._metric_buf_size)
+
+    async def _poll_rings_periodically(self) -> None:
+        # ends when the last ring is reaped, and started again by the next registered ring
+        while self._rings:
+            await asyncio.sleep(self.SHM_POLL_INTERVAL)
+
+            for workload, ring in self._rings.items():
+                metrics = ring.read()
+                if not metrics:
+                    continue
+
+                if self._rdt_sampler is not None:
+                    metrics[-1] = self._rdt_sampler.merge(workload, metrics[-1])
+
+                workload.append_metrics(metrics, self._metric_buf_size)
+
+    async def _flush_acks_periodically(self) -> None:
+        # the remaining messages of a quiet period are not left unacknowledged
+        while True:
+            await asyncio.sleep(self.ACK_INTERVAL)
+            for _, batcher in self._shards:
+                batcher.flush()
+
+    async def _reap_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.REAP_INTERVAL)
+
+            for workload, ring in tuple(self._rings.items()):
+                if not workload.is_running:
+                    ring.close()
+                    del self._rings[workload]
+
+            for workload, (shard_idx, consumer_tag) in tuple(self._consumers.items()):
+                if workload.is_running:
+                    continue
+
+                channel, batcher = self._shards[shard_idx]
+                batcher.flush()
+                await channel.cancel(consumer_tag)
+                del self._consumers[workload]
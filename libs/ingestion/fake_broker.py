@@ -0,0 +1,191 @@
+# coding: UTF-8
+
+import asyncio
+import itertools
+from collections import OrderedDict, deque
+from typing import ClassVar, Deque, Dict, Iterator, List, Optional, Tuple
+
+from .broker import Broker, Channel, DeliveryCallback
+
+
+class FakeChannel(Channel):
+    def __init__(self, broker: 'FakeBroker') -> None:
+        self._broker = broker
+        self._prefetch: int = 0
+        self._next_tag: int = 1
+        # delivery tag -> queue name of the unacknowledged messages
+        self._unacked: OrderedDict = OrderedDict()
+        # queue name -> (consumer tag, callback)
+        self._consumers: Dict[str, Tuple[str, DeliveryCallback]] = dict()
+        self._closed: bool = False
+
+    @property
+    def num_unacked(self) -> int:
+        return len(self._unacked)
+
+    @property
+    def has_capacity(self) -> bool:
+        return not self._closed and (self._prefetch == 0 or len(self._unacked) < self._prefetch)
+
+    async def set_prefetch(self, count: int) -> None:
+        self._prefetch = count
+
+    async def declare_queue(self, name: str) -> None:
+        self._broker.declare(name)
+
+    async def consume(self, queue: str, callback: DeliveryCallback) -> str:
+        consumer_tag = f'ctag.{id(self)}.{queue}'
+        self._consumers[queue] = (consumer_tag, callback)
+        self._broker.schedule_dispatch()
+        return consumer_tag
+
+    async def cancel(self, consumer_tag: str) -> None:
+        for queue, (tag, _) in tuple(self._consumers.items()):
+            if tag == consumer_tag:
+                del self._consumers[queue]
+
+    def ack(self, delivery_tag: int, multiple: bool = False) -> None:
+        if delivery_tag not in self._unacked:
+            raise ValueError(f'unknown delivery tag: {delivery_tag}')
+
+        if multiple:
+            for tag in tuple(itertools.takewhile(lambda t: t <= delivery_tag, self._unacked)):
+                del self._unacked[tag]
+        else:
+            del self._unacked[delivery_tag]
+
+        self._broker.schedule_dispatch()
+
+    async def close(self) -> None:
+        self._closed = True
+        self._consumers.clear()
+
+    def deliver_one(self) -> bool:
+        """
+        Deliver a message of a consumed queue. the queues take turns
+        :return: `True` if a message is delivered
+        """
+        if not self.has_capacity:
+            return False
+
+        for queue in self._broker.ready_queues():
+            consumer = self._consumers.get(queue)
+            if consumer is None:
+                continue
+
+            _, callback = consumer
+            body = self._broker.take(queue)
+
+            tag = self._next_tag
+            self._next_tag += 1
+            self._unacked[tag] = queue
+            callback(tag, body)
+            return True
+
+        return False
+
+
+class FakeBroker(Broker):
+    """
+    In-process broker that implements the subset of AMQP 0-9-1 that the ingestion engine uses:
+    queues, consumers, per-channel prefetch and (multiple) acknowledgements.
+    Used to test and benchmark the engine without RabbitMQ. `publish()` can be called from any thread.
+    """
+
+    # max number of the messages that delivered at once, so the other tasks of the loop are not starved
+    DISPATCH_BUDGET: ClassVar[int] = 256
+
+    def __init__(self) -> None:
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queues: Dict[str, Deque[bytes]] = dict()
+        # the queues that hold messages, in the order that they take turns
+        self._ready: OrderedDict = OrderedDict()
+        self._channels: List[FakeChannel] = list()
+        self._dispatch_scheduled: bool = False
+        self._num_published: int = 0
+        self._num_delivered: int = 0
+
+    @property
+    def num_published(self) -> int:
+        return self._num_published
+
+    @property
+    def num_delivered(self) -> int:
+        return self._num_delivered
+
+    @property
+    def num_unacked(self) -> int:
+        return sum(channel.num_unacked for channel in self._channels)
+
+    def num_ready(self, queue: str) -> int:
+        return len(self._queues.get(queue, ()))
+
+    async def connect(self, loop: asyncio.AbstractEventLoop) -> None:
+        self._loop = loop
+
+    async def channel(self) -> Channel:
+        channel = FakeChannel(self)
+        self._channels.append(channel)
+        return channel
+
+    async def close(self) -> None:
+        for channel in self._channels:
+            await channel.close()
+        self._channels.clear()
+
+    def declare(self, queue: str) -> None:
+        self._queues.setdefault(queue, deque())
+
+    def ready_queues(self) -> Iterator[str]:
+        """The iteration must be stopped after `take()`, which reorders the queues"""
+        return iter(self._ready)
+
+    def take(self, queue: str) -> Optional[bytes]:
+        messages = self._queues.get(queue)
+        if not messages:
+            return None
+
+        body = messages.popleft()
+        self._num_delivered += 1
+
+        # the queue goes to the back, so the other queues are served first
+        if messages:
+            self._ready.move_to_end(queue)
+        else:
+            del self._ready[queue]
+
+        return body
+
+    def publish(self, queue: str, body: bytes) -> None:
+        """Publish a message to `queue` (declaring it if needed) like the default exchange of RabbitMQ"""
+        if self._loop is None:
+            raise RuntimeError('the broker is not connected yet')
+
+        self._loop.call_soon_threadsafe(self._enqueue, queue, body)
+
+    def _enqueue(self, queue: str, body: bytes) -> None:
+        self._queues.setdefault(queue, deque()).append(body)
+        self._ready[queue] = None
+        self._num_published += 1
+        self.schedule_dispatch()
+
+    def schedule_dispatch(self) -> None:
+        if not self._dispatch_scheduled:
+            self._dispatch_scheduled = True
+            self._loop.call_soon(self._dispatch)
+
+    def _dispatch(self) -> None:
+        self._dispatch_scheduled = False
+
+        # a message per channel in turn, so a busy channel can not starve the others
+        budget = self.DISPATCH_BUDGET
+        delivered = True
+        while delivered:
+            delivered = False
+            for channel in tuple(self._channels):
+                delivered = channel.deliver_one() or delivered
+
+            budget -= len(self._channels)
+            if delivered and budget <= 0:
+                self.schedule_dispatch()
+                return
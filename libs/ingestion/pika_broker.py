@@ -0,0 +1,76 @@
+# coding: UTF-8
+
+import asyncio
+from typing import Optional
+
+import pika
+from pika.adapters.asyncio_connection import AsyncioConnection
+
+from .broker import Broker, Channel, DeliveryCallback
+
+
+class PikaChannel(Channel):
+    def __init__(self, channel: pika.channel.Channel, loop: asyncio.AbstractEventLoop) -> None:
+        self._channel = channel
+        self._loop = loop
+
+    def _future_with_callback(self):
+        future = self._loop.create_future()
+        return future, lambda *_: future.done() or future.set_result(None)
+
+    async def set_prefetch(self, count: int) -> None:
+        future, callback = self._future_with_callback()
+        self._channel.basic_qos(callback, prefetch_count=count)
+        await future
+
+    async def declare_queue(self, name: str) -> None:
+        future, callback = self._future_with_callback()
+        self._channel.queue_declare(callback, name)
+        await future
+
+    async def consume(self, queue: str, callback: DeliveryCallback) -> str:
+        return self._channel.basic_consume(lambda _ch, method, _props, body: callback(method.delivery_tag, body),
+                                           queue)
+
+    async def cancel(self, consumer_tag: str) -> None:
+        future, callback = self._future_with_callback()
+        self._channel.basic_cancel(callback, consumer_tag)
+        await future
+
+    def ack(self, delivery_tag: int, multiple: bool = False) -> None:
+        self._channel.basic_ack(delivery_tag, multiple)
+
+    async def close(self) -> None:
+        self._channel.close()
+
+
+class PikaBroker(Broker):
+    """RabbitMQ through `pika.adapters.asyncio_connection.AsyncioConnection`"""
+
+    def __init__(self, host: str) -> None:
+        self._parameters = pika.ConnectionParameters(host=host)
+        self._connection: Optional[AsyncioConnection] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def connect(self, loop: asyncio.AbstractEventLoop) -> None:
+        self._loop = loop
+        future = loop.create_future()
+
+        def on_error(_, error) -> None:
+            future.set_exception(ConnectionError(f'failed to connect to RabbitMQ: {error}'))
+
+        AsyncioConnection(self._parameters,
+                          on_open_callback=future.set_result,
+                          on_open_error_callback=on_error,
+                          custom_ioloop=loop)
+        self._connection = await future
+
+    async def channel(self) -> Channel:
+        future = self._loop.create_future()
+        self._connection.channel(on_open_callback=future.set_result)
+        return PikaChannel(await future, self._loop)
+
+    async def close(self) -> None:
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
@@ -0,0 +1,148 @@
+# coding: UTF-8
+
+import logging
+import subprocess
+from typing import ClassVar, Dict, Iterable, List, Sequence
+
+import numpy as np
+import psutil
+
+from . import NextStep
+from .isolators import Isolator
+from ..metric_container.basic_metric import MetricDiff
+from ..workload import Workload
+
+
+class BatchDecision:
+    """
+    Evaluates the isolation groups of a tick in NumPy passes instead of one group at a time.
+
+    `prime()` computes the `MetricDiff`s of all workloads from their estimated and solorun metrics at once
+    and memoizes them for the tick, so the policies and the swapper do not compute them again.
+    `decide()` classifies the next steps of the current isolators of all groups at once,
+    so the groups only have to apply the chosen steps.
+    The isolators whose decisions are not the generic ones (`Isolator.is_batchable()`) decide by themselves.
+    An isolator that fails to decide (e.g. its background has vanished) is `NextStep.IDLE`,
+    without affecting the decisions of the others.
+    """
+
+    # `NextStep` by its value. the lookup is much faster than `NextStep(value)`
+    _NEXT_STEPS: ClassVar[Dict[int, NextStep]] = dict((step.value, step) for step in NextStep)
+
+    @staticmethod
+    def prime(workloads: Iterable[Workload]) -> None:
+        """
+        Compute and memoize the diffs of `workloads` that have metrics and solorun data for the current tick
+        """
+        targets: List[Workload] = [wl for wl in workloads
+                                   if len(wl.metric_stats) > 0 and wl.avg_solorun_data is not None]
+        if not targets:
+            return
+
+        estimates = [wl.metric_stats.estimate(Workload.METRIC_ESTIMATOR) for wl in targets]
+        rates = np.array([rate for rate, _ in estimates], dtype=np.float64)
+        errors = np.array([error for _, error in estimates], dtype=np.float64)
+        solo = np.array([wl.avg_solorun_data.astuple() for wl in targets], dtype=np.float64)
+
+        diffs = MetricDiff.calc_batch_from_rates(rates, solo).tolist()
+        margins = MetricDiff.calc_batch_margins(errors, solo, confidence=Workload.DECISION_CONFIDENCE).tolist()
+
+        for workload, diff, margin in zip(targets, diffs, margins):
+            workload.memoize_metric_diff(MetricDiff.from_values(*diff, tuple(margin)))
+
+    @classmethod
+    def decide(cls, isolators: Sequence[Isolator]) -> List[NextStep]:
+        """
+        Decide the next steps of the isolators and remember the diffs that the decisions were made on,
+        like `Isolator.decide_next_step()` of each of them
+        :return: the next step of each isolator in the order of `isolators`
+        """
+        logger = logging.getLogger(__name__)
+
+        steps: List[NextStep] = [NextStep.IDLE] * len(isolators)
+        batch: Dict[int, Isolator] = dict()
+
+        for idx, isolator in enumerate(isolators):
+            if isolator.is_batchable():
+                batch[idx] = isolator
+                continue
+
+            try:
+                steps[idx] = isolator.decide_next_step()
+            except (psutil.NoSuchProcess, subprocess.CalledProcessError, OSError) as e:
+                logger.debug(f'{isolator.__class__.__name__} of {isolator.foreground_workload} failed to decide: {e}')
+
+        if not batch:
+            return steps
+
+        indices = tuple(batch.keys())
+        batched = tuple(batch.values())
+        num_batched = len(batched)
+
+        curr_diffs: List[MetricDiff] = [None] * num_batched
+        curr = np.empty(num_batched, dtype=np.float64)
+        prev = np.full(num_batched, np.nan, dtype=np.float64)
+        first = np.empty(num_batched, dtype=bool)
+        is_max = np.empty(num_batched, dtype=bool)
+        is_min = np.empty(num_batched, dtype=bool)
+        force_threshold = np.empty(num_batched, dtype=np.float64)
+        dod_threshold = np.empty(num_batched, dtype=np.float64)
+        curr_margin = np.empty(num_batched, dtype=np.float64)
+        prev_margin = np.zeros(num_batched, dtype=np.float64)
+        failed = np.zeros(num_batched, dtype=bool)
+
+        # the only pass over the isolators in Python before the classification
+        for i, isolator in enumerate(batched):
+            try:
+                metric_type = isolator._METRIC_TYPE
+                diff = isolator.foreground_workload.calc_metric_diff()
+                curr_diffs[i] = diff
+                curr[i] = getattr(diff, metric_type)
+                curr_margin[i] = diff.margin(metric_type)
+                first[i] = is_first = isolator.is_first_decision
+                if not is_first:
+                    prev_diff = isolator.prev_metric_diff
+                    prev[i] = getattr(prev_diff, metric_type)
+                    prev_margin[i] = prev_diff.margin(metric_type)
+                is_max[i] = isolator.is_max_level
+                is_min[i] = isolator.is_min_level
+                force_threshold[i] = isolator._FORCE_THRESHOLD
+                dod_threshold[i] = isolator._DOD_THRESHOLD
+
+            except (psutil.NoSuchProcess, subprocess.CalledProcessError, OSError) as e:
+                logger.debug(f'{isolator.__class__.__name__} of {isolator.foreground_workload} failed to decide: {e}')
+                # classified with the others, but stays idle
+                failed[i] = True
+                curr[i] = np.nan
+                first[i] = True
+                is_max[i] = is_min[i] = True
+                force_threshold[i] = dod_threshold[i] = curr_margin[i] = 0
+
+        strengthen = np.where(is_max, NextStep.STOP, NextStep.STRENGTHEN)
+        weaken = np.where(is_min, NextStep.STOP, NextStep.WEAKEN)
+
+        # `Isolator._first_decision()`
+        first_steps = np.where(curr < 0, strengthen, np.where(curr <= force_threshold, NextStep.STOP, weaken))
+
+        # `Isolator._monitoring_result()`, including `Isolator._is_significant()`
+        with np.errstate(invalid='ignore'):
+            # negated, so a NaN previous diff or margin is not significant, as in `MetricDiff.is_significant()`
+            settled = ~(np.abs(curr - prev) > np.maximum(dod_threshold, np.hypot(curr_margin, prev_margin))) \
+                | ~(np.abs(curr) > np.maximum(dod_threshold, curr_margin))
+        monitoring_steps = np.where(settled, NextStep.STOP, np.where(curr > 0, weaken, strengthen))
+
+        decided = np.where(first, first_steps, monitoring_steps)
+        # a diff from a zero solorun metric can not tell the direction
+        decided = np.where(np.isfinite(curr), decided, NextStep.STOP)
+
+        next_steps = cls._NEXT_STEPS
+        for idx, isolator, diff, step, has_failed in zip(indices, batched, curr_diffs, decided.tolist(),
+                                                         failed.tolist()):
+            if has_failed:
+                continue
+            isolator.commit_decision(diff)
+            steps[idx] = next_steps[step]
+
+        logger.debug(f'{len(batched)} of {len(isolators)} decisions are made in a batch')
+
+        return steps
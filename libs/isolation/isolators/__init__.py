@@ -2,6 +2,7 @@
 
 
 from .affinity import AffinityIsolator
+from .bandwidth import BandwidthIsolator
 from .base import Isolator
 from .cache import CacheIsolator
 from .core import CoreIsolator
@@ -1,14 +1,16 @@
 # coding: UTF-8
 
 import logging
-from typing import Optional, Tuple
+from typing import ClassVar, Optional, Tuple
 
 from .base import Isolator
-from ...metric_container.basic_metric import MetricDiff
+from ...utils import capabilities
 from ...workload import Workload
 
 
 class AffinityIsolator(Isolator):
+    _METRIC_TYPE: ClassVar[str] = 'instruction_ps'
+
     def __init__(self, foreground_wl: Workload, background_wls: Tuple[Workload, ...]) -> None:
         super().__init__(foreground_wl, background_wls)
 
@@ -17,8 +19,8 @@ class AffinityIsolator(Isolator):
         self._stored_config: Optional[int] = None
 
     @classmethod
-    def _get_metric_type_from(cls, metric_diff: MetricDiff) -> float:
-        return metric_diff.instruction_ps
+    def is_available(cls) -> bool:
+        return capabilities.has_cpuset()
 
     def strengthen(self) -> 'AffinityIsolator':
         self._cur_step += 1
@@ -54,4 +56,3 @@ class AffinityIsolator(Isolator):
         super().load_cur_config()
 
         self._cur_step = self._stored_config
-        self._stored_config = None
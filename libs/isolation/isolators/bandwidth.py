@@ -0,0 +1,70 @@
+# coding: UTF-8
+
+import logging
+from typing import ClassVar, Optional, Tuple
+
+from .base import Isolator
+from ...utils import ResCtrl, capabilities
+from ...workload import Workload
+
+
+class BandwidthIsolator(Isolator):
+    """
+    Throttles the memory bandwidth of the BGs with resctrl memory bandwidth allocation (Intel MBA).
+    Unlike `MemoryIsolator`, the BGs keep their frequency, so their compute bound phases are not slowed down.
+    """
+
+    _METRIC_TYPE: ClassVar[str] = 'local_mem_util_ps'
+
+    def __init__(self, foreground_wl: Workload, background_wls: Tuple[Workload, ...]) -> None:
+        super().__init__(foreground_wl, background_wls)
+
+        # the bandwidth (in percentage) of the BGs on their socket
+        self._cur_step: int = ResCtrl.MAX_MB
+        self._stored_config: Optional[int] = None
+
+    @classmethod
+    def is_available(cls) -> bool:
+        return capabilities.has_mba()
+
+    def strengthen(self) -> 'BandwidthIsolator':
+        self._cur_step -= ResCtrl.MB_STEP
+        return self
+
+    def weaken(self) -> 'BandwidthIsolator':
+        self._cur_step += ResCtrl.MB_STEP
+        return self
+
+    @property
+    def is_max_level(self) -> bool:
+        return self._cur_step - ResCtrl.MB_STEP < ResCtrl.MIN_MB
+
+    @property
+    def is_min_level(self) -> bool:
+        return ResCtrl.MAX_MB < self._cur_step + ResCtrl.MB_STEP
+
+    def enforce(self) -> None:
+        logger = logging.getLogger(__name__)
+        logger.info(f'memory bandwidth of background is {self._cur_step}%')
+
+        # MBA is applied per L3 domain, so only the domain of the socket that the BG runs on is throttled
+        num_domains = capabilities.llc_domains()
+
+        for bg in self._all_running_bgs:
+            percents = [ResCtrl.MAX_MB] * num_domains
+            percents[bg.cur_socket_id()] = self._cur_step
+            bg.mb_percents = percents
+
+    def reset(self) -> None:
+        num_domains = capabilities.llc_domains()
+
+        for bg in self._all_running_bgs:
+            bg.mb_percents = [ResCtrl.MAX_MB] * num_domains
+
+    def store_cur_config(self) -> None:
+        self._stored_config = self._cur_step
+
+    def load_cur_config(self) -> None:
+        super().load_cur_config()
+
+        self._cur_step = self._stored_config
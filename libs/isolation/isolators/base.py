@@ -1,6 +1,7 @@
 # coding: UTF-8
 
 import logging
+import math
 from abc import ABCMeta, abstractmethod
 from typing import Any, ClassVar, Iterable, Optional, Tuple
 
@@ -12,6 +13,8 @@ from ...workload import Workload
 class Isolator(metaclass=ABCMeta):
     _DOD_THRESHOLD: ClassVar[float] = 0.005
     _FORCE_THRESHOLD: ClassVar[float] = 0.05
+    # the property of `MetricDiff` that the decisions of this isolator are based on
+    _METRIC_TYPE: ClassVar[Optional[str]] = None
 
     def __init__(self, foreground_wl: Workload, background_wls: Tuple[Workload, ...]) -> None:
         self._prev_metric_diff: MetricDiff = None
@@ -29,6 +32,36 @@ class Isolator(metaclass=ABCMeta):
     def __del__(self):
         self.reset()
 
+    @classmethod
+    def is_available(cls) -> bool:
+        """
+        :return: `True` if the hardware features that this isolator depends on are available on this host
+        """
+        return True
+
+    @classmethod
+    def is_batchable(cls) -> bool:
+        """
+        :return: `True` if the decisions of this isolator follow `_first_decision()` and `_monitoring_result()` of
+                 this class on `_METRIC_TYPE`, so `BatchDecision` can make them for many groups at once
+        """
+        return cls._METRIC_TYPE is not None \
+            and cls.decide_next_step is Isolator.decide_next_step \
+            and cls._first_decision is Isolator._first_decision \
+            and cls._monitoring_result is Isolator._monitoring_result
+
+    @property
+    def foreground_workload(self) -> Workload:
+        return self._foreground_wl
+
+    @property
+    def is_first_decision(self) -> bool:
+        return self._is_first_decision
+
+    @property
+    def prev_metric_diff(self) -> Optional[MetricDiff]:
+        return self._prev_metric_diff
+
     @abstractmethod
     def strengthen(self) -> 'Isolator':
         """
@@ -79,7 +112,11 @@ class Isolator(metaclass=ABCMeta):
         logger = logging.getLogger(__name__)
         logger.debug(f'current diff: {curr_diff:>7.4f}')
 
-        if curr_diff < 0:
+        # a diff from a zero solorun metric can not tell the direction
+        if not math.isfinite(curr_diff):
+            return NextStep.STOP
+
+        elif curr_diff < 0:
             if self.is_max_level:
                 return NextStep.STOP
             else:
@@ -101,10 +138,18 @@ class Isolator(metaclass=ABCMeta):
         logger.debug(f'diff of diff is {diff_of_diff:>7.4f}')
         logger.debug(f'current diff: {curr_diff:>7.4f}, previous diff: {prev_diff:>7.4f}')
 
-        if abs(diff_of_diff) <= self._DOD_THRESHOLD \
+        if not math.isfinite(curr_diff):
+            return NextStep.STOP
+
+        elif abs(diff_of_diff) <= self._DOD_THRESHOLD \
                 or abs(curr_diff) <= self._DOD_THRESHOLD:
             return NextStep.STOP
 
+        # a change within the noise of the metrics is not worth an actuation
+        if not self._is_significant(prev_metric_diff, cur_metric_diff):
+            logger.debug(f'the change is not significant. margin: {self._margin_of(cur_metric_diff):>7.4f}')
+            return NextStep.STOP
+
         elif curr_diff > 0:
             if self.is_min_level:
                 return NextStep.STOP
@@ -118,24 +163,43 @@ class Isolator(metaclass=ABCMeta):
                 return NextStep.STRENGTHEN
 
     @classmethod
-    @abstractmethod
     def _get_metric_type_from(cls, metric_diff: MetricDiff) -> float:
-        pass
+        return getattr(metric_diff, cls._METRIC_TYPE)
+
+    @classmethod
+    def _margin_of(cls, metric_diff: MetricDiff) -> float:
+        return metric_diff.margin(cls._METRIC_TYPE) if cls._METRIC_TYPE is not None else 0.0
+
+    @classmethod
+    def _is_significant(cls, prev_metric_diff: MetricDiff, cur_metric_diff: MetricDiff) -> bool:
+        """
+        :return: `True` if the current diff is significantly different from both 0 and the previous diff,
+                 with the margins of the diffs (see `MetricDiff.margin()`)
+        """
+        if cls._METRIC_TYPE is None:
+            return True
+
+        return cur_metric_diff.is_significant(cls._METRIC_TYPE) \
+            and cur_metric_diff.is_significant(cls._METRIC_TYPE, prev_metric_diff)
 
     def decide_next_step(self) -> NextStep:
         curr_metric_diff = self._foreground_wl.calc_metric_diff()
 
         if self._is_first_decision:
-            self._is_first_decision = False
             next_step = self._first_decision(curr_metric_diff)
 
         else:
             next_step = self._monitoring_result(self._prev_metric_diff, curr_metric_diff)
 
-        self._prev_metric_diff = curr_metric_diff
+        self.commit_decision(curr_metric_diff)
 
         return next_step
 
+    def commit_decision(self, curr_metric_diff: MetricDiff) -> None:
+        """Remember the diff that the decision of this tick was made on, for the decision of the next tick"""
+        self._is_first_decision = False
+        self._prev_metric_diff = curr_metric_diff
+
     @abstractmethod
     def reset(self) -> None:
         """Restore to initial configuration"""
@@ -154,10 +218,17 @@ class Isolator(metaclass=ABCMeta):
         pass
 
     def load_cur_config(self) -> None:
-        """Load the current configuration"""
+        """
+        Load the current configuration.
+        The stored one is kept until `discard_stored_config()`, so it can be loaded again if applying it fails
+        """
         if self._stored_config is None:
             raise ValueError('Store configuration first!')
 
+    def discard_stored_config(self) -> None:
+        """Forget the stored configuration after the loaded one is applied"""
+        self._stored_config = None
+
     @property
     def _all_running_bgs(self) -> Iterable[Workload]:
         for bg in self._background_wls:
@@ -1,15 +1,16 @@
 # coding: UTF-8
 
 import logging
-from typing import Optional, Tuple
+from typing import ClassVar, Optional, Tuple
 
 from .base import Isolator
-from ...metric_container.basic_metric import MetricDiff
-from ...utils import ResCtrl, numa_topology
+from ...utils import ResCtrl, capabilities
 from ...workload import Workload
 
 
 class CacheIsolator(Isolator):
+    _METRIC_TYPE: ClassVar[str] = 'l3_hit_ratio'
+
     def __init__(self, foreground_wl: Workload, background_wls: Tuple[Workload, ...]) -> None:
         super().__init__(foreground_wl, background_wls)
 
@@ -19,8 +20,8 @@ class CacheIsolator(Isolator):
         self._stored_config: Optional[Tuple[int, int]] = None
 
     @classmethod
-    def _get_metric_type_from(cls, metric_diff: MetricDiff) -> float:
-        return metric_diff.l3_hit_ratio
+    def is_available(cls) -> bool:
+        return capabilities.has_resctrl()
 
     def strengthen(self) -> 'CacheIsolator':
         self._prev_step = self._cur_step
@@ -63,28 +64,28 @@ class CacheIsolator(Isolator):
         else:
             logger.info(f'foreground : background = {self._cur_step} : {ResCtrl.MAX_BITS - self._cur_step}')
 
-            # FIXME: hard coded -> The number of socket is two at most
-            masks = [ResCtrl.MIN_MASK, ResCtrl.MIN_MASK]
+            num_domains = capabilities.llc_domains()
+
+            masks = [ResCtrl.MIN_MASK] * num_domains
             masks[self._foreground_wl.cur_socket_id()] = ResCtrl.gen_mask(0, self._cur_step)
-            self._foreground_wl.resctrl.assign_llc(*masks)
+            self._foreground_wl.llc_masks = masks
 
-            # FIXME: hard coded -> The number of socket is two at most
-            masks = [ResCtrl.MIN_MASK, ResCtrl.MIN_MASK]
+            masks = [ResCtrl.MIN_MASK] * num_domains
             masks[self._any_running_bg.cur_socket_id()] = ResCtrl.gen_mask(self._cur_step)
             for bg in self._all_running_bgs:
-                bg.resctrl.assign_llc(*masks)
+                bg.llc_masks = masks
 
     def reset(self) -> None:
-        masks = [ResCtrl.MIN_MASK] * (max(numa_topology.cur_online_nodes()) + 1)
+        masks = [ResCtrl.MIN_MASK] * capabilities.llc_domains()
 
         for bg in self._all_running_bgs:
             bg_masks = masks.copy()
             bg_masks[bg.cur_socket_id()] = ResCtrl.MAX_MASK
-            bg.resctrl.assign_llc(*bg_masks)
+            bg.llc_masks = bg_masks
 
         if self._foreground_wl.is_running:
             masks[self._foreground_wl.cur_socket_id()] = ResCtrl.MAX_MASK
-            self._foreground_wl.resctrl.assign_llc(*masks)
+            self._foreground_wl.llc_masks = masks
 
     def store_cur_config(self) -> None:
         self._stored_config = (self._prev_step, self._cur_step)
@@ -93,4 +94,3 @@ class CacheIsolator(Isolator):
         super().load_cur_config()
 
         self._prev_step, self._cur_step = self._stored_config
-        self._stored_config = None
@@ -6,6 +6,7 @@ from typing import ClassVar, Optional, Tuple
 from .base import Isolator
 from .. import NextStep, ResourceType
 from ...metric_container.basic_metric import MetricDiff
+from ...utils import capabilities
 from ...workload import Workload
 
 
@@ -27,6 +28,10 @@ class CoreIsolator(Isolator):
 
         self._stored_config: Optional[Tuple[int, int]] = None
 
+    @classmethod
+    def is_available(cls) -> bool:
+        return capabilities.has_cpuset()
+
     def strengthen(self) -> 'CoreIsolator':
         """
         Strengthen reduces the number of CPUs assigned to BG workloads and increase that of FG workload
@@ -221,4 +226,3 @@ class CoreIsolator(Isolator):
         super().load_cur_config()
 
         self._cur_fg_step, self._cur_bg_step = self._stored_config
-        self._stored_config = None
@@ -1,15 +1,16 @@
 # coding: UTF-8
 
 import logging
-from typing import Optional, Tuple
+from typing import ClassVar, Optional, Tuple
 
 from .base import Isolator
-from ...metric_container.basic_metric import MetricDiff
-from ...utils import DVFS
+from ...utils import DVFS, capabilities
 from ...workload import Workload
 
 
 class MemoryIsolator(Isolator):
+    _METRIC_TYPE: ClassVar[str] = 'local_mem_util_ps'
+
     def __init__(self, foreground_wl: Workload, background_wls: Tuple[Workload, ...]) -> None:
         super().__init__(foreground_wl, background_wls)
 
@@ -18,8 +19,8 @@ class MemoryIsolator(Isolator):
         self._stored_config: Optional[int] = None
 
     @classmethod
-    def _get_metric_type_from(cls, metric_diff: MetricDiff) -> float:
-        return metric_diff.local_mem_util_ps
+    def is_available(cls) -> bool:
+        return capabilities.has_cpufreq()
 
     def strengthen(self) -> 'MemoryIsolator':
         self._cur_step -= DVFS.STEP
@@ -44,12 +45,12 @@ class MemoryIsolator(Isolator):
         logger.info(f'frequency of bound_cores {self._any_running_bg.bound_cores} is {self._cur_step / 1_000_000}GHz')
 
         # FIXME: hard coded
-        DVFS.set_freq(self._cur_step, self._any_running_bg.bound_cores)
+        self._any_running_bg.limit_freq(self._cur_step)
 
     def reset(self) -> None:
         # FIXME: hard coded
         for bg in self._all_running_bgs:
-            DVFS.set_freq(DVFS.MAX, bg.orig_bound_cores)
+            bg.limit_freq(DVFS.MAX, bg.orig_bound_cores)
 
     def store_cur_config(self) -> None:
         self._stored_config = self._cur_step
@@ -58,4 +59,3 @@ class MemoryIsolator(Isolator):
         super().load_cur_config()
 
         self._cur_step = self._stored_config
-        self._stored_config = None
@@ -1,14 +1,16 @@
 # coding: UTF-8
 
 import logging
-from typing import Optional, Tuple
+from typing import ClassVar, Optional, Tuple
 
 from .base import Isolator
-from ...metric_container.basic_metric import MetricDiff
+from ...utils import capabilities
 from ...workload import Workload
 
 
 class SchedIsolator(Isolator):
+    _METRIC_TYPE: ClassVar[str] = 'local_mem_util_ps'
+
     def __init__(self, foreground_wl: Workload, background_wls: Tuple[Workload, ...]) -> None:
         super().__init__(foreground_wl, background_wls)
 
@@ -18,8 +20,8 @@ class SchedIsolator(Isolator):
         self._stored_config: Optional[int] = None
 
     @classmethod
-    def _get_metric_type_from(cls, metric_diff: MetricDiff) -> float:
-        return metric_diff.local_mem_util_ps
+    def is_available(cls) -> bool:
+        return capabilities.has_cpuset()
 
     def strengthen(self) -> 'SchedIsolator':
         self._cur_step += 1
@@ -58,4 +60,3 @@ class SchedIsolator(Isolator):
         super().load_cur_config()
 
         self._cur_step = self._stored_config
-        self._stored_config = None
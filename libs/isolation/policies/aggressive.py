@@ -5,7 +5,7 @@ from typing import Tuple
 
 from .base import IsolationPolicy
 from .. import ResourceType
-from ..isolators import AffinityIsolator, CacheIsolator, IdleIsolator, MemoryIsolator, SchedIsolator
+from ..isolators import AffinityIsolator, CacheIsolator, IdleIsolator, SchedIsolator
 from ...workload import Workload
 
 
@@ -32,17 +32,21 @@ class AggressivePolicy(IsolationPolicy):
 
         for resource, diff_value in self.contentious_resources():
             if resource is ResourceType.CACHE:
-                isolator = self._isolator_map[CacheIsolator]
+                isolator = self._isolator_map.get(CacheIsolator)
             elif resource is ResourceType.MEMORY:
                 if self._is_mem_isolated:
-                    isolator = self._isolator_map[SchedIsolator]
+                    isolator = self._isolator_map.get(SchedIsolator)
                     self._is_mem_isolated = False
                 else:
-                    isolator = self._isolator_map[MemoryIsolator]
+                    isolator = self._mem_bw_isolator
                     self._is_mem_isolated = True
             else:
                 raise NotImplementedError(f'Unknown ResourceType: {resource}')
 
+            # not supported by this host
+            if isolator is None:
+                continue
+
             if diff_value < 0 and not isolator.is_max_level or \
                     diff_value > 0 and not isolator.is_min_level:
                 self._cur_isolator = isolator
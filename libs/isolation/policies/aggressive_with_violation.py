@@ -5,7 +5,7 @@ from typing import ClassVar, Tuple
 
 from .aggressive import AggressivePolicy
 from .. import ResourceType
-from ..isolators import AffinityIsolator, CacheIsolator, IdleIsolator, MemoryIsolator, SchedIsolator
+from ..isolators import AffinityIsolator, BandwidthIsolator, CacheIsolator, IdleIsolator, MemoryIsolator, SchedIsolator
 from ...workload import Workload
 
 
@@ -26,6 +26,7 @@ class AggressiveWViolationPolicy(AggressivePolicy):
         return \
             resource is ResourceType.CACHE and not isinstance(self._cur_isolator, CacheIsolator) \
             or resource is ResourceType.MEMORY and not (isinstance(self._cur_isolator, MemoryIsolator)
+                                                        or isinstance(self._cur_isolator, BandwidthIsolator)
                                                         or isinstance(self._cur_isolator, SchedIsolator))
 
     @property
@@ -38,6 +39,8 @@ class AggressiveWViolationPolicy(AggressivePolicy):
             logger.info(f'violation is occurred. current isolator type : {self._cur_isolator.__class__.__name__}')
 
             self._violation_count += 1
+            # the group is watched closely until the violation is resolved
+            self.tighten_period()
 
             if self._violation_count >= AggressiveWViolationPolicy.VIOLATION_THRESHOLD:
                 logger.info('new isolator is required due to violation')
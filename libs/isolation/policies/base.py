@@ -2,35 +2,52 @@
 
 import logging
 from abc import ABCMeta, abstractmethod
-from typing import ClassVar, Dict, Tuple, Type
+from typing import ClassVar, Dict, Optional, Tuple, Type
 
 from .. import ResourceType
-from ..isolators import CacheIsolator, IdleIsolator, Isolator, MemoryIsolator, SchedIsolator
+from ..isolators import BandwidthIsolator, CacheIsolator, IdleIsolator, Isolator, MemoryIsolator, SchedIsolator
 from ..isolators.affinity import AffinityIsolator
-from ...metric_container.basic_metric import BasicMetric, MetricDiff
+from ...metric_container.basic_metric import MetricDiff
+from ...solorun_data.profile_store import ProfileStore
+from ...utils.actuator import Actuator
 from ...workload import Workload
 
 
 class IsolationPolicy(metaclass=ABCMeta):
     _IDLE_ISOLATOR: ClassVar[IdleIsolator] = IdleIsolator()
     _VERIFY_THRESHOLD: ClassVar[int] = 3
+    ISOLATOR_TYPES: ClassVar[Tuple[Type[Isolator], ...]] = \
+        (CacheIsolator, AffinityIsolator, SchedIsolator, MemoryIsolator, BandwidthIsolator)
+    # control period (sec) of a group. it backs off exponentially while the group is converged (its isolator stays
+    # idle or stopped) and is tightened to `MIN_PERIOD` as soon as the group has to act again
+    MIN_PERIOD: ClassVar[float] = 0.2
+    MAX_PERIOD: ClassVar[float] = 3.2
+    PERIOD_BACKOFF: ClassVar[float] = 2.0
+    # confidence level of a change of the contention that cuts the period of a group that backed off short.
+    # it is checked on every metric, so it is stricter than the one of the decisions
+    CONTENTION_CONFIDENCE: ClassVar[float] = 0.999
+    # min. change of a diff that cuts the period short, so a rate that hardly varies does not make it with its tiny
+    # deviations
+    CONTENTION_MIN_SHIFT: ClassVar[float] = 0.05
 
     def __init__(self, fg_wl: Workload, bg_wls: Tuple[Workload, ...]) -> None:
         self._fg_wl = fg_wl
         self._bg_wls = bg_wls
 
-        self._isolator_map: Dict[Type[Isolator], Isolator] = dict((
-            (CacheIsolator, CacheIsolator(self._fg_wl, self._bg_wls)),
-            (AffinityIsolator, AffinityIsolator(self._fg_wl, self._bg_wls)),
-            (SchedIsolator, SchedIsolator(self._fg_wl, self._bg_wls)),
-            (MemoryIsolator, MemoryIsolator(self._fg_wl, self._bg_wls)),
-        ))
+        # the isolators that are not supported by this host are skipped
+        self._isolator_map: Dict[Type[Isolator], Isolator] = dict(
+                (isolator_type, isolator_type(self._fg_wl, self._bg_wls))
+                for isolator_type in self.available_isolator_types())
         self._cur_isolator: Isolator = IsolationPolicy._IDLE_ISOLATOR
 
         self._in_solorun_profile: bool = False
         self._cached_fg_num_threads: int = fg_wl.number_of_threads
         self._solorun_verify_violation_count: int = 0
 
+        self._period: float = self.MIN_PERIOD
+        # the diff of the foreground from its solorun data when the group backed off its period
+        self._backed_off_diff: Optional[MetricDiff] = None
+
     def __hash__(self) -> int:
         return id(self)
 
@@ -42,6 +59,21 @@ class IsolationPolicy(metaclass=ABCMeta):
         for isolator in isolators:
             del self._isolator_map[isolator]
 
+    @classmethod
+    def available_isolator_types(cls) -> Tuple[Type[Isolator], ...]:
+        return tuple(isolator_type for isolator_type in cls.ISOLATOR_TYPES if isolator_type.is_available())
+
+    @property
+    def _mem_bw_isolator(self) -> Optional[Isolator]:
+        """
+        :return: the isolator that throttles the memory bandwidth of the BGs.
+        MBA is preferred to DVFS, because it does not slow down the BGs more than the bandwidth that it saves
+        """
+        isolator = self._isolator_map.get(BandwidthIsolator)
+        if isolator is None:
+            isolator = self._isolator_map.get(MemoryIsolator)
+        return isolator
+
     @property
     @abstractmethod
     def new_isolator_needed(self) -> bool:
@@ -78,6 +110,8 @@ class IsolationPolicy(metaclass=ABCMeta):
     @foreground_workload.setter
     def foreground_workload(self, new_workload: Workload):
         self._fg_wl = new_workload
+        # a change that was detected while it was a background is stale
+        new_workload.phase_detector.reset()
         for isolator in self._isolator_map.values():
             isolator.change_fg_wl(new_workload)
             isolator.enforce()
@@ -105,6 +139,64 @@ class IsolationPolicy(metaclass=ABCMeta):
     def name(self) -> str:
         return f'{self._fg_wl.name}({self._fg_wl.pid})'
 
+    @property
+    def period(self) -> float:
+        """
+        :return: the control period (sec). not shorter than the perf interval of the foreground,
+                 so a group is not evaluated twice on the same metric
+        """
+        return max(self._period, self._fg_wl.perf_interval / 1000)
+
+    def back_off_period(self) -> None:
+        self._period = min(self._period * self.PERIOD_BACKOFF, self.MAX_PERIOD)
+        self._backed_off_diff = self._estimate_diff(self.CONTENTION_CONFIDENCE)
+
+    def tighten_period(self) -> None:
+        self._period = self.MIN_PERIOD
+        self._backed_off_diff = None
+
+    def contention_changed(self) -> bool:
+        """
+        Checked on every metric of the foreground, so a group that backed off does not wait for the end of its period
+        to notice a violation. The period is tightened if the diff of the foreground from its solorun data changed
+        significantly since the group backed off. Only the margins of the converged diff are used: the variance of
+        the window is inflated by the very change that is looked for.
+        :return: `True` if the period is tightened
+        """
+        backed_off_diff = self._backed_off_diff
+        if backed_off_diff is None:
+            return False
+
+        metric_diff = self._estimate_diff(confidence=0)
+        if metric_diff is None:
+            return False
+
+        def shifted(metric_type: str) -> bool:
+            shift = getattr(metric_diff, metric_type) - getattr(backed_off_diff, metric_type)
+            return abs(shift) > self.CONTENTION_MIN_SHIFT and metric_diff.is_significant(metric_type, backed_off_diff)
+
+        if metric_diff.verify() == backed_off_diff.verify() and not any(map(shifted, MetricDiff.COLUMNS)):
+            return False
+
+        self.tighten_period()
+        return True
+
+    def _estimate_diff(self, confidence: float) -> Optional[MetricDiff]:
+        """
+        :param confidence: confidence level of the margins of the diff
+        :return: the diff of the foreground from its solorun data. O(1) and not memoized like `calc_metric_diff()`
+                 of a tick, so it can run in the ingestion thread. `None` without the solorun data
+        """
+        solorun = self._fg_wl.avg_solorun_data
+        if solorun is None or len(self._fg_wl.metric_stats) == 0:
+            return None
+
+        try:
+            return MetricDiff.from_stats(self._fg_wl.metric_stats, solorun, estimator=self._fg_wl.METRIC_ESTIMATOR,
+                                         confidence=confidence)
+        except ZeroDivisionError:
+            return None
+
     def set_idle_isolator(self) -> None:
         self._cur_isolator.yield_isolation()
         self._cur_isolator = IsolationPolicy._IDLE_ISOLATOR
@@ -125,6 +217,7 @@ class IsolationPolicy(metaclass=ABCMeta):
             raise ValueError('Stop the ongoing solorun profiling first!')
 
         self._in_solorun_profile = True
+        self.tighten_period()
         self._cached_fg_num_threads = self._fg_wl.number_of_threads
         self._solorun_verify_violation_count = 0
 
@@ -132,7 +225,7 @@ class IsolationPolicy(metaclass=ABCMeta):
         for bg in filter(lambda w: w.is_running, self._bg_wls):
             bg.pause()
 
-        self._fg_wl.metrics.clear()
+        self._fg_wl.clear_metrics()
 
         # store current configuration
         for isolator in self._isolator_map.values():
@@ -144,22 +237,45 @@ class IsolationPolicy(metaclass=ABCMeta):
             raise ValueError('Start solorun profiling first!')
 
         logger = logging.getLogger(__name__)
-        logger.debug(f'number of collected solorun data: {len(self._fg_wl.metrics)}')
-        self._fg_wl.avg_solorun_data = BasicMetric.calc_avg(self._fg_wl.metrics)
-        logger.debug(f'calculated average solorun data: {self._fg_wl.avg_solorun_data}')
-
-        logger.debug('Enforcing restored configuration...')
-        # restore stored configuration
-        for isolator in self._isolator_map.values():
-            isolator.load_cur_config()
-            isolator.enforce()
-
-        self._fg_wl.metrics.clear()
+        try:
+            logger.debug(f'number of collected solorun data: {len(self._fg_wl.metrics)}')
+            if len(self._fg_wl.metrics) == 0:
+                # e.g. the agent of the foreground lagged behind. the previous solorun data is kept
+                logger.warning(f'no solorun data of {self._fg_wl} is collected. keeping the previous one')
+            else:
+                self._fg_wl.avg_solorun_data = self._fg_wl.metrics.mean()
+                logger.debug(f'calculated average solorun data: {self._fg_wl.avg_solorun_data}')
+
+                # measured in the reset configuration, which the key has to describe
+                ProfileStore.instance().put(self._fg_wl.profile_key, self._fg_wl.avg_solorun_data)
+
+            logger.debug('Enforcing restored configuration...')
+            # restore stored configuration
+            for isolator in self._isolator_map.values():
+                isolator.load_cur_config()
+                isolator.enforce()
+
+            # the restored configuration must be applied before the backgrounds are resumed
+            Actuator.instance().flush()
+
+            for isolator in self._isolator_map.values():
+                isolator.discard_stored_config()
+
+        finally:
+            # even if the restoration failed (e.g. a background vanished), the others must not stay paused
+            self._in_solorun_profile = False
+            self._fg_wl.clear_metrics()
+
+            for bg in filter(lambda w: w.is_running, self._bg_wls):
+                bg.resume()
 
-        for bg in filter(lambda w: w.is_running, self._bg_wls):
-            bg.resume()
-
-        self._in_solorun_profile = False
+    @property
+    def phase_changed(self) -> bool:
+        """
+        :return: `True` if the phase detector of the foreground detected a change of its behavior.
+                 cheap enough to be checked every tick
+        """
+        return self._fg_wl.phase_detector.changed
 
     def profile_needed(self) -> bool:
         """
@@ -172,7 +288,14 @@ class IsolationPolicy(metaclass=ABCMeta):
             logger.debug('initialize solorun data')
             return True
 
-        if not self._fg_wl.calc_metric_diff().verify():
+        if self.phase_changed:
+            logger.debug(f'phase change is detected on {self._fg_wl.phase_detector.changed_rate}')
+            return True
+
+        # only the consecutive violations are counted, so the noise of the metrics does not add up over time
+        if self._fg_wl.calc_metric_diff().verify():
+            self._solorun_verify_violation_count = 0
+        else:
             self._solorun_verify_violation_count += 1
 
             if self._solorun_verify_violation_count == self._VERIFY_THRESHOLD:
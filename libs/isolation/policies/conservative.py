@@ -5,7 +5,7 @@ from typing import Tuple
 
 from .base import IsolationPolicy
 from .. import ResourceType
-from ..isolators import CacheIsolator, IdleIsolator, MemoryIsolator, SchedIsolator
+from ..isolators import CacheIsolator, IdleIsolator, SchedIsolator
 from ...workload import Workload
 
 
@@ -36,19 +36,19 @@ class ConservativePolicy(IsolationPolicy):
             self._clear_flags()
             logger.debug('****All isolators are applicable for now!****')
 
-        if not self._is_llc_isolated and resource is ResourceType.CACHE:
+        if not self._is_llc_isolated and resource is ResourceType.CACHE and CacheIsolator in self._isolator_map:
             self._cur_isolator = self._isolator_map[CacheIsolator]
             self._is_llc_isolated = True
             logger.info(f'Cache Isolation for {self._fg_wl} is started')
             return True
 
-        elif not self._is_mem_isolated and resource is ResourceType.MEMORY:
-            self._cur_isolator = self._isolator_map[MemoryIsolator]
+        elif not self._is_mem_isolated and resource is ResourceType.MEMORY and self._mem_bw_isolator is not None:
+            self._cur_isolator = self._mem_bw_isolator
             self._is_mem_isolated = True
             logger.info(f'Memory Bandwidth Isolation for {self._fg_wl} is started')
             return True
 
-        elif not self._is_core_isolated and resource is ResourceType.MEMORY:
+        elif not self._is_core_isolated and resource is ResourceType.MEMORY and SchedIsolator in self._isolator_map:
             self._cur_isolator = self._isolator_map[SchedIsolator]
             self._is_core_isolated = True
             logger.info(f'Core Isolation for {self._fg_wl} is started')
@@ -5,7 +5,7 @@ from typing import ClassVar, Tuple
 
 from .conservative import ConservativePolicy
 from .. import ResourceType
-from ..isolators import CacheIsolator, IdleIsolator, MemoryIsolator, SchedIsolator
+from ..isolators import BandwidthIsolator, CacheIsolator, IdleIsolator, MemoryIsolator, SchedIsolator
 from ...workload import Workload
 
 
@@ -23,6 +23,7 @@ class ConservativeWViolationPolicy(ConservativePolicy):
         return \
             resource is ResourceType.CACHE and not isinstance(self._cur_isolator, CacheIsolator) \
             or resource is ResourceType.MEMORY and (not isinstance(self._cur_isolator, MemoryIsolator)
+                                                    and not isinstance(self._cur_isolator, BandwidthIsolator)
                                                     and not isinstance(self._cur_isolator, SchedIsolator))
 
     @property
@@ -35,6 +36,8 @@ class ConservativeWViolationPolicy(ConservativePolicy):
             logger.info(f'violation is occurred. current isolator type : {self._cur_isolator.__class__.__name__}')
 
             self._violation_count += 1
+            # the group is watched closely until the violation is resolved
+            self.tighten_period()
 
             if self._violation_count >= ConservativeWViolationPolicy.VIOLATION_THRESHOLD:
                 logger.info('new isolator is required due to violation')
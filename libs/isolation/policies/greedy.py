@@ -5,7 +5,7 @@ from typing import Tuple
 
 from .base import IsolationPolicy
 from .. import ResourceType
-from ..isolators import AffinityIsolator, CacheIsolator, IdleIsolator, MemoryIsolator, SchedIsolator
+from ..isolators import AffinityIsolator, CacheIsolator, IdleIsolator, SchedIsolator
 from ...workload import Workload
 
 
@@ -32,18 +32,18 @@ class GreedyPolicy(IsolationPolicy):
 
         resource: ResourceType = self.contentious_resource()
 
-        if resource is ResourceType.CACHE:
+        if resource is ResourceType.CACHE and CacheIsolator in self._isolator_map:
             self._cur_isolator = self._isolator_map[CacheIsolator]
             logger.info(f'Starting {self._cur_isolator.__class__.__name__}...')
             return True
 
-        elif not self._is_mem_isolated and resource is ResourceType.MEMORY:
-            self._cur_isolator = self._isolator_map[MemoryIsolator]
+        elif not self._is_mem_isolated and resource is ResourceType.MEMORY and self._mem_bw_isolator is not None:
+            self._cur_isolator = self._mem_bw_isolator
             self._is_mem_isolated = True
             logger.info(f'Starting {self._cur_isolator.__class__.__name__}...')
             return True
 
-        elif resource is ResourceType.MEMORY:
+        elif resource is ResourceType.MEMORY and SchedIsolator in self._isolator_map:
             self._cur_isolator = self._isolator_map[SchedIsolator]
             self._is_mem_isolated = False
             logger.info(f'Starting {self._cur_isolator.__class__.__name__}...')
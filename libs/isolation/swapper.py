@@ -10,6 +10,7 @@ import psutil
 
 from .policies.base import IsolationPolicy
 from ..metric_container.basic_metric import MetricDiff
+from ..utils.actuator import Actuator
 
 
 class SwapIsolator:
@@ -48,8 +49,8 @@ class SwapIsolator:
             # FIXME: hard coded
             # FIXME: multi bg
             for group2, g2_fg_diff in contentions[idx + 1:]:
-                g1_bg_curr_cores = len(group1.background_workloads[0].cgroup_cpuset.read_cpus())
-                g2_bg_curr_cores = len(group2.background_workloads[0].cgroup_cpuset.read_cpus())
+                g1_bg_curr_cores = len(group1.background_workloads[0].bound_cores)
+                g2_bg_curr_cores = len(group2.background_workloads[0].bound_cores)
 
                 g1_fg_cont = g1_fg_diff.instruction_ps
                 g2_fg_cont = g2_fg_diff.instruction_ps
@@ -58,12 +59,13 @@ class SwapIsolator:
                 g2_bg_cont = sum(bg.calc_metric_diff().instruction_ps for bg in group2.background_workloads)
                 current = abs(g1_fg_cont + g1_bg_cont) + abs(g2_fg_cont + g2_bg_cont)
 
+                # the BGs take the cores of each other. the profiles tell how their throughput scales with them
                 g1_bg_cont = sum(
-                        bg.calc_metric_diff(g2_bg_curr_cores / g1_bg_curr_cores).instruction_ps
+                        bg.calc_metric_diff(bg.core_norm_for(g2_bg_curr_cores)).instruction_ps
                         for bg in group1.background_workloads
                 )
                 g2_bg_cont = sum(
-                        bg.calc_metric_diff(g1_bg_curr_cores / g2_bg_curr_cores).instruction_ps
+                        bg.calc_metric_diff(bg.core_norm_for(g1_bg_curr_cores)).instruction_ps
                         for bg in group2.background_workloads
                 )
                 future = abs(g1_fg_cont + g2_bg_cont) + abs(g2_fg_cont + g1_bg_cont)
@@ -128,10 +130,12 @@ class SwapIsolator:
                 tmp1, tmp2 = bg2.orig_bound_cores, bg1.orig_bound_cores
                 bg2.orig_bound_cores, bg1.orig_bound_cores = tmp2, tmp1
 
-            group1.background_workloads = workload2
-            group2.background_workloads = workload1
+            # the new configurations are applied at once (or rolled back) before the procs are resumed
+            with Actuator.instance().transaction():
+                group1.background_workloads = workload2
+                group2.background_workloads = workload1
 
-        except (psutil.NoSuchProcess, subprocess.CalledProcessError, ProcessLookupError) as e:
+        except (psutil.NoSuchProcess, subprocess.CalledProcessError, OSError) as e:
             logger.warning('Error occurred during swaption', e)
 
         finally:
@@ -1,14 +1,38 @@
 # coding: UTF-8
 
-from statistics import mean
-from typing import Iterable
+import functools
+import math
+from typing import ClassVar, Iterable, Optional, TYPE_CHECKING, Tuple
 
-from cpuinfo import cpuinfo
+import numpy as np
 
-LLC_SIZE = int(cpuinfo.get_cpu_info()['l3_cache_size'].split()[0]) * 1024
+from ..utils import capabilities
+
+if TYPE_CHECKING:
+    from .streaming_stats import Estimator, MetricStats
+
+
+@functools.lru_cache(maxsize=8)
+def _z_score(confidence: float) -> float:
+    """
+    :return: the z-score of the two-sided confidence interval of the standard normal distribution
+    """
+    # `statistics.NormalDist` is not available before Python 3.8, so `erf` is inverted by bisection
+    lo, hi = 0.0, 40.0
+    for _ in range(100):
+        mid = (lo + hi) / 2
+        if math.erf(mid / math.sqrt(2)) < confidence:
+            lo = mid
+        else:
+            hi = mid
+    return (lo + hi) / 2
 
 
 class BasicMetric:
+    # the order of the values of `astuple()`
+    COLUMNS: ClassVar[Tuple[str, ...]] = ('l2miss', 'l3miss', 'instructions', 'cycles', 'stall_cycles', 'wall_cycles',
+                                          'intra_coh', 'inter_coh', 'llc_size', 'local_mem', 'remote_mem', 'interval')
+
     def __init__(self, l2miss, l3miss, inst, cycles, stall_cycles, wall_cycles, intra_coh,
                  inter_coh, llc_size, local_mem, remote_mem, interval):
         self._l2miss = l2miss
@@ -26,20 +50,23 @@ class BasicMetric:
 
     @classmethod
     def calc_avg(cls, metrics: Iterable['BasicMetric']) -> 'BasicMetric':
-        return BasicMetric(
-                mean(metric._l2miss for metric in metrics),
-                mean(metric._l3miss for metric in metrics),
-                mean(metric._instructions for metric in metrics),
-                mean(metric._cycles for metric in metrics),
-                mean(metric._stall_cycles for metric in metrics),
-                mean(metric._wall_cycles for metric in metrics),
-                mean(metric._intra_coh for metric in metrics),
-                mean(metric._inter_coh for metric in metrics),
-                mean(metric._llc_size for metric in metrics),
-                mean(metric._local_mem for metric in metrics),
-                mean(metric._remote_mem for metric in metrics),
-                mean(metric._interval for metric in metrics),
-        )
+        # a single vectorized pass. `statistics.mean()` is exact but very slow on floats
+        return BasicMetric(*np.mean([metric.astuple() for metric in metrics], axis=0).tolist())
+
+    def astuple(self) -> Tuple[float, ...]:
+        """
+        :return: the values in the order of the parameters of the constructor
+        """
+        return (self._l2miss, self._l3miss, self._instructions, self._cycles, self._stall_cycles, self._wall_cycles,
+                self._intra_coh, self._inter_coh, self._llc_size, self._local_mem, self._remote_mem, self._interval)
+
+    def with_rdt(self, llc_size: float, local_mem_ps: float, remote_mem_ps: float) -> 'BasicMetric':
+        """
+        :return: a copy of this metric whose LLC occupancy and memory traffic are replaced with the given ones
+        """
+        return BasicMetric(self._l2miss, self._l3miss, self._instructions, self._cycles, self._stall_cycles,
+                           self._wall_cycles, self._intra_coh, self._inter_coh, llc_size,
+                           local_mem_ps * self._interval / 1000, remote_mem_ps * self._interval / 1000, self._interval)
 
     @property
     def l2miss(self):
@@ -101,6 +128,19 @@ class BasicMetric:
     def ipc(self) -> float:
         return self._instructions / self._cycles
 
+    @property
+    def l2_mpki(self) -> float:
+        return self._l2miss * 1000 / self._instructions if self._instructions != 0 else math.nan
+
+    @property
+    def core_cpi(self) -> float:
+        """
+        :return: cycles per instruction except the backend stalls, where the contention with the other cores shows up
+        """
+        if self._instructions == 0 or self._stall_cycles == 0:
+            return math.nan
+        return (self._cycles - self._stall_cycles) / self._instructions
+
     @property
     def intra_coh_ratio(self) -> float:
         return self._intra_coh / self._l2miss if self._l2miss != 0 else 0
@@ -123,7 +163,7 @@ class BasicMetric:
 
     @property
     def l3_util(self) -> float:
-        return self._llc_size / LLC_SIZE
+        return self._llc_size / capabilities.llc_size()
 
     @property
     def l3_intensity(self) -> float:
@@ -134,30 +174,147 @@ class BasicMetric:
         return self.l3_util * self.l3miss_ratio
 
     def __repr__(self) -> str:
-        return ', '.join(map(str, (
-            self._l2miss, self._l3miss, self._instructions, self._cycles, self._stall_cycles, self._wall_cycles,
-            self._intra_coh, self._inter_coh, self._llc_size, self._local_mem, self._remote_mem, self._interval)))
+        return ', '.join(map(str, self.astuple()))
 
 
 class MetricDiff:
     # FIXME: hard coded
     _MAX_MEM_BANDWIDTH_PS = 68 * 1024 * 1024 * 1024
+    # the order of the values of the rows of `calc_batch()`
+    COLUMNS: ClassVar[Tuple[str, ...]] = ('l3_hit_ratio', 'local_mem_util_ps', 'instruction_ps')
 
     def __init__(self, curr: BasicMetric, prev: BasicMetric, core_norm: float = 1) -> None:
-        self._l3_hit_ratio = curr.l3hit_ratio - prev.l3hit_ratio
+        self._set_rates(curr.l3hit_ratio, curr.local_mem_ps, curr.instruction_ps, prev, core_norm)
+        self._margins: Tuple[float, float, float] = (0.0, 0.0, 0.0)
 
-        if curr.local_mem_ps == 0:
+    def _set_rates(self, l3hit_ratio: float, local_mem_ps: float, instruction_ps: float,
+                   prev: BasicMetric, core_norm: float) -> None:
+        self._l3_hit_ratio = l3hit_ratio - prev.l3hit_ratio
+
+        if local_mem_ps == 0:
             if prev.local_mem_ps == 0:
                 self._local_mem_ps = 0
             else:
                 self._local_mem_ps = prev.local_mem_ps / self._MAX_MEM_BANDWIDTH_PS
         elif prev.local_mem_ps == 0:
             # TODO: is it fair?
-            self._local_mem_ps = -curr.local_mem_ps / self._MAX_MEM_BANDWIDTH_PS
+            self._local_mem_ps = -local_mem_ps / self._MAX_MEM_BANDWIDTH_PS
         else:
-            self._local_mem_ps = curr.local_mem_ps / (prev.local_mem_ps * core_norm) - 1
+            self._local_mem_ps = local_mem_ps / (prev.local_mem_ps * core_norm) - 1
+
+        self._instruction_ps = instruction_ps / (prev.instruction_ps * core_norm) - 1
 
-        self._instruction_ps = curr.instruction_ps / (prev.instruction_ps * core_norm) - 1
+    @classmethod
+    def from_stats(cls, stats: 'MetricStats', prev: BasicMetric, core_norm: float = 1,
+                   estimator: Optional['Estimator'] = None, confidence: float = 0) -> 'MetricDiff':
+        """
+        :param stats: the streaming statistics of the current metrics
+        :param estimator: how the current rates are estimated from `stats`. `Estimator.LATEST` if `None`
+        :param confidence: confidence level in [0, 1) of the margins of the diffs (see `margin()`).
+                           0 for no margin
+        """
+        rates, errors = stats.estimate(estimator)
+
+        metric_diff = cls.__new__(cls)
+        metric_diff._set_rates(*rates, prev, core_norm)
+        metric_diff._margins = cls._diff_margins(errors, prev, core_norm, confidence)
+        return metric_diff
+
+    @classmethod
+    def _diff_margins(cls, errors: Tuple[float, ...], prev: BasicMetric, core_norm: float,
+                      confidence: float) -> Tuple[float, float, float]:
+        if confidence <= 0:
+            return 0.0, 0.0, 0.0
+
+        z = _z_score(confidence)
+        l3_err, mem_err, inst_err = errors
+
+        # the diffs are linear in the current rates, so the errors scale with them
+        prev_mem = prev.local_mem_ps * core_norm
+        mem_scale = prev_mem if prev_mem != 0 else cls._MAX_MEM_BANDWIDTH_PS
+        prev_inst = prev.instruction_ps * core_norm
+        return z * l3_err, z * mem_err / mem_scale, z * inst_err / prev_inst if prev_inst != 0 else math.inf
+
+    @classmethod
+    def from_values(cls, l3_hit_ratio: float, local_mem_util_ps: float, instruction_ps: float,
+                    margins: Tuple[float, float, float] = (0.0, 0.0, 0.0)) -> 'MetricDiff':
+        metric_diff = cls.__new__(cls)
+        metric_diff._l3_hit_ratio = l3_hit_ratio
+        metric_diff._local_mem_ps = local_mem_util_ps
+        metric_diff._instruction_ps = instruction_ps
+        metric_diff._margins = margins
+        return metric_diff
+
+    @classmethod
+    def calc_batch(cls, curr: np.ndarray, prev: np.ndarray, core_norm: float = 1) -> np.ndarray:
+        """
+        Vectorized constructor for many pairs of metrics.
+        The division by zero of the solorun instructions results in inf or nan instead of `ZeroDivisionError`.
+
+        :param curr: rows of `BasicMetric.astuple()` of the current metrics
+        :param prev: rows of `BasicMetric.astuple()` of the solorun metrics
+        :return: a row of the diffs in the order of `COLUMNS` for each pair
+        """
+        return cls.calc_batch_from_rates(cls._batch_rates(curr), prev, core_norm)
+
+    @classmethod
+    def calc_batch_from_rates(cls, rates: np.ndarray, prev: np.ndarray, core_norm: float = 1) -> np.ndarray:
+        """
+        :param rates: rows of the current rates (e.g. the estimates of `MetricStats`) in the order of `COLUMNS`
+        :param prev: rows of `BasicMetric.astuple()` of the solorun metrics
+        :return: a row of the diffs in the order of `COLUMNS` for each pair
+        """
+        prev_rates = cls._batch_rates(prev)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            curr_mem, prev_mem = rates[:, 1], prev_rates[:, 1]
+            local_mem_ps = np.where(curr_mem == 0,
+                                    np.where(prev_mem == 0, 0, prev_mem / cls._MAX_MEM_BANDWIDTH_PS),
+                                    np.where(prev_mem == 0,
+                                             -curr_mem / cls._MAX_MEM_BANDWIDTH_PS,
+                                             curr_mem / (prev_mem * core_norm) - 1))
+            instruction_ps = rates[:, 2] / (prev_rates[:, 2] * core_norm) - 1
+
+            return np.column_stack((rates[:, 0] - prev_rates[:, 0], local_mem_ps, instruction_ps))
+
+    @classmethod
+    def calc_batch_margins(cls, errors: np.ndarray, prev: np.ndarray, core_norm: float = 1,
+                           confidence: float = 0) -> np.ndarray:
+        """
+        Vectorized `margin()` of the diffs of `calc_batch_from_rates()`
+        :param errors: rows of the standard errors of the current rates in the order of `COLUMNS`
+        :param prev: rows of `BasicMetric.astuple()` of the solorun metrics
+        """
+        if confidence <= 0:
+            return np.zeros_like(errors)
+
+        z = _z_score(confidence)
+        prev_rates = cls._batch_rates(prev)
+
+        with np.errstate(divide='ignore'):
+            prev_mem = prev_rates[:, 1] * core_norm
+            mem_scale = np.where(prev_mem != 0, prev_mem, cls._MAX_MEM_BANDWIDTH_PS)
+            prev_inst = prev_rates[:, 2] * core_norm
+            inst_margin = np.where(prev_inst != 0, errors[:, 2] / np.where(prev_inst != 0, prev_inst, 1), np.inf)
+
+            return z * np.column_stack((errors[:, 0], errors[:, 1] / mem_scale, inst_margin))
+
+    @staticmethod
+    def _batch_rates(rows: np.ndarray) -> np.ndarray:
+        """
+        :param rows: rows of `BasicMetric.astuple()`
+        :return: rows of `BasicMetric.l3hit_ratio`, `local_mem_ps` and `instruction_ps`
+        """
+        col = BasicMetric.COLUMNS.index
+
+        def per_sec(name: str) -> np.ndarray:
+            return rows[:, col(name)] * (1000 / rows[:, col('interval')])
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            l2miss = rows[:, col('l2miss')]
+            l3hit_ratio = np.where(l2miss != 0, 1 - rows[:, col('l3miss')] / np.where(l2miss != 0, l2miss, 1), 0)
+
+            return np.column_stack((l3hit_ratio, per_sec('local_mem'), per_sec('instructions')))
 
     @property
     def l3_hit_ratio(self) -> float:
@@ -171,6 +328,25 @@ class MetricDiff:
     def instruction_ps(self) -> float:
         return self._instruction_ps
 
+    def margin(self, metric_type: str) -> float:
+        """
+        :param metric_type: one of `COLUMNS`
+        :return: half width of the confidence interval of the diff. 0 if it is unknown
+        """
+        return self._margins[self.COLUMNS.index(metric_type)]
+
+    def is_significant(self, metric_type: str, other: Optional['MetricDiff'] = None) -> bool:
+        """
+        :return: whether the diff is significantly different from 0,
+                 or from the same diff of `other` (e.g. the one of the previous decision) if it is given
+        """
+        value = getattr(self, metric_type)
+        if other is None:
+            return abs(value) > self.margin(metric_type)
+        else:
+            return abs(value - getattr(other, metric_type)) > math.hypot(self.margin(metric_type),
+                                                                          other.margin(metric_type))
+
     def verify(self) -> bool:
         return self._local_mem_ps <= 1 and self._instruction_ps <= 1
 
@@ -0,0 +1,140 @@
+# coding: UTF-8
+
+from threading import Lock
+from typing import ClassVar, Iterable, Iterator, Optional, Tuple
+
+import numpy as np
+
+from .basic_metric import BasicMetric
+
+
+class MetricBuffer:
+    """
+    Fixed-capacity ring buffer of the metrics of a workload, stored as a row of float64 columns per metric.
+    When it is full, the oldest metric is overwritten.
+
+    The index 0 is the latest metric like the deque that it replaced, so `buffer[0]` is the latest one.
+    Every read copies the rows under a lock, so it is consistent even while the ingestion thread appends,
+    and the statistics over a window of the latest metrics are computed in a single vectorized pass.
+    """
+
+    COLUMNS: ClassVar[Tuple[str, ...]] = BasicMetric.COLUMNS
+
+    def __init__(self, capacity: int) -> None:
+        if capacity <= 0:
+            raise ValueError(f'capacity must be positive: {capacity}')
+
+        self._rows = np.zeros((capacity, len(self.COLUMNS)), dtype=np.float64)
+        # the row that the next metric is written to
+        self._head: int = 0
+        self._len: int = 0
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __getitem__(self, idx: int) -> BasicMetric:
+        """
+        :param idx: 0 for the latest metric, 1 for the one before, ...
+        """
+        with self._lock:
+            if not -self._len <= idx < self._len:
+                raise IndexError(f'metric index out of range: {idx}')
+
+            row = self._rows[(self._head - 1 - idx % self._len) % len(self._rows)]
+            return BasicMetric(*row.tolist())
+
+    def __iter__(self) -> Iterator[BasicMetric]:
+        """Iterate a snapshot of the metrics from the latest one"""
+        return (BasicMetric(*row) for row in self.snapshot().tolist())
+
+    @property
+    def capacity(self) -> int:
+        return len(self._rows)
+
+    def resize(self, capacity: int) -> None:
+        """Change the capacity, keeping the latest metrics that fit"""
+        if capacity <= 0:
+            raise ValueError(f'capacity must be positive: {capacity}')
+
+        with self._lock:
+            kept = self._ordered(min(self._len, capacity))[::-1]
+
+            self._rows = np.zeros((capacity, len(self.COLUMNS)), dtype=np.float64)
+            self._rows[:len(kept)] = kept
+            self._len = len(kept)
+            self._head = self._len % capacity
+
+    def append(self, metric: BasicMetric) -> None:
+        self.extend((metric,))
+
+    def extend(self, metrics: Iterable[BasicMetric]) -> None:
+        """
+        :param metrics: the metrics in the order that they were sampled
+        """
+        rows = [metric.astuple() for metric in metrics]
+
+        with self._lock:
+            capacity = len(self._rows)
+
+            for row in rows[-capacity:]:
+                self._rows[self._head] = row
+                self._head = (self._head + 1) % capacity
+
+            self._len = min(capacity, self._len + len(rows))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._head = 0
+            self._len = 0
+
+    def _ordered(self, window: int) -> np.ndarray:
+        # the latest `window` rows from the latest one. the fancy indexing copies them
+        indices = (self._head - 1 - np.arange(window)) % len(self._rows)
+        return self._rows[indices]
+
+    def snapshot(self, window: Optional[int] = None) -> np.ndarray:
+        """
+        :param window: number of the latest metrics. all metrics if `None`
+        :return: a copy of the rows (one per metric, in the order of `COLUMNS`) from the latest one
+        """
+        with self._lock:
+            return self._ordered(self._len if window is None else min(window, self._len))
+
+    def column(self, name: str, window: Optional[int] = None) -> np.ndarray:
+        """
+        :return: the values of a column from the latest one
+        """
+        return self.snapshot(window)[:, self.COLUMNS.index(name)]
+
+    def _snapshot_to_reduce(self, window: Optional[int]) -> np.ndarray:
+        rows = self.snapshot(window)
+        if len(rows) == 0:
+            raise ValueError('no metric to reduce')
+        return rows
+
+    def mean(self, window: Optional[int] = None) -> BasicMetric:
+        """
+        :return: the mean of each counter over the latest `window` metrics
+        """
+        return BasicMetric(*self._snapshot_to_reduce(window).mean(axis=0).tolist())
+
+    def percentile(self, q: float, window: Optional[int] = None) -> BasicMetric:
+        """
+        :param q: percentile in [0, 100]
+        :return: the `q`-th percentile of each counter over the latest `window` metrics
+        """
+        return BasicMetric(*np.percentile(self._snapshot_to_reduce(window), q, axis=0).tolist())
+
+    def ewma(self, alpha: float, window: Optional[int] = None) -> BasicMetric:
+        """
+        :param alpha: smoothing factor in (0, 1]. the larger, the more weight on the latest metrics
+        :return: the exponentially weighted moving average of each counter over the latest `window` metrics,
+                 starting from the oldest one of the window
+        """
+        rows = self._snapshot_to_reduce(window)
+
+        weights = alpha * (1 - alpha) ** np.arange(len(rows), dtype=np.float64)
+        # the oldest one is the initial value of the average
+        weights[-1] = (1 - alpha) ** (len(rows) - 1)
+        return BasicMetric(*(weights @ rows).tolist())
@@ -0,0 +1,179 @@
+# coding: UTF-8
+
+import logging
+import os
+import time
+from pathlib import Path
+from typing import ClassVar, Dict, List, Optional, Sequence, Tuple
+
+from .basic_metric import BasicMetric
+from .resctrl_sampler import ResCtrlSampler
+from ..utils import capabilities, numa_topology, perf_event
+from ..utils.cgroup import BaseCgroup, BaseCgroupV2
+from ..utils.perf_event import Event, PerfEventGroup
+from ..workload import Workload
+
+
+class _Counters:
+    __slots__ = ('groups', 'totals', 'timestamp')
+
+    def __init__(self, groups: List[PerfEventGroup], num_events: int) -> None:
+        # a group per CPU in the cgroup mode, or a single group that follows the task
+        self.groups = groups
+        self.totals: List[float] = [0.0] * num_events
+        self.timestamp: float = time.monotonic()
+
+    def close(self) -> None:
+        for group in self.groups:
+            group.close()
+
+
+class PerfCollector:
+    """
+    Counts the events of the workloads that have no perf agent (`perf_pid` is 0) in-process,
+    with a group of `perf_event_open(2)` events per workload, and builds `BasicMetric` from them.
+
+    The events of the cgroup of a workload are counted on every CPU if the cgroup has the perf_event controller,
+    otherwise the process and its threads and children created afterwards are counted.
+    `collect()` is called on the schedule of the controller and reads each group with a single `read(2)`.
+
+    The metrics are compared with the solorun profiles measured with the hardware counters, so the hardware counters
+    are required. In the software mode, the task clock is counted instead and stands for the cycles and
+    the instructions. Those metrics are not comparable with the profiles and must not be used for the decisions:
+    the mode only measures the cost of the collection on the hosts without the hardware counters (e.g. a VM).
+    The coherence events, the LLC occupancy and the memory traffic are not counted here.
+    The latter two are filled by `ResCtrlSampler`.
+    """
+
+    # (field of `BasicMetric`, event). the first one is the group leader
+    HW_EVENTS: ClassVar[Tuple[Tuple[str, Event], ...]] = (
+        ('cycles', (perf_event.TYPE_HARDWARE, perf_event.HW_CPU_CYCLES)),
+        ('instructions', (perf_event.TYPE_HARDWARE, perf_event.HW_INSTRUCTIONS)),
+        ('stall_cycles', (perf_event.TYPE_HARDWARE, perf_event.HW_STALLED_CYCLES_BACKEND)),
+        ('wall_cycles', (perf_event.TYPE_HARDWARE, perf_event.HW_REF_CPU_CYCLES)),
+        ('l3miss', (perf_event.TYPE_HARDWARE, perf_event.HW_CACHE_MISSES)),
+    )
+    # L2_RQSTS.MISS of the Intel core PMU
+    INTEL_L2_MISS: ClassVar[Tuple[str, Event]] = ('l2miss', (perf_event.TYPE_RAW, 0x3f24))
+    SW_EVENTS: ClassVar[Tuple[Tuple[str, Event], ...]] = (
+        ('cycles', (perf_event.TYPE_SOFTWARE, perf_event.SW_TASK_CLOCK)),
+    )
+
+    def __init__(self, metric_buf_size: int, rdt_sampler: Optional[ResCtrlSampler] = None,
+                 software: bool = False) -> None:
+        """
+        :param metric_buf_size: max number of metrics of a workload
+        :param rdt_sampler: the in-process resctrl sampler whose samples are merged into the metrics
+        :param software: count the task clock instead of the hardware events (see the class docstring)
+        """
+        self._metric_buf_size = metric_buf_size
+        self._rdt_sampler = rdt_sampler
+
+        self._hardware: bool = not software
+        if self._hardware:
+            self._events: Sequence[Tuple[str, Event]] = self.HW_EVENTS
+            if capabilities.has_intel_pmu():
+                self._events += (self.INTEL_L2_MISS,)
+        else:
+            self._events = self.SW_EVENTS
+
+        self._counters: Dict[Workload, _Counters] = dict()
+
+    @property
+    def hardware(self) -> bool:
+        return self._hardware
+
+    def register(self, workload: Workload) -> None:
+        """
+        :raises OSError: if the events can not be counted (e.g. the PMU is taken by another tool
+                         or the hardware events are not allowed in this container)
+        """
+        if workload in self._counters:
+            return
+
+        events = tuple(event for _, event in self._events)
+        groups = self._open_groups(workload, events)
+
+        for group in groups:
+            group.enable()
+
+        self._counters[workload] = _Counters(groups, len(events))
+
+    def unregister(self, workload: Workload) -> None:
+        counter = self._counters.pop(workload, None)
+        if counter is not None:
+            counter.close()
+
+    @staticmethod
+    def _cgroup_dir(workload: Workload) -> Path:
+        if BaseCgroupV2.is_mounted():
+            return Path(BaseCgroupV2.MOUNT_POINT) / workload.group_name
+        else:
+            return Path(BaseCgroup.MOUNT_POINT) / 'perf_event' / workload.group_name
+
+    def _open_groups(self, workload: Workload, events: Sequence[Event]) -> List[PerfEventGroup]:
+        cgroup_dir = self._cgroup_dir(workload)
+
+        if not cgroup_dir.is_dir():
+            return [PerfEventGroup(events, pid=workload.pid)]
+
+        groups: List[PerfEventGroup] = list()
+        cgroup_fd = os.open(str(cgroup_dir), os.O_RDONLY | os.O_DIRECTORY | os.O_CLOEXEC)
+
+        try:
+            for cpu in sorted(numa_topology.core_to_node):
+                groups.append(PerfEventGroup(events, cpu=cpu, cgroup_fd=cgroup_fd))
+        except OSError:
+            for group in groups:
+                group.close()
+            raise
+        finally:
+            os.close(cgroup_fd)
+
+        return groups
+
+    def collect(self) -> None:
+        """Read the counters of all registered workloads and append a metric to each workload that ran since"""
+        for workload, counter in tuple(self._counters.items()):
+            if not workload.is_running:
+                self.unregister(workload)
+                continue
+
+            try:
+                metric = self._collect(counter)
+            except OSError as e:
+                logger = logging.getLogger(__name__)
+                logger.debug(f'failed to read the perf events of {workload}: {e}')
+                continue
+
+            if metric is None:
+                continue
+
+            if self._rdt_sampler is not None:
+                metric = self._rdt_sampler.merge(workload, metric)
+
+            workload.append_metrics((metric,), self._metric_buf_size)
+
+    def _collect(self, counter: _Counters) -> Optional[BasicMetric]:
+        totals = [0.0] * len(counter.totals)
+        for group in counter.groups:
+            for idx, value in enumerate(group.read()):
+                totals[idx] += value
+
+        now = time.monotonic()
+        elapsed = now - counter.timestamp
+        deltas = dict((name, total - prev)
+                      for (name, _), total, prev in zip(self._events, totals, counter.totals))
+
+        counter.totals, counter.timestamp = totals, now
+
+        # the workload did not run (e.g. it is paused for the solorun profiling)
+        if deltas['cycles'] <= 0 or elapsed <= 0:
+            return None
+
+        if not self._hardware:
+            deltas['instructions'] = deltas['cycles']
+            deltas['wall_cycles'] = elapsed * 1_000_000_000
+
+        return BasicMetric(deltas.get('l2miss', 0), deltas.get('l3miss', 0), deltas['instructions'], deltas['cycles'],
+                           deltas.get('stall_cycles', 0), deltas['wall_cycles'], 0, 0, 0, 0, 0, elapsed * 1000)
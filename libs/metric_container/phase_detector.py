@@ -0,0 +1,122 @@
+# coding: UTF-8
+
+import math
+from threading import Lock
+from typing import ClassVar, List, Optional, Tuple
+
+from .basic_metric import BasicMetric
+
+
+class _Cusum:
+    __slots__ = ('count', 'mean', 'm2', 'drift', 'threshold', 'upper', 'lower')
+
+    def __init__(self) -> None:
+        self.count: int = 0
+        # Welford's running mean and sum of squares of the warm-up samples
+        self.mean: float = 0.0
+        self.m2: float = 0.0
+        self.drift: float = 0.0
+        self.threshold: float = 0.0
+        self.upper: float = 0.0
+        self.lower: float = 0.0
+
+
+class PhaseDetector:
+    """
+    Online change-point detector (two-sided CUSUM) on the rates of a workload that the contention does not shift.
+
+    The co-run rates that `MetricDiff` compares (e.g. instructions per second or LLC hit ratio) also change
+    when a background changes its phase or an isolator is actuated, so they can not tell a phase change of
+    the workload itself. The L2 misses per kilo instruction (the L2 cache is private to a core) and
+    the cycles per instruction except the backend stalls depend on the code the workload runs,
+    so neither the backgrounds on the other cores nor the isolations of LLC, memory bandwidth and
+    frequency move them. A rate that the counters do not provide (NaN) is skipped.
+
+    After a reset, the first `warmup` metrics learn the reference mean and standard deviation of each rate.
+    Then the deviations from the reference beyond `drift` are accumulated per direction,
+    and the phase is changed when an accumulation exceeds `threshold`.
+    Both are in units of the standard deviation, but at least `min_shift` of the mean,
+    so a rate that hardly varies does not turn its tiny deviations into a phase change.
+
+    An update is O(1), so it runs on every metric in the ingestion thread,
+    and the controller only reads `changed` on its schedule.
+    """
+
+    # the properties of `BasicMetric` that are monitored
+    RATES: ClassVar[Tuple[str, ...]] = ('l2_mpki', 'core_cpi')
+
+    def __init__(self, warmup: int = 20, drift: float = 1, threshold: float = 10, min_shift: float = 0.05) -> None:
+        """
+        :param warmup: number of the metrics that the reference is learned from
+        :param drift: deviation (in standard deviations) that is not accumulated
+        :param threshold: accumulated deviation (in standard deviations) of a phase change
+        :param min_shift: min. relative deviation from the mean of a standard deviation
+        """
+        if warmup < 2:
+            raise ValueError(f'warmup must be at least 2: {warmup}')
+
+        self._warmup = warmup
+        self._drift = drift
+        self._threshold = threshold
+        self._min_shift = min_shift
+
+        self._cusums: List[_Cusum] = [_Cusum() for _ in self.RATES]
+        # the rate that changed, if any
+        self._changed_rate: Optional[str] = None
+        self._lock = Lock()
+
+    @property
+    def changed(self) -> bool:
+        return self._changed_rate is not None
+
+    @property
+    def changed_rate(self) -> Optional[str]:
+        return self._changed_rate
+
+    def reset(self) -> None:
+        """Forget the reference, e.g. after the phase change is handled by a solorun profiling"""
+        with self._lock:
+            self._cusums = [_Cusum() for _ in self.RATES]
+            self._changed_rate = None
+
+    def update(self, metric: BasicMetric) -> bool:
+        """
+        :return: `True` if a phase change is detected by this metric
+        """
+        with self._lock:
+            if self._changed_rate is not None:
+                return False
+
+            for rate, cusum in zip(self.RATES, self._cusums):
+                try:
+                    value = getattr(metric, rate)
+                except ZeroDivisionError:
+                    continue
+
+                if not math.isfinite(value):
+                    continue
+
+                if self._accumulate(cusum, value):
+                    self._changed_rate = rate
+                    return True
+
+            return False
+
+    def _accumulate(self, cusum: _Cusum, value: float) -> bool:
+        if cusum.count < self._warmup:
+            cusum.count += 1
+            delta = value - cusum.mean
+            cusum.mean += delta / cusum.count
+            cusum.m2 += delta * (value - cusum.mean)
+
+            if cusum.count == self._warmup:
+                std = math.sqrt(cusum.m2 / (cusum.count - 1))
+                scale = max(std, self._min_shift * abs(cusum.mean))
+                cusum.drift = self._drift * scale
+                cusum.threshold = self._threshold * scale
+            return False
+
+        deviation = value - cusum.mean
+        cusum.upper = max(0.0, cusum.upper + deviation - cusum.drift)
+        cusum.lower = max(0.0, cusum.lower - deviation - cusum.drift)
+        return cusum.upper > cusum.threshold or cusum.lower > cusum.threshold
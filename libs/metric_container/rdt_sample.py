@@ -0,0 +1,11 @@
+# coding: UTF-8
+
+from typing import NamedTuple
+
+
+class RdtSample(NamedTuple):
+    """A sample of the resctrl monitoring counters (Intel CMT/MBM) of a workload"""
+    timestamp: float  # `time.monotonic()` when it is sampled
+    llc_occupancy: int  # bytes
+    local_mem_ps: float  # bytes per second
+    remote_mem_ps: float  # bytes per second
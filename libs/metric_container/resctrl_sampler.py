@@ -0,0 +1,135 @@
+# coding: UTF-8
+
+import logging
+import time
+from threading import Event, Lock, Thread
+from typing import ClassVar, Dict, Optional
+
+from .basic_metric import BasicMetric
+from .rdt_sample import RdtSample
+from ..workload import Workload
+
+
+class _Counters:
+    __slots__ = ('timestamp', 'mbm_local', 'mbm_total', 'synthesized_at')
+
+    def __init__(self) -> None:
+        self.timestamp: Optional[float] = None
+        self.mbm_local: int = 0
+        self.mbm_total: int = 0
+        # `time.monotonic()` when a metric was synthesized for the lagging perf agent
+        self.synthesized_at: float = float('-inf')
+
+
+class ResCtrlSampler(Thread):
+    """
+    Samples the resctrl monitoring counters (`mon_data`) of the workloads in-process.
+
+    The LLC occupancy and the memory bandwidth of the metrics from the perf agent are replaced with the latest samples,
+    which are not delayed by the broker.
+    If the perf agent falls behind, the latest metric is repeated with the fresh samples, so `CacheIsolator` and
+    the memory isolators still see the changes of the cache and the bandwidth.
+    """
+
+    # the perf agent is regarded as lagging if no metric is received for this many perf intervals
+    STALE_FACTOR: ClassVar[float] = 2.0
+
+    def __init__(self, interval: float) -> None:
+        """
+        :param interval: sampling interval (sec)
+        """
+        super().__init__(daemon=True)
+
+        self._interval = interval
+
+        self._counters: Dict[Workload, _Counters] = dict()
+        self._lock = Lock()
+        self._stop_event = Event()
+
+    @property
+    def interval(self) -> float:
+        return self._interval
+
+    def register(self, workload: Workload) -> None:
+        with self._lock:
+            self._counters[workload] = _Counters()
+
+    def unregister(self, workload: Workload) -> None:
+        with self._lock:
+            self._counters.pop(workload, None)
+
+    def stop(self) -> None:
+        self._stop_event.set()
+
+    def merge(self, workload: Workload, metric: BasicMetric) -> BasicMetric:
+        """
+        :return: `metric` whose LLC occupancy and memory traffic are replaced with the latest sample if it is fresh
+        """
+        sample = workload.rdt_sample
+
+        if sample is None or time.monotonic() - sample.timestamp > self._interval * 2:
+            return metric
+
+        return metric.with_rdt(sample.llc_occupancy, sample.local_mem_ps, sample.remote_mem_ps)
+
+    def sample(self) -> None:
+        """Sample all registered workloads once"""
+        with self._lock:
+            counters = tuple(self._counters.items())
+
+        for workload, counter in counters:
+            if not workload.is_running:
+                self.unregister(workload)
+                continue
+
+            try:
+                self._sample(workload, counter)
+            except ProcessLookupError:
+                self.unregister(workload)
+            except (OSError, ValueError) as e:
+                logger = logging.getLogger(__name__)
+                logger.debug(f'failed to sample the resctrl counters of {workload}: {e}')
+
+    def _sample(self, workload: Workload, counter: _Counters) -> None:
+        llc_occupancy, mbm_local, mbm_total = workload.resctrl.read_mon_data()
+        now = time.monotonic()
+
+        prev_timestamp = counter.timestamp
+        local_delta = mbm_local - counter.mbm_local
+        total_delta = mbm_total - counter.mbm_total
+
+        counter.timestamp, counter.mbm_local, counter.mbm_total = now, mbm_local, mbm_total
+
+        # the bandwidth needs two samples. the counters are reset when the RMID is reassigned
+        if prev_timestamp is None or local_delta < 0 or total_delta < 0:
+            return
+
+        elapsed = now - prev_timestamp
+        local_mem_ps = local_delta / elapsed
+        sample = RdtSample(now, llc_occupancy, local_mem_ps, max(0.0, total_delta / elapsed - local_mem_ps))
+        workload.rdt_sample = sample
+
+        perf_interval = workload.perf_interval / 1000
+        metrics = workload.metrics
+        if len(metrics) == 0 \
+                or now - workload.metrics_received_at <= perf_interval * self.STALE_FACTOR \
+                or now - counter.synthesized_at < perf_interval:
+            return
+
+        counter.synthesized_at = now
+        workload.append_synthesized_metric(metrics[0].with_rdt(sample.llc_occupancy, sample.local_mem_ps,
+                                                               sample.remote_mem_ps))
+
+    def run(self) -> None:
+        logger = logging.getLogger(__name__)
+        logger.debug(f'starting resctrl sampler. interval: {self._interval}s')
+
+        next_at = time.monotonic()
+
+        while not self._stop_event.wait(max(0.0, next_at - time.monotonic())):
+            self.sample()
+
+            next_at += self._interval
+            # do not burst to catch up the missed samples
+            if next_at < time.monotonic():
+                next_at = time.monotonic() + self._interval
@@ -0,0 +1,198 @@
+# coding: UTF-8
+
+"""
+Memory-mapped ring buffer of metric records, written by a perf agent on the same host and read by the controller.
+
+Layout (version 1), little endian:
+    header (64 bytes): magic `ISOR` (4s), version (B), padding (3x), capacity (I), perf interval in ms (I),
+                       padding (4x), write sequence (Q), padding to 64 bytes
+    slot * capacity  : sequence (Q), record (11 x d, the fields of `MetricCodec.FIELDS`)
+
+The write sequence is the number of records ever written, so the record `n` is in the slot `n % capacity`.
+Each slot is a seqlock: the writer stores 0 to its sequence, then the record, then `n + 1`,
+and finally advances the write sequence of the header.
+The reader accepts a record only if the sequence of its slot is `n + 1` before and after reading the record,
+so a record that is being overwritten is dropped instead of being read torn.
+There is a single writer per ring. The sequences are aligned 8-byte stores,
+which are atomic on the architectures that the controller runs on.
+"""
+
+import mmap
+import os
+import struct
+from typing import ClassVar, Iterable, List, Tuple
+
+from .basic_metric import BasicMetric
+from .wire import MetricCodec
+
+
+class ShmRingError(ValueError):
+    pass
+
+
+class ShmRing:
+    # the rings must be in this directory, so a creation message can not make the controller map an arbitrary file
+    DIR: ClassVar[str] = '/dev/shm'
+    MAGIC: ClassVar[bytes] = b'ISOR'
+    VERSION: ClassVar[int] = 1
+    HEADER_SIZE: ClassVar[int] = 64
+
+    _HEADER: ClassVar[struct.Struct] = struct.Struct('<4sB3xII4x')
+    _SEQ: ClassVar[struct.Struct] = struct.Struct('<Q')
+    _RECORD: ClassVar[struct.Struct] = struct.Struct(f'<{len(MetricCodec.FIELDS)}d')
+    _WRITE_SEQ_OFFSET: ClassVar[int] = _HEADER.size
+    SLOT_SIZE: ClassVar[int] = _SEQ.size + _RECORD.size
+
+    def __init__(self, path: str, mm: mmap.mmap, capacity: int, interval: int) -> None:
+        self._path = path
+        self._mm = mm
+        self._capacity = capacity
+        self._interval = interval
+
+    @classmethod
+    def path_of(cls, name: str) -> str:
+        return os.path.join(cls.DIR, name)
+
+    @classmethod
+    def size_of(cls, capacity: int) -> int:
+        return cls.HEADER_SIZE + capacity * cls.SLOT_SIZE
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    @property
+    def interval(self) -> int:
+        return self._interval
+
+    def _slot_offset(self, seq: int) -> int:
+        return self.HEADER_SIZE + (seq % self._capacity) * self.SLOT_SIZE
+
+    def _write_seq(self) -> int:
+        return self._SEQ.unpack_from(self._mm, self._WRITE_SEQ_OFFSET)[0]
+
+    def close(self) -> None:
+        self._mm.close()
+
+
+class ShmRingWriter(ShmRing):
+    """The agent side of a ring. Used by the perf agents written in Python and by the benchmarks"""
+
+    @classmethod
+    def create(cls, path: str, capacity: int, interval: int) -> 'ShmRingWriter':
+        """
+        :param path: path of the ring, under `DIR`
+        :param capacity: number of the records that the ring holds
+        :param interval: perf interval (ms) of the records
+        """
+        if capacity <= 0:
+            raise ShmRingError(f'capacity must be positive: {capacity}')
+
+        fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            os.ftruncate(fd, cls.size_of(capacity))
+            mm = mmap.mmap(fd, cls.size_of(capacity), mmap.MAP_SHARED, mmap.PROT_READ | mmap.PROT_WRITE)
+        finally:
+            os.close(fd)
+
+        cls._HEADER.pack_into(mm, 0, cls.MAGIC, cls.VERSION, capacity, interval)
+        cls._SEQ.pack_into(mm, cls._WRITE_SEQ_OFFSET, 0)
+
+        return cls(path, mm, capacity, interval)
+
+    def write(self, records: Iterable[Tuple[float, ...]]) -> None:
+        """
+        :param records: values of each record in the order of `MetricCodec.FIELDS`
+        """
+        seq = self._write_seq()
+
+        for record in records:
+            offset = self._slot_offset(seq)
+            self._SEQ.pack_into(self._mm, offset, 0)
+            self._RECORD.pack_into(self._mm, offset + self._SEQ.size, *record)
+            self._SEQ.pack_into(self._mm, offset, seq + 1)
+            seq += 1
+            self._SEQ.pack_into(self._mm, self._WRITE_SEQ_OFFSET, seq)
+
+    def unlink(self) -> None:
+        self.close()
+        os.unlink(self._path)
+
+
+class ShmRingReader(ShmRing):
+    """The controller side of a ring. Reads the records straight from the mapping, without a broker"""
+
+    def __init__(self, path: str, mm: mmap.mmap, capacity: int, interval: int) -> None:
+        super().__init__(path, mm, capacity, interval)
+
+        # the sequence of the next record to read. the records written before the controller mapped it are skipped
+        self._next_seq: int = self._write_seq()
+        self._num_dropped: int = 0
+
+    @classmethod
+    def open(cls, path: str) -> 'ShmRingReader':
+        real_path = os.path.realpath(path)
+        if os.path.dirname(real_path) != os.path.realpath(cls.DIR):
+            raise ShmRingError(f'{path} is not in {cls.DIR}')
+
+        with open(real_path, 'rb') as fp:
+            size = os.fstat(fp.fileno()).st_size
+            if size < cls.HEADER_SIZE:
+                raise ShmRingError(f'truncated header of {path}: {size} bytes')
+
+            mm = mmap.mmap(fp.fileno(), size, mmap.MAP_SHARED, mmap.PROT_READ)
+
+        magic, version, capacity, interval = cls._HEADER.unpack_from(mm)
+
+        if magic != cls.MAGIC or version != cls.VERSION or capacity == 0 or size != cls.size_of(capacity):
+            mm.close()
+            raise ShmRingError(f'{path} is not a ring of version {cls.VERSION}: '
+                               f'{magic}, version {version}, capacity {capacity}, {size} bytes')
+
+        return cls(real_path, mm, capacity, interval)
+
+    @property
+    def num_dropped(self) -> int:
+        """number of the records that were overwritten before being read"""
+        return self._num_dropped
+
+    def read(self) -> List[BasicMetric]:
+        """
+        :return: the records written since the last call, in the order that they were sampled
+        """
+        head = self._write_seq()
+        seq = self._next_seq
+
+        if head == seq:
+            return list()
+
+        # the writer lapped the reader
+        if head - seq > self._capacity:
+            self._num_dropped += head - seq - self._capacity
+            seq = head - self._capacity
+
+        metrics: List[BasicMetric] = list()
+        mm = self._mm
+        record_offset = self._SEQ.size
+
+        for seq in range(seq, head):
+            offset = self._slot_offset(seq)
+
+            if self._SEQ.unpack_from(mm, offset)[0] != seq + 1:
+                self._num_dropped += 1
+                continue
+
+            record = self._RECORD.unpack_from(mm, offset + record_offset)
+
+            if self._SEQ.unpack_from(mm, offset)[0] != seq + 1:
+                self._num_dropped += 1
+                continue
+
+            metrics.append(BasicMetric(*record, self._interval))
+
+        self._next_seq = head
+        return metrics
@@ -0,0 +1,204 @@
+# coding: UTF-8
+
+import math
+from bisect import bisect_left, insort
+from collections import deque
+from enum import Enum
+from threading import Lock
+from typing import ClassVar, Deque, Dict, List, Optional, Tuple
+
+from .basic_metric import BasicMetric
+
+
+class Estimator(Enum):
+    """How the current value of a metric is estimated from its recent samples"""
+    LATEST = 'latest'
+    MEAN = 'mean'
+    EWMA = 'ewma'
+    MEDIAN = 'median'
+
+
+class StreamingStats:
+    """
+    Statistics of the latest `window` samples of a series, updated per sample:
+    the EWMA in O(1), the windowed mean and variance in O(1) (running sums),
+    and the windowed median in O(log window) comparisons (a sorted copy of the window).
+
+    The sums are shifted by a recent mean, so the variance of large values with small deviations
+    (e.g. the instructions per second) does not lose its precision.
+    They are recomputed from the window once per `window` samples (amortized O(1)),
+    so neither the rounding errors nor a drift away from the shift accumulate.
+    Non-finite samples are ignored.
+    """
+
+    # standard error of the estimators relative to that of a single sample, for `n` samples (i.i.d. normal)
+    _MEDIAN_EFFICIENCY: ClassVar[float] = math.sqrt(math.pi / 2)
+
+    def __init__(self, window: int, alpha: float) -> None:
+        """
+        :param window: number of the latest samples for the mean, the variance and the median
+        :param alpha: smoothing factor of the EWMA in (0, 1]. the larger, the more weight on the latest sample
+        """
+        if window <= 0:
+            raise ValueError(f'window must be positive: {window}')
+        if not 0 < alpha <= 1:
+            raise ValueError(f'alpha must be in (0, 1]: {alpha}')
+
+        self._window_size = window
+        self._alpha = alpha
+
+        self._samples: Deque[float] = deque()
+        self._sorted: List[float] = list()
+        self._shift: float = 0.0
+        self._sum: float = 0.0
+        self._sq_sum: float = 0.0
+        self._updates_since_rebase: int = 0
+        self._ewma: Optional[float] = None
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def update(self, value: float) -> None:
+        if not math.isfinite(value):
+            return
+
+        if not self._samples:
+            self._shift = value
+
+        if len(self._samples) == self._window_size:
+            oldest = self._samples.popleft()
+            del self._sorted[bisect_left(self._sorted, oldest)]
+            self._sum -= oldest - self._shift
+            self._sq_sum -= (oldest - self._shift) ** 2
+
+        self._samples.append(value)
+        insort(self._sorted, value)
+        self._sum += value - self._shift
+        self._sq_sum += (value - self._shift) ** 2
+
+        self._updates_since_rebase += 1
+        if self._updates_since_rebase >= self._window_size:
+            self._rebase()
+
+        if self._ewma is None:
+            self._ewma = value
+        else:
+            self._ewma += self._alpha * (value - self._ewma)
+
+    def _rebase(self) -> None:
+        self._shift = self.mean
+        self._sum = math.fsum(v - self._shift for v in self._samples)
+        self._sq_sum = math.fsum((v - self._shift) ** 2 for v in self._samples)
+        self._updates_since_rebase = 0
+
+    def clear(self) -> None:
+        self._samples.clear()
+        self._sorted.clear()
+        self._sum = self._sq_sum = 0.0
+        self._updates_since_rebase = 0
+        self._ewma = None
+
+    @property
+    def latest(self) -> float:
+        return self._samples[-1] if self._samples else math.nan
+
+    @property
+    def mean(self) -> float:
+        return self._shift + self._sum / len(self._samples) if self._samples else math.nan
+
+    @property
+    def ewma(self) -> float:
+        return self._ewma if self._ewma is not None else math.nan
+
+    @property
+    def median(self) -> float:
+        n = len(self._sorted)
+        if n == 0:
+            return math.nan
+        elif n % 2 == 1:
+            return self._sorted[n // 2]
+        else:
+            return (self._sorted[n // 2 - 1] + self._sorted[n // 2]) / 2
+
+    @property
+    def variance(self) -> float:
+        """
+        :return: the sample variance of the window. 0 with less than two samples
+        """
+        n = len(self._samples)
+        if n < 2:
+            return 0.0
+        # the rounding error of the running sums can make it slightly negative
+        return max(0.0, (self._sq_sum - self._sum ** 2 / n) / (n - 1))
+
+    def estimate(self, estimator: Estimator) -> float:
+        if estimator is Estimator.LATEST:
+            return self.latest
+        elif estimator is Estimator.MEAN:
+            return self.mean
+        elif estimator is Estimator.EWMA:
+            return self.ewma
+        else:
+            return self.median
+
+    def stderr(self, estimator: Estimator) -> float:
+        """
+        :return: the standard error of `estimate(estimator)`, estimated from the variance of the window
+        """
+        n = len(self._samples)
+        if n < 2:
+            return 0.0
+
+        std = math.sqrt(self.variance)
+        if estimator is Estimator.LATEST:
+            return std
+        elif estimator is Estimator.MEAN:
+            return std / math.sqrt(n)
+        elif estimator is Estimator.EWMA:
+            # the steady-state variance of the EWMA is `alpha / (2 - alpha)` of that of the samples
+            return std * math.sqrt(self._alpha / (2 - self._alpha))
+        else:
+            return self._MEDIAN_EFFICIENCY * std / math.sqrt(n)
+
+
+class MetricStats:
+    """
+    `StreamingStats` of the rates of a workload that `MetricDiff` compares against the solorun data.
+    Updated by the ingestion thread and read by the controller, so it is guarded by a lock.
+    """
+
+    # the properties of `BasicMetric` in the order of `MetricDiff.COLUMNS`
+    RATES: ClassVar[Tuple[str, ...]] = ('l3hit_ratio', 'local_mem_ps', 'instruction_ps')
+
+    def __init__(self, window: int, alpha: float) -> None:
+        self._stats: Dict[str, StreamingStats] = dict((rate, StreamingStats(window, alpha)) for rate in self.RATES)
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self._stats[self.RATES[0]])
+
+    def update(self, metric: BasicMetric) -> None:
+        with self._lock:
+            for rate, stats in self._stats.items():
+                try:
+                    stats.update(getattr(metric, rate))
+                except ZeroDivisionError:
+                    # a metric of a zero interval
+                    pass
+
+    def clear(self) -> None:
+        with self._lock:
+            for stats in self._stats.values():
+                stats.clear()
+
+    def estimate(self, estimator: Optional[Estimator] = None) -> Tuple[Tuple[float, ...], Tuple[float, ...]]:
+        """
+        :param estimator: `Estimator.LATEST` if `None`
+        :return: the estimate of each rate in the order of `RATES`, and their standard errors
+        """
+        if estimator is None:
+            estimator = Estimator.LATEST
+
+        with self._lock:
+            return tuple(stats.estimate(estimator) for stats in self._stats.values()), \
+                   tuple(stats.stderr(estimator) for stats in self._stats.values())
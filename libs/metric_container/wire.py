@@ -0,0 +1,93 @@
+# coding: UTF-8
+
+"""
+Wire formats of the metric messages that the perf agents send to the per-workload queues.
+
+Binary (version 1), little endian:
+    header: magic `ISOM` (4s), version (B), padding (x), number of records (H), perf interval in ms (I)
+    record: l2miss, l3miss, instructions, cycles, stall_cycles, wall_cycles, intra_coh, inter_coh, llc_size,
+            local_mem, remote_mem (11 x d)
+A message holds one or more records (a batch), which are decoded with a single `struct.iter_unpack()`.
+
+JSON (legacy):
+    a single object that maps the names of the fields above to their values. Old agents still send it.
+"""
+
+import json
+import struct
+from typing import ClassVar, Iterable, List, Tuple
+
+from .basic_metric import BasicMetric
+
+
+class WireFormatError(ValueError):
+    pass
+
+
+class MetricCodec:
+    MAGIC: ClassVar[bytes] = b'ISOM'
+    VERSION: ClassVar[int] = 1
+    FIELDS: ClassVar[Tuple[str, ...]] = ('l2miss', 'l3miss', 'instructions', 'cycles', 'stall_cycles', 'wall_cycles',
+                                         'intra_coh', 'inter_coh', 'llc_size', 'local_mem', 'remote_mem')
+    # the max number of records that fit in the count field of the header
+    MAX_BATCH: ClassVar[int] = 0xFFFF
+
+    _HEADER: ClassVar[struct.Struct] = struct.Struct('<4sBxHI')
+    _RECORD: ClassVar[struct.Struct] = struct.Struct(f'<{len(FIELDS)}d')
+
+    @classmethod
+    def is_binary(cls, body: bytes) -> bool:
+        return body[:len(cls.MAGIC)] == cls.MAGIC
+
+    @classmethod
+    def encode(cls, metrics: Iterable[Tuple[float, ...]], interval: int) -> bytes:
+        """
+        :param metrics: values of each record in the order of `FIELDS`
+        :param interval: perf interval (ms) of the records
+        :return: a binary message that holds all `metrics`
+        """
+        records = b''.join(cls._RECORD.pack(*metric) for metric in metrics)
+        count = len(records) // cls._RECORD.size
+
+        if count > cls.MAX_BATCH:
+            raise WireFormatError(f'too many records in a message: {count}')
+
+        return cls._HEADER.pack(cls.MAGIC, cls.VERSION, count, interval) + records
+
+    @classmethod
+    def decode_binary(cls, body: bytes) -> List[BasicMetric]:
+        """
+        :return: the metrics of a binary message in the order that they were encoded
+        """
+        if len(body) < cls._HEADER.size:
+            raise WireFormatError(f'truncated header: {len(body)} bytes')
+
+        magic, version, count, interval = cls._HEADER.unpack_from(body)
+
+        if magic != cls.MAGIC:
+            raise WireFormatError(f'wrong magic: {magic}')
+        if version != cls.VERSION:
+            raise WireFormatError(f'unsupported version: {version}')
+        if len(body) != cls._HEADER.size + count * cls._RECORD.size:
+            raise WireFormatError(f'size mismatch: {len(body)} bytes for {count} records')
+
+        records = memoryview(body)[cls._HEADER.size:]
+        return [BasicMetric(*record, interval) for record in cls._RECORD.iter_unpack(records)]
+
+    @classmethod
+    def decode_json(cls, body: bytes, interval: int) -> List[BasicMetric]:
+        metric = json.loads(body.decode())
+        return [BasicMetric(*(metric[field] for field in cls.FIELDS), interval)]
+
+    @classmethod
+    def decode(cls, body: bytes, interval: int) -> List[BasicMetric]:
+        """
+        Decode a message of either format
+        :param body: the message
+        :param interval: perf interval (ms) of the workload. used only for the JSON format
+        :return: the metrics of the message in the order that they were sampled
+        """
+        if cls.is_binary(body):
+            return cls.decode_binary(body)
+        else:
+            return cls.decode_json(body, interval)
@@ -1,33 +1,110 @@
 # coding: UTF-8
 
+import bisect
 import json
+import re
+import statistics
 from pathlib import Path
-from typing import Dict
+from typing import Dict, Tuple
 
 from ..metric_container.basic_metric import BasicMetric
 
 data_map: Dict[str, BasicMetric] = dict()
+# name -> number of cores -> the profile measured with the cores, normalized to the interval of 1000 ms
+profile_map: Dict[str, Dict[int, BasicMetric]] = dict()
+
+# the directories of the profiles measured with the number of cores (e.g. `8core`)
+_PROFILE_ROOT = Path(__file__).resolve().parents[2] / 'solorun_data'
+_CORES_DIR = re.compile(r'(\d+)core')
+# the profiles of this number of cores are the ones of `data_map`, which are sampled every 1000 ms
+_REFERENCE_CORES = 8
+
+# not a count per interval, so it is neither normalized to the interval nor scaled with the number of cores
+_OCCUPANCY_COLUMNS = frozenset(('llc_size', 'interval'))
+
+
+def _load(path: Path, interval: float) -> BasicMetric:
+    metric = json.loads(path.read_text())
+
+    return BasicMetric(metric['l2miss'],
+                       metric['l3miss'],
+                       metric['instructions'],
+                       metric['cycles'],
+                       metric['stall_cycles'],
+                       metric['wall_cycles'],
+                       metric['intra_coh'],
+                       metric['inter_coh'],
+                       metric['llc_size'],
+                       metric['local_mem'],
+                       metric['remote_mem'],
+                       interval)
+
+
+def _scale(metric: BasicMetric, factor: float) -> BasicMetric:
+    """
+    :return: the counts per interval of `metric` multiplied by `factor`
+    """
+    return BasicMetric(*(value if column in _OCCUPANCY_COLUMNS else value * factor
+                         for column, value in zip(BasicMetric.COLUMNS, metric.astuple())))
 
 
 def _init() -> None:
     for data in Path(__file__).parent.iterdir():  # type: Path
         if data.match('*.json'):
-            metric = json.loads(data.read_text())
-
-            item = BasicMetric(metric['l2miss'],
-                               metric['l3miss'],
-                               metric['instructions'],
-                               metric['cycles'],
-                               metric['stall_cycles'],
-                               metric['wall_cycles'],
-                               metric['intra_coh'],
-                               metric['inter_coh'],
-                               metric['llc_size'],
-                               metric['local_mem'],
-                               metric['remote_mem'],
-                               1000)
-
-            data_map[metric['name']] = item
+            data_map[json.loads(data.read_text())['name']] = _load(data, 1000)
+
+    if not _PROFILE_ROOT.is_dir():
+        return
+
+    # FIXME: the intervals are not recorded in the profiles.
+    #  the ones of a directory are estimated from its wall cycles (a count of the reference clock of a core)
+    #  relative to the reference directory, whose interval is 1000 ms
+    wall_cycles: Dict[int, float] = dict()
+    dirs: Dict[int, Path] = dict()
+    for cores_dir in _PROFILE_ROOT.iterdir():
+        match = _CORES_DIR.fullmatch(cores_dir.name)
+        if match is None or not cores_dir.is_dir():
+            continue
+
+        num_cores = int(match.group(1))
+        dirs[num_cores] = cores_dir
+        wall_cycles[num_cores] = statistics.median(json.loads(path.read_text())['wall_cycles']
+                                                   for path in cores_dir.glob('*.json'))
+
+    if _REFERENCE_CORES not in dirs:
+        return
+
+    for num_cores, cores_dir in dirs.items():
+        interval = 1000 * wall_cycles[num_cores] / wall_cycles[_REFERENCE_CORES]
+
+        for path in cores_dir.glob('*.json'):
+            profile_map.setdefault(json.loads(path.read_text())['name'], dict())[num_cores] = \
+                _scale(_load(path, 1000), 1000 / interval)
+
+
+def solorun_profile(name: str, num_cores: int) -> BasicMetric:
+    """
+    :return: the solorun profile of `name` with `num_cores` cores, linearly interpolated between the numbers of
+             cores that measured. out of them, the nearest one is scaled in proportion to the number of cores
+    :raises KeyError: if `name` has no profile
+    """
+    profiles = profile_map.get(name)
+    if not profiles:
+        return data_map[name]
+
+    measured: Tuple[int, ...] = tuple(sorted(profiles))
+    if num_cores in profiles:
+        return profiles[num_cores]
+
+    idx = bisect.bisect_left(measured, num_cores)
+    if idx == 0 or idx == len(measured):
+        nearest = measured[0] if idx == 0 else measured[-1]
+        return _scale(profiles[nearest], num_cores / nearest)
+
+    lo, hi = measured[idx - 1], measured[idx]
+    weight = (num_cores - lo) / (hi - lo)
+    return BasicMetric(*(lo_value + (hi_value - lo_value) * weight
+                         for lo_value, hi_value in zip(profiles[lo].astuple(), profiles[hi].astuple())))
 
 
 _init()
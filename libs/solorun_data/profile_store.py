@@ -0,0 +1,132 @@
+# coding: UTF-8
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import ClassVar, Dict, NamedTuple, Optional
+
+from ..metric_container.basic_metric import BasicMetric
+
+
+class ProfileKey(NamedTuple):
+    name: str
+    num_threads: int
+    num_cores: int
+    # -1 if the workload spans multiple sockets
+    socket: int
+
+
+class _Profile(NamedTuple):
+    metric: BasicMetric
+    profiled_at: float
+
+
+class ProfileStore:
+    """
+    On-disk store (SQLite) of the solorun profiles of the workloads, so they are reused across the instances of
+    an application and across the runs of the controller.
+    A profile is keyed by the application name, its number of threads, its number of cores and its socket.
+
+    The whole table is loaded into memory on the first access and the new profiles are written through,
+    so a lookup does not touch the disk. If the database can not be opened, the store is disabled with a warning
+    and the workloads are profiled as if it were empty.
+    """
+    _instance: ClassVar[Optional['ProfileStore']] = None
+    _instance_lock: ClassVar[threading.Lock] = threading.Lock()
+
+    PATH: ClassVar[str] = 'solorun_profiles.db'
+    # max age (sec) of a profile to be reused
+    MAX_AGE: ClassVar[float] = 24 * 60 * 60
+
+    _SCHEMA: ClassVar[str] = f'''
+        CREATE TABLE IF NOT EXISTS profiles (
+            name TEXT NOT NULL,
+            num_threads INTEGER NOT NULL,
+            num_cores INTEGER NOT NULL,
+            socket INTEGER NOT NULL,
+            {', '.join(f'{column} REAL NOT NULL' for column in BasicMetric.COLUMNS)},
+            profiled_at REAL NOT NULL,
+            PRIMARY KEY (name, num_threads, num_cores, socket)
+        )'''
+
+    def __init__(self, path: str) -> None:
+        self._path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._profiles: Optional[Dict[ProfileKey, _Profile]] = None
+        self._disabled: bool = False
+        # the workloads are created in the ingestion thread and profiled in the controller thread
+        self._lock = threading.Lock()
+
+    @classmethod
+    def instance(cls) -> 'ProfileStore':
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = ProfileStore(cls.PATH)
+            return cls._instance
+
+    def _load(self) -> bool:
+        """
+        :return: `False` if the store is disabled
+        """
+        if self._profiles is not None or self._disabled:
+            return not self._disabled
+
+        try:
+            dirname = os.path.dirname(self._path)
+            if dirname:
+                os.makedirs(dirname, exist_ok=True)
+
+            self._conn = sqlite3.connect(self._path, check_same_thread=False)
+            # a profile is stored from the control loop, so the commit must not wait for a sync of the journal
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('PRAGMA synchronous=NORMAL')
+            self._conn.execute(self._SCHEMA)
+            rows = self._conn.execute(f'SELECT name, num_threads, num_cores, socket, '
+                                      f'{", ".join(BasicMetric.COLUMNS)}, profiled_at FROM profiles').fetchall()
+        except (OSError, sqlite3.Error) as e:
+            logger = logging.getLogger(__name__)
+            logger.warning(f'the solorun profile store {self._path} is disabled: {e}')
+            self._disabled = True
+            return False
+
+        num_columns = len(BasicMetric.COLUMNS)
+        self._profiles = dict((ProfileKey(*row[:4]), _Profile(BasicMetric(*row[4:4 + num_columns]), row[-1]))
+                              for row in rows)
+        return True
+
+    def get(self, key: ProfileKey) -> Optional[BasicMetric]:
+        """
+        :return: the profile of `key` if it is younger than `MAX_AGE`
+        """
+        with self._lock:
+            if not self._load():
+                return None
+
+            profile = self._profiles.get(key)
+
+        if profile is None or time.time() - profile.profiled_at > self.MAX_AGE:
+            return None
+        return profile.metric
+
+    def put(self, key: ProfileKey, metric: BasicMetric) -> None:
+        with self._lock:
+            if not self._load():
+                return
+
+            profiled_at = time.time()
+            self._profiles[key] = _Profile(metric, profiled_at)
+
+            try:
+                with self._conn:
+                    self._conn.execute(f'INSERT OR REPLACE INTO profiles VALUES '
+                                       f'({", ".join("?" * (len(key) + len(BasicMetric.COLUMNS) + 1))})',
+                                       (*key, *metric.astuple(), profiled_at))
+            except sqlite3.Error as e:
+                logger = logging.getLogger(__name__)
+                logger.warning(f'failed to store the solorun profile of {key}: {e}')
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._profiles) if self._load() else 0
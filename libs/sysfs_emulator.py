@@ -0,0 +1,202 @@
+# coding: UTF-8
+
+"""
+Tmpdir-backed emulator of the resctrl, cpufreq, cgroup (v1), node topology and procfs files.
+It allows to run the controller on any Linux machine without RDT or cpufreq, and counts the writes to the tree.
+
+Of procfs, only the files that the controller reads through `sysfs` (the kernel settings under `/proc/sys`)
+are emulated. The processes are inspected by `psutil` on the real `/proc`, so the workloads must be real processes.
+
+usage:
+    emulator = SysfsEmulator(num_sockets=2, cores_per_socket=8)
+    emulator.install()  # must be called before importing the other modules of `libs`
+    ...
+    emulator.add_group('bfs_1234', cores=range(4, 8), mems=(0,))
+
+This module lives outside of `libs.utils` on purpose: importing `libs.utils` already reads the tree.
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Iterable, NamedTuple, Optional
+
+
+class WriteStats(NamedTuple):
+    count: int
+    total_latency: float  # sec.
+    max_latency: float  # sec.
+    count_by_file: Counter  # key: name of the written file. e.g. `schemata'
+
+    @property
+    def avg_latency(self) -> float:
+        return self.total_latency / self.count if self.count != 0 else 0
+
+
+class SysfsEmulator:
+    def __init__(self, num_sockets: int = 2, cores_per_socket: int = 8, llc_size_kb: int = 30720,
+                 cbm_bits: int = 20, min_cbm_bits: int = 1,
+                 min_freq: int = 1200000, max_freq: int = 2100000, perf_event_paranoid: Optional[int] = None,
+                 root: Optional[str] = None) -> None:
+        """
+        :param perf_event_paranoid: `None` emulates a kernel without `perf_event_open(2)`,
+                                    so the controller does not count the perf events of the workloads by itself
+        """
+        self._num_sockets = num_sockets
+        self._cores_per_socket = cores_per_socket
+        self._own_root = root is None
+        self._root: Path = Path(tempfile.mkdtemp(prefix='iso_sched_sysfs_') if root is None else root)
+
+        self._installed: bool = False
+
+        self._lock = threading.Lock()
+        self._count: int = 0
+        self._total_latency: float = 0
+        self._max_latency: float = 0
+        self._count_by_file: Counter = Counter()
+
+        self._build(llc_size_kb, cbm_bits, min_cbm_bits, min_freq, max_freq, perf_event_paranoid)
+
+    @property
+    def root(self) -> Path:
+        return self._root
+
+    @property
+    def num_cores(self) -> int:
+        return self._num_sockets * self._cores_per_socket
+
+    def _write_file(self, abs_path: str, content: str) -> None:
+        file_path = self._root / abs_path.lstrip('/')
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        file_path.write_text(content)
+
+    def _build(self, llc_size_kb: int, cbm_bits: int, min_cbm_bits: int, min_freq: int, max_freq: int,
+               perf_event_paranoid: Optional[int]) -> None:
+        last_node = self._num_sockets - 1
+        self._write_file('/sys/devices/system/node/online', f'0-{last_node}\n')
+        self._write_file('/sys/devices/system/node/has_memory', f'0-{last_node}\n')
+
+        for socket_id in range(self._num_sockets):
+            first_core = socket_id * self._cores_per_socket
+            last_core = first_core + self._cores_per_socket - 1
+            self._write_file(f'/sys/devices/system/node/node{socket_id}/cpulist', f'{first_core}-{last_core}\n')
+
+        for core_id in range(self.num_cores):
+            cpufreq = f'/sys/devices/system/cpu/cpu{core_id}/cpufreq'
+            self._write_file(f'{cpufreq}/cpuinfo_min_freq', f'{min_freq}\n')
+            self._write_file(f'{cpufreq}/cpuinfo_max_freq', f'{max_freq}\n')
+            self._write_file(f'{cpufreq}/scaling_max_freq', f'{max_freq}\n')
+            self._write_file(f'{cpufreq}/scaling_cur_freq', f'{max_freq}\n')
+            self._write_file(f'{cpufreq}/related_cpus', f'{core_id}\n')
+
+        cache = '/sys/devices/system/cpu/cpu0/cache/index3'
+        self._write_file(f'{cache}/level', '3\n')
+        self._write_file(f'{cache}/type', 'Unified\n')
+        self._write_file(f'{cache}/size', f'{llc_size_kb}K\n')
+
+        self._write_file('/sys/fs/resctrl/info/L3/cbm_mask', f'{(1 << cbm_bits) - 1:x}\n')
+        self._write_file('/sys/fs/resctrl/info/L3/min_cbm_bits', f'{min_cbm_bits}\n')
+        self._write_file('/sys/fs/resctrl/info/L3/num_closids', '16\n')
+        self._write_file('/sys/fs/resctrl/info/MB/min_bandwidth', '10\n')
+        self._write_file('/sys/fs/resctrl/info/MB/bandwidth_gran', '10\n')
+        self._write_file('/sys/fs/resctrl/info/MB/delay_linear', '1\n')
+        self._write_file('/sys/fs/resctrl/info/MB/num_closids', '8\n')
+        self._write_file('/sys/fs/resctrl/info/L3_MON/mon_features',
+                         'llc_occupancy\nmbm_total_bytes\nmbm_local_bytes\n')
+        self._write_file('/sys/fs/resctrl/info/L3_MON/num_rmids', '176\n')
+        schemata = ';'.join(f'{socket_id}={(1 << cbm_bits) - 1:x}' for socket_id in range(self._num_sockets))
+        mb = ';'.join(f'{socket_id}=100' for socket_id in range(self._num_sockets))
+        self._write_file('/sys/fs/resctrl/schemata', f'L3:{schemata}\nMB:{mb}\n')
+
+        (self._root / 'sys' / 'fs' / 'cgroup' / 'cpuset').mkdir(parents=True, exist_ok=True)
+        (self._root / 'sys' / 'fs' / 'cgroup' / 'cpu').mkdir(parents=True, exist_ok=True)
+
+        if perf_event_paranoid is not None:
+            self._write_file('/proc/sys/kernel/perf_event_paranoid', f'{perf_event_paranoid}\n')
+
+    def add_group(self, group_name: str, cores: Iterable[int], mems: Iterable[int]) -> None:
+        """Create the cgroups and the resctrl group of a workload"""
+        cpuset = f'/sys/fs/cgroup/cpuset/{group_name}'
+        self._write_file(f'{cpuset}/cpuset.cpus', ','.join(map(str, cores)) + '\n')
+        self._write_file(f'{cpuset}/cpuset.mems', ','.join(map(str, mems)) + '\n')
+        self._write_file(f'{cpuset}/cpuset.memory_migrate', '0\n')
+        self._write_file(f'{cpuset}/tasks', '')
+
+        cpu = f'/sys/fs/cgroup/cpu/{group_name}'
+        self._write_file(f'{cpu}/cpu.cfs_quota_us', '-1\n')
+        self._write_file(f'{cpu}/cpu.cfs_period_us', '100000\n')
+        self._write_file(f'{cpu}/cpu.shares', '1024\n')
+
+        max_mask = (self._root / 'sys' / 'fs' / 'resctrl' / 'info' / 'L3' / 'cbm_mask').read_text().strip()
+        schemata = ';'.join(f'{socket_id}={max_mask}' for socket_id in range(self._num_sockets))
+        mb = ';'.join(f'{socket_id}=100' for socket_id in range(self._num_sockets))
+        self._write_file(f'/sys/fs/resctrl/{group_name}/schemata', f'L3:{schemata}\nMB:{mb}\n')
+        self._write_file(f'/sys/fs/resctrl/{group_name}/tasks', '')
+        for socket_id in range(self._num_sockets):
+            self.set_mon_data(group_name, socket_id, 0, 0, 0)
+
+    def set_mon_data(self, group_name: str, socket_id: int,
+                     llc_occupancy: int, mbm_local_bytes: int, mbm_total_bytes: int) -> None:
+        """Set the monitoring counters of a resctrl group on the given socket"""
+        mon_dir = f'/sys/fs/resctrl/{group_name}/mon_data/mon_L3_{socket_id:02d}'
+        self._write_file(f'{mon_dir}/llc_occupancy', f'{llc_occupancy}\n')
+        self._write_file(f'{mon_dir}/mbm_local_bytes', f'{mbm_local_bytes}\n')
+        self._write_file(f'{mon_dir}/mbm_total_bytes', f'{mbm_total_bytes}\n')
+
+    def remove_group(self, group_name: str) -> None:
+        for group_dir in (f'sys/fs/cgroup/cpuset/{group_name}', f'sys/fs/cgroup/cpu/{group_name}',
+                          f'sys/fs/resctrl/{group_name}'):
+            shutil.rmtree(str(self._root / group_dir), ignore_errors=True)
+
+    def _on_write(self, file_path: str, latency: float) -> None:
+        with self._lock:
+            self._count += 1
+            self._total_latency += latency
+            self._max_latency = max(self._max_latency, latency)
+            self._count_by_file[Path(file_path).name] += 1
+
+    def install(self) -> None:
+        """Make the controller use this tree and start counting the writes"""
+        if self._installed:
+            return
+
+        os.environ['ISO_SCHED_SYSFS_ROOT'] = str(self._root)
+
+        from .utils import sysfs
+        sysfs.set_root(str(self._root))
+        sysfs.add_write_observer(self._on_write)
+        self._installed = True
+
+    def uninstall(self) -> None:
+        if not self._installed:
+            return
+
+        from .utils import sysfs
+        sysfs.remove_write_observer(self._on_write)
+        self._installed = False
+
+    def stats(self) -> WriteStats:
+        with self._lock:
+            return WriteStats(self._count, self._total_latency, self._max_latency, Counter(self._count_by_file))
+
+    def reset_stats(self) -> WriteStats:
+        """
+        :return: the stats before reset
+        """
+        with self._lock:
+            stats = WriteStats(self._count, self._total_latency, self._max_latency, self._count_by_file)
+
+            self._count = 0
+            self._total_latency = 0
+            self._max_latency = 0
+            self._count_by_file = Counter()
+
+        return stats
+
+    def cleanup(self) -> None:
+        self.uninstall()
+        if self._own_root:
+            shutil.rmtree(str(self._root), ignore_errors=True)
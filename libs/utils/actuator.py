@@ -0,0 +1,185 @@
+# coding: UTF-8
+
+import logging
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, ClassVar, Dict, Hashable, Iterator, List, NamedTuple, Optional
+
+from .privileged_writer import PrivilegedWriter
+
+
+class _Entry(NamedTuple):
+    desired: Any
+    applied: Any
+    apply: Callable[[Any], None]
+    on_commit: Callable[[Any], None]
+    on_abort: Callable[[], None]
+
+
+class Actuator:
+    """
+    Transactional actuation layer.
+
+    Inside of a `transaction()`, isolators only stage the desired configurations (cores, mems, LLC masks, freq. caps,
+    CFS quota ...). When the outermost transaction ends, only the configurations that differ from the applied ones
+    are written, in a single batch. If any of the writes fails, the already written ones are rolled back.
+    Outside of a transaction, a staged configuration is applied immediately (still skipping redundant writes).
+
+    The transactions and the staged configurations are per thread, so the groups that are isolated in parallel
+    commit (or roll back) only their own configurations, and their writes are applied concurrently.
+    """
+    _instance: ClassVar[Optional['Actuator']] = None
+    _instance_lock: ClassVar[threading.Lock] = threading.Lock()
+
+    def __init__(self) -> None:
+        # guards the counters. the rest of the state is thread-local
+        self._lock = threading.Lock()
+        self._thread_state = threading.local()
+        self._writer: PrivilegedWriter = PrivilegedWriter.instance()
+
+        self._num_writes: int = 0
+        self._num_skipped: int = 0
+
+    @classmethod
+    def instance(cls) -> 'Actuator':
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = Actuator()
+            return cls._instance
+
+    @property
+    def _staged(self) -> Dict[Hashable, _Entry]:
+        if not hasattr(self._thread_state, 'staged'):
+            self._thread_state.staged = OrderedDict()
+            self._thread_state.depth = 0
+        return self._thread_state.staged
+
+    @property
+    def in_transaction(self) -> bool:
+        """whether the current thread is in a transaction"""
+        self._staged  # initialize the thread-local state
+        return self._thread_state.depth > 0
+
+    @property
+    def num_writes(self) -> int:
+        """number of configurations actually written so far"""
+        return self._num_writes
+
+    @property
+    def num_skipped(self) -> int:
+        """number of staged configurations that skipped because they were already applied"""
+        return self._num_skipped
+
+    @contextmanager
+    def transaction(self) -> Iterator['Actuator']:
+        """
+        Nested transactions of a thread join its outermost one.
+        If the outermost transaction is exited by an exception, all staged configurations of the thread are discarded.
+        """
+        state = self._thread_state
+        self._staged  # initialize the thread-local state
+        state.depth += 1
+
+        try:
+            yield self
+
+        except BaseException:
+            state.depth -= 1
+            if state.depth == 0:
+                self.discard()
+            raise
+
+        state.depth -= 1
+        if state.depth == 0:
+            self.flush()
+
+    def stage(self, key: Hashable, desired: Any, applied: Any,
+              apply: Callable[[Any], None], on_commit: Callable[[Any], None], on_abort: Callable[[], None]) -> None:
+        """
+        Stage a desired configuration.
+
+        :param key: identifies the configuration. Staging the same key again overrides the previous one
+        :param desired: the desired value
+        :param applied: the value that is currently applied to the system
+        :param apply: writes the given value to the system
+        :param on_commit: called with the desired value after it is successfully applied
+        :param on_abort: called when the configuration may be left inconsistent with the system
+        """
+        staged = self._staged
+        prev = staged.pop(key, None)
+        if prev is not None:
+            # keep the value that was applied before this transaction for the diff and the rollback
+            applied = prev.applied
+
+        staged[key] = _Entry(desired, applied, apply, on_commit, on_abort)
+
+        if self._thread_state.depth == 0:
+            self.flush()
+
+    def desired(self, key: Hashable, default: Any) -> Any:
+        """
+        :return: the staged value of `key` or `default` if nothing is staged
+        """
+        entry = self._staged.get(key)
+        return default if entry is None else entry.desired
+
+    def discard(self) -> None:
+        self._staged.clear()
+
+    def flush(self) -> None:
+        """
+        Apply the minimal diff of the staged configurations of the current thread against the applied ones
+        in one batch.
+
+        :raises OSError: when any of the writes fails. The already written configurations are rolled back
+        """
+        staged = self._staged
+        entries = tuple(staged.values())
+        staged.clear()
+
+        changed: List[_Entry] = list()
+        for entry in entries:
+            if entry.desired != entry.applied:
+                changed.append(entry)
+
+        with self._lock:
+            self._num_skipped += len(entries) - len(changed)
+
+        if not changed:
+            return
+
+        try:
+            with self._writer.batch():
+                for entry in changed:
+                    entry.apply(entry.desired)
+
+        except Exception:
+            self._rollback(changed)
+            raise
+
+        with self._lock:
+            self._num_writes += len(changed)
+        for entry in changed:
+            entry.on_commit(entry.desired)
+
+    def _rollback(self, entries: List[_Entry]) -> None:
+        logger = logging.getLogger(__name__)
+        logger.warning(f'rolling back {len(entries)} configuration(s)...')
+
+        for entry in entries:
+            entry.on_abort()
+
+        try:
+            with self._writer.batch():
+                for entry in reversed(entries):
+                    if entry.applied is None:
+                        continue
+
+                    try:
+                        entry.apply(entry.applied)
+                    except Exception as e:
+                        logger.warning(f'Error occurred during rollback: {e}')
+
+        except Exception as e:
+            logger.warning(f'Error occurred during rollback: {e}')
@@ -0,0 +1,173 @@
+# coding: UTF-8
+
+"""
+Probes of the hardware features that the isolators depend on.
+
+Every probe only looks at sysfs, runs once on its first call and caches the result, so importing `libs` never touches
+the hardware and a missing feature (e.g. no RDT or no cpufreq driver) only disables the isolators that need it.
+"""
+
+import functools
+import logging
+from typing import Dict, FrozenSet
+
+from . import sysfs
+
+
+@functools.lru_cache(maxsize=None)
+def llc_size() -> int:
+    """
+    :return: size (in bytes) of the last level cache of a socket
+    """
+    for index in sorted(sysfs.path('/sys/devices/system/cpu/cpu0/cache').glob('index*')):
+        if (index / 'level').read_text().strip() == '3':
+            # e.g. `30720K'
+            size = (index / 'size').read_text().strip()
+            return int(size.rstrip('KkMm')) * (1024 * 1024 if size[-1] in 'Mm' else 1024)
+
+    # `cpuinfo` takes hundreds of milliseconds and spawns processes, so it is used only as a last resort
+    logger = logging.getLogger(__name__)
+    logger.warning('failed to find the LLC size from sysfs. falling back to cpuinfo')
+
+    from cpuinfo import cpuinfo
+    return int(cpuinfo.get_cpu_info()['l3_cache_size'].split()[0]) * 1024
+
+
+@functools.lru_cache(maxsize=None)
+def llc_domains() -> int:
+    """
+    :return: number of the L3 cache domains that the resctrl schemata are written for, i.e. the max. cache id + 1.
+             it can exceed the number of sockets, e.g. with sub-NUMA clustering
+    """
+    schemata = sysfs.path('/sys/fs/resctrl/schemata')
+    if schemata.is_file():
+        for line in schemata.read_text().splitlines():
+            resource, _, domains = line.strip().partition(':')
+            if resource == 'L3':
+                # e.g. `L3:0=fffff;1=fffff'
+                return max(int(domain.split('=')[0]) for domain in domains.split(';')) + 1
+
+    cache_ids = set(int(cache_id.read_text())
+                    for cache_id in sysfs.path('/sys/devices/system/cpu').glob('cpu*/cache/index3/id'))
+    return max(cache_ids) + 1 if cache_ids else 1
+
+
+@functools.lru_cache(maxsize=None)
+def has_resctrl() -> bool:
+    """
+    :return: `True` if resctrl is mounted and supports L3 cache allocation (Intel CAT)
+    """
+    return sysfs.path('/sys/fs/resctrl/info/L3/cbm_mask').is_file()
+
+
+@functools.lru_cache(maxsize=None)
+def has_mba() -> bool:
+    """
+    :return: `True` if resctrl supports memory bandwidth allocation (Intel MBA)
+    """
+    return sysfs.path('/sys/fs/resctrl/info/MB/min_bandwidth').is_file()
+
+
+@functools.lru_cache(maxsize=None)
+def _mon_features() -> FrozenSet[str]:
+    mon_features = sysfs.path('/sys/fs/resctrl/info/L3_MON/mon_features')
+    return frozenset(mon_features.read_text().split()) if mon_features.is_file() else frozenset()
+
+
+def has_cmt() -> bool:
+    """
+    :return: `True` if resctrl can monitor the LLC occupancy of each group (Intel CMT)
+    """
+    return 'llc_occupancy' in _mon_features()
+
+
+def has_mbm() -> bool:
+    """
+    :return: `True` if resctrl can monitor the memory traffic of each group (Intel MBM)
+    """
+    return {'mbm_local_bytes', 'mbm_total_bytes'} <= _mon_features()
+
+
+@functools.lru_cache(maxsize=None)
+def has_cpufreq() -> bool:
+    """
+    :return: `True` if a cpufreq driver is loaded, so the max frequency of each core can be limited
+    """
+    return sysfs.path('/sys/devices/system/cpu/cpu0/cpufreq/scaling_max_freq').is_file()
+
+
+@functools.lru_cache(maxsize=None)
+def has_cpuset() -> bool:
+    """
+    :return: `True` if the cpuset controller of cgroup is available
+    """
+    cgroup_root = sysfs.path('/sys/fs/cgroup')
+    controllers = cgroup_root / 'cgroup.controllers'
+
+    if controllers.is_file():
+        return 'cpuset' in controllers.read_text().split()
+    else:
+        return (cgroup_root / 'cpuset').is_dir()
+
+
+@functools.lru_cache(maxsize=None)
+def has_numa_topology() -> bool:
+    """
+    :return: `True` if the NUMA node topology is exposed
+    """
+    return sysfs.path('/sys/devices/system/node/online').is_file()
+
+
+@functools.lru_cache(maxsize=None)
+def has_perf_events() -> bool:
+    """
+    :return: `True` if the kernel supports `perf_event_open(2)`
+    """
+    return sysfs.path('/proc/sys/kernel/perf_event_paranoid').is_file()
+
+
+@functools.lru_cache(maxsize=None)
+def _cpu_pmu() -> str:
+    # `cpu_core` on the hybrid CPUs
+    for pmu in ('cpu', 'cpu_core'):
+        if sysfs.path(f'/sys/bus/event_source/devices/{pmu}').is_dir():
+            return pmu
+    return str()
+
+
+def has_hw_perf_counters() -> bool:
+    """
+    :return: `True` if the core PMU is exposed, so the hardware events can be counted (usually not in VMs)
+    """
+    return bool(_cpu_pmu())
+
+
+def has_intel_pmu() -> bool:
+    """
+    :return: `True` if the core PMU is driven by the Intel driver, so the raw event encodings of Intel can be used
+    """
+    return has_hw_perf_counters() and sysfs.path(f'/sys/bus/event_source/devices/{_cpu_pmu()}/caps/pmu_name').is_file()
+
+
+def summary() -> Dict[str, bool]:
+    """
+    :return: availability of each probed feature
+    """
+    return {
+        'resctrl': has_resctrl(),
+        'mba': has_mba(),
+        'cmt': has_cmt(),
+        'mbm': has_mbm(),
+        'cpufreq': has_cpufreq(),
+        'cpuset': has_cpuset(),
+        'numa': has_numa_topology(),
+        'perf': has_perf_events(),
+        'perf_hw': has_hw_perf_counters(),
+    }
+
+
+def clear_cache() -> None:
+    """Forget the probed results. Used when the sysfs root is changed"""
+    for probe in (llc_size, llc_domains, has_resctrl, has_mba, _mon_features, has_cpufreq, has_cpuset, has_numa_topology,
+                  has_perf_events, _cpu_pmu):
+        probe.cache_clear()
@@ -1,5 +1,24 @@
 # coding: UTF-8
 
+import functools
+from typing import Tuple, Type
+
 from .base import BaseCgroup
+from .base_v2 import BaseCgroupV2
 from .cpu import Cpu
+from .cpu_v2 import CpuV2
 from .cpuset import CpuSet
+from .cpuset_v2 import CpuSetV2
+
+
+@functools.lru_cache(maxsize=None)
+def backend() -> Tuple[Type[CpuSet], Type[Cpu]]:
+    """
+    Detect the cgroup hierarchy of this host.
+
+    :return: `CpuSet` and `Cpu` classes of the detected hierarchy (v2 if the unified hierarchy is mounted)
+    """
+    if BaseCgroupV2.is_mounted():
+        return CpuSetV2, CpuV2
+    else:
+        return CpuSet, Cpu
@@ -1,20 +1,87 @@
 # coding: UTF-8
 
+import errno
 import getpass
 import grp
 import os
 import subprocess
 from abc import ABCMeta
-from typing import ClassVar, Iterable
+from pathlib import Path
+from typing import ClassVar, Dict, Iterable
+
+from .. import sysfs
 
 
 class BaseCgroup(metaclass=ABCMeta):
-    MOUNT_POINT: ClassVar[str] = '/sys/fs/cgroup'
+    MOUNT_POINT: ClassVar[str] = str(sysfs.path('/sys/fs/cgroup'))
     CONTROLLER: ClassVar[str] = str()
 
+    # errnos that mean the group (or its tasks) has been removed under us
+    _VANISHED_ERRNOS: ClassVar[frozenset] = frozenset((errno.ENOENT, errno.ENODEV, errno.ESRCH))
+
     def __init__(self, group_name: str) -> None:
         self._group_name: str = group_name
         self._group_path: str = f'{self.CONTROLLER}:{group_name}'
+        self._fds: Dict[str, int] = dict()
+
+    def __del__(self) -> None:
+        self.close()
+
+    @property
+    def group_dir(self) -> Path:
+        return Path(self.MOUNT_POINT) / self.CONTROLLER / self._group_name
+
+    def _fd_of(self, file_name: str) -> int:
+        fd = self._fds.get(file_name)
+
+        if fd is None:
+            try:
+                fd = os.open(str(self.group_dir / file_name), os.O_RDWR | os.O_CLOEXEC)
+            except OSError as e:
+                if e.errno in self._VANISHED_ERRNOS:
+                    raise ProcessLookupError(f'cgroup {self._group_path} does not exist') from e
+                raise
+
+            self._fds[file_name] = fd
+
+        return fd
+
+    def _drop_fd(self, file_name: str) -> None:
+        fd = self._fds.pop(file_name, None)
+        if fd is not None:
+            os.close(fd)
+
+    def _write(self, file_name: str, value: str) -> None:
+        """
+        Write `value` to the control file `file_name` of this group through a cached file descriptor.
+        Each write is a single `pwrite(2)` at offset 0, which is how the cgroup filesystem expects it.
+        """
+        fd = self._fd_of(file_name)
+
+        try:
+            sysfs.pwrite(fd, value.encode('ASCII'), str(self.group_dir / file_name))
+        except OSError as e:
+            if e.errno in self._VANISHED_ERRNOS:
+                self._drop_fd(file_name)
+                raise ProcessLookupError(f'cgroup {self._group_path} does not exist') from e
+            raise
+
+    def _read(self, file_name: str) -> str:
+        fd = self._fd_of(file_name)
+
+        try:
+            # control files are small enough to be read in a single `pread(2)`
+            return os.pread(fd, 4096, 0).decode('ASCII').strip()
+        except OSError as e:
+            if e.errno in self._VANISHED_ERRNOS:
+                self._drop_fd(file_name)
+                raise ProcessLookupError(f'cgroup {self._group_path} does not exist') from e
+            raise
+
+    def close(self) -> None:
+        """Close all cached file descriptors of this group"""
+        for file_name in tuple(self._fds):
+            self._drop_fd(file_name)
 
     def create_group(self) -> None:
         uname: str = getpass.getuser()
@@ -29,4 +96,5 @@ class BaseCgroup(metaclass=ABCMeta):
         subprocess.check_call(args=('cgclassify', '-g', self._group_path, '--sticky', *map(str, pids)))
 
     def delete(self) -> None:
+        self.close()
         subprocess.check_call(args=('sudo', 'cgdelete', '-r', '-g', self._group_path))
@@ -0,0 +1,51 @@
+# coding: UTF-8
+
+import os
+from pathlib import Path
+from typing import Iterable
+
+from .base import BaseCgroup
+
+
+class BaseCgroupV2(BaseCgroup):
+    """
+    cgroup v2 (unified hierarchy) counterpart of `BaseCgroup`.
+    All controllers of a group share one directory, and the group is managed through its files without forking.
+    """
+
+    def __init__(self, group_name: str) -> None:
+        super().__init__(group_name)
+        self._group_path: str = group_name
+
+    @classmethod
+    def is_mounted(cls) -> bool:
+        """
+        :return: whether the unified hierarchy is mounted on `MOUNT_POINT`
+        """
+        return (Path(cls.MOUNT_POINT) / 'cgroup.controllers').is_file()
+
+    @property
+    def group_dir(self) -> Path:
+        return Path(self.MOUNT_POINT) / self._group_name
+
+    def create_group(self) -> None:
+        os.makedirs(str(self.group_dir), mode=0o755, exist_ok=True)
+
+        # the controllers have to be enabled on the parent to be available in the group
+        with (self.group_dir.parent / 'cgroup.subtree_control').open('w') as fp:
+            fp.write('+cpu +cpuset')
+
+    def add_tasks(self, pids: Iterable[int]) -> None:
+        # `cgroup.procs' accepts only one pid per write
+        for pid in pids:
+            self._write('cgroup.procs', str(pid))
+
+    def delete(self) -> None:
+        self.close()
+        os.rmdir(str(self.group_dir))
+
+    def freeze(self) -> None:
+        self._write('cgroup.freeze', '1')
+
+    def thaw(self) -> None:
+        self._write('cgroup.freeze', '0')
@@ -1,7 +1,6 @@
 # coding: UTF-8
 
 
-import subprocess
 from typing import ClassVar
 
 from .base import BaseCgroup
@@ -11,5 +10,11 @@ class Cpu(BaseCgroup):
     CONTROLLER: ClassVar[str] = 'cpu'
 
     def limit_cpu_quota(self, quota: int, period: int) -> None:
-        subprocess.check_call(args=('cgset', '-r', f'cpu.cfs_quota_us={quota}', self._group_name))
-        subprocess.check_call(args=('cgset', '-r', f'cpu.cfs_period_us={period}', self._group_name))
+        self._write('cpu.cfs_quota_us', str(quota))
+        self._write('cpu.cfs_period_us', str(period))
+
+    def set_weight(self, weight: int) -> None:
+        """
+        :param weight: relative weight in the range of [1, 10000] as `cpu.weight' of cgroup v2 (default: 100)
+        """
+        self._write('cpu.shares', str(weight * 1024 // 100))
@@ -0,0 +1,14 @@
+# coding: UTF-8
+
+
+from .base_v2 import BaseCgroupV2
+from .cpu import Cpu
+
+
+class CpuV2(BaseCgroupV2, Cpu):
+    def limit_cpu_quota(self, quota: int, period: int) -> None:
+        # negative quota means unlimited as in cgroup v1
+        self._write('cpu.max', f'{quota if quota >= 0 else "max"} {period}')
+
+    def set_weight(self, weight: int) -> None:
+        self._write('cpu.weight', str(weight))
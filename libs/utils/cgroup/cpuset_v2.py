@@ -0,0 +1,29 @@
+# coding: UTF-8
+
+
+from typing import Set
+
+from .base_v2 import BaseCgroupV2
+from .cpuset import CpuSet
+from ..hyphen import convert_to_set
+
+
+class CpuSetV2(BaseCgroupV2, CpuSet):
+    def set_memory_migrate(self, flag: bool) -> None:
+        # cgroup v2 always migrates the memory of the tasks when `cpuset.mems' is changed
+        pass
+
+    def read_cpus(self) -> Set[int]:
+        return self._read_with_fallback('cpuset.cpus')
+
+    def read_mems(self) -> Set[int]:
+        return self._read_with_fallback('cpuset.mems')
+
+    def _read_with_fallback(self, file_name: str) -> Set[int]:
+        # empty value means that the group inherits it from the parent
+        value = self._read(file_name)
+        if value == '':
+            value = self._read(f'{file_name}.effective')
+        if value == '':
+            raise ProcessLookupError()
+        return convert_to_set(value)
@@ -1,20 +1,45 @@
 # coding: UTF-8
 
-import subprocess
+import logging
+import threading
 from pathlib import Path
-from typing import ClassVar, Iterable
+from typing import ClassVar, Dict, Iterable, Optional, Tuple
 
+from libs.utils import cgroup
 from libs.utils.cgroup import CpuSet
+from . import sysfs
+from .lazy import LazyClassVar
+from .privileged_writer import PrivilegedWriter
 
 
 class DVFS:
-    MIN: ClassVar[int] = int(Path('/sys/devices/system/cpu/cpu0/cpufreq/cpuinfo_min_freq').read_text())
+    """
+    Per-core frequency caps (`scaling_max_freq`).
+
+    The applied cap of every core is kept in a table shared by all workloads, so a write that is already in effect is
+    skipped without touching sysfs.
+    Cores of the same frequency domain (`related_cpus`) share a cap, so only one write is issued per domain.
+    """
+
+    CPU_PATH: ClassVar[Path] = sysfs.path('/sys/devices/system/cpu')
+    # read on the first access, so importing this module does not require cpufreq
+    MIN: ClassVar[int] = LazyClassVar(lambda: int(DVFS._freq_file(0, 'cpuinfo_min_freq').read_text()))
     STEP: ClassVar[int] = 100000
-    MAX: ClassVar[int] = int(Path('/sys/devices/system/cpu/cpu0/cpufreq/cpuinfo_max_freq').read_text())
+    MAX: ClassVar[int] = LazyClassVar(lambda: int(DVFS._freq_file(0, 'cpuinfo_max_freq').read_text()))
+
+    # number of the consecutive `verify_freq()` that a core runs above its cap, after which it is reported
+    ABOVE_CAP_CHECKS: ClassVar[int] = 3
+
+    _freq_caps: ClassVar[Dict[int, int]] = dict()
+    # number of the consecutive `verify_freq()` that found each core above its cap
+    _above_cap: ClassVar[Dict[int, int]] = dict()
+    _domains: ClassVar[Dict[int, Tuple[int, ...]]] = dict()
+    _lock: ClassVar[threading.RLock] = threading.RLock()
 
     def __init__(self, group_name):
         self._group_name: str = group_name
-        self._cur_cgroup = CpuSet(self._group_name)
+        cpuset_type, _ = cgroup.backend()
+        self._cur_cgroup: CpuSet = cpuset_type(self._group_name)
 
     def set_freq_cgroup(self, target_freq: int):
         """
@@ -24,14 +49,151 @@ class DVFS:
         """
         DVFS.set_freq(target_freq, self._cur_cgroup.read_cpus())
 
+    @staticmethod
+    def _freq_file(core: int, file_name: str) -> Path:
+        return DVFS.CPU_PATH / f'cpu{core}' / 'cpufreq' / file_name
+
+    @staticmethod
+    def domain_of(core: int) -> Tuple[int, ...]:
+        """
+        :param core:
+        :return: sorted ids of the cores that share the frequency domain with `core` (including itself)
+        """
+        domain = DVFS._domains.get(core)
+
+        if domain is None:
+            try:
+                # e.g. `0 1 2 3`
+                domain = tuple(sorted(map(int, DVFS._freq_file(core, 'related_cpus').read_text().split())))
+            except (OSError, ValueError):
+                domain = tuple()
+
+            if core not in domain:
+                domain = (core,)
+
+            for member in domain:
+                DVFS._domains[member] = domain
+
+        return domain
+
+    @staticmethod
+    def freq_cap(core: int) -> int:
+        """
+        :param core:
+        :return: the applied max freq. of `core`. sysfs is read only when the core has never been seen
+        """
+        with DVFS._lock:
+            freq = DVFS._freq_caps.get(core)
+
+            if freq is None:
+                freq = DVFS.read_max_freq(core)
+                DVFS._freq_caps[core] = freq
+
+            return freq
+
     @staticmethod
     def set_freq(freq: int, cores: Iterable[int]) -> None:
         """
-        Set the freq. to the specified cores
+        Set the freq. to the specified cores.
+        The cores that already have `freq` are skipped, and the rest are written once per frequency domain.
+        Inside of a `PrivilegedWriter.batch()`, the writes are issued in parallel when the batch is flushed.
         :param freq: freq. to set
         :param cores:
         :return:
         """
-        for core in cores:
-            subprocess.run(args=('sudo', 'tee', f'/sys/devices/system/cpu/cpu{core}/cpufreq/scaling_max_freq'),
-                           check=True, input=f'{freq}\n', encoding='ASCII', stdout=subprocess.DEVNULL)
+        writer = PrivilegedWriter.instance()
+
+        with DVFS._lock:
+            targets = dict()
+            for core in cores:
+                if DVFS._freq_caps.get(core) == freq:
+                    continue
+                domain = DVFS.domain_of(core)
+                targets[domain[0]] = domain
+
+            if not targets:
+                return
+
+            # the table is updated before the batch is flushed, so the same domain is written once per batch.
+            # it is invalidated if the flush fails
+            updated = tuple(member for domain in targets.values() for member in domain)
+            for member in updated:
+                DVFS._freq_caps[member] = freq
+
+        try:
+            with writer.batch():
+                for leader in targets:
+                    writer.write(str(DVFS._freq_file(leader, 'scaling_max_freq')), f'{freq}\n')
+        except Exception:
+            DVFS.invalidate(updated)
+            raise
+
+    @staticmethod
+    def invalidate(cores: Optional[Iterable[int]] = None) -> None:
+        """
+        Forget the applied freq. of the given cores (all cores by default), so they are read from sysfs next time
+        :param cores:
+        """
+        with DVFS._lock:
+            if cores is None:
+                DVFS._freq_caps.clear()
+            else:
+                for core in cores:
+                    DVFS._freq_caps.pop(core, None)
+
+    @staticmethod
+    def verify_freq(cores: Optional[Iterable[int]] = None) -> Dict[int, int]:
+        """
+        Check that the caps of the given cores (all known cores by default) are in effect.
+        The caps that drifted are replaced with the value read from sysfs.
+        A core whose `scaling_cur_freq` stays above its cap for `ABOVE_CAP_CHECKS` checks is reported with a warning,
+        e.g. when the driver ignores the cap.
+        :param cores:
+        :return: the drifted cores and their actual max freq.
+        """
+        logger = logging.getLogger(__name__)
+        drifted = dict()
+
+        with DVFS._lock:
+            for core in tuple(DVFS._freq_caps) if cores is None else cores:
+                freq = DVFS.read_max_freq(core)
+                if DVFS._freq_caps.get(core, freq) != freq:
+                    drifted[core] = freq
+                DVFS._freq_caps[core] = freq
+
+                try:
+                    cur_freq = DVFS.read_cur_freq(core)
+                except OSError:
+                    continue
+
+                # the governor takes some time to lower the freq. so only the one that persists is reported
+                if cur_freq <= freq:
+                    DVFS._above_cap.pop(core, None)
+                    continue
+
+                checks = DVFS._above_cap.get(core, 0) + 1
+                DVFS._above_cap[core] = checks
+                if checks == DVFS.ABOVE_CAP_CHECKS:
+                    logger.warning(f'current freq. of core {core} ({cur_freq}) stays higher than its cap ({freq})')
+                else:
+                    logger.debug(f'current freq. of core {core} ({cur_freq}) is higher than its cap ({freq})')
+
+        return drifted
+
+    @staticmethod
+    def read_max_freq(core: int) -> int:
+        """
+        Read the current max freq. of the specified core
+        :param core:
+        :return: max freq. of `core`
+        """
+        return int(DVFS._freq_file(core, 'scaling_max_freq').read_text())
+
+    @staticmethod
+    def read_cur_freq(core: int) -> int:
+        """
+        Read the current freq. of the specified core
+        :param core:
+        :return: current freq. of `core`
+        """
+        return int(DVFS._freq_file(core, 'scaling_cur_freq').read_text())
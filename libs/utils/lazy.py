@@ -0,0 +1,71 @@
+# coding: UTF-8
+
+import threading
+from typing import Any, Callable, Dict, Generic, Iterator, Mapping, Optional, TypeVar
+
+_T = TypeVar('_T')
+_K = TypeVar('_K')
+_V = TypeVar('_V')
+
+
+class LazyClassVar(Generic[_T]):
+    """
+    Class attribute that computed on the first access and cached afterwards.
+    Used for the constants that read from sysfs, so importing a module does not touch the hardware.
+    """
+
+    def __init__(self, loader: Callable[[], _T]) -> None:
+        self._loader = loader
+        self._value: Optional[_T] = None
+        self._loaded: bool = False
+        self._lock = threading.Lock()
+
+    def __get__(self, instance: Any, owner: type) -> _T:
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    self._value = self._loader()
+                    self._loaded = True
+
+        return self._value
+
+    def reset(self) -> None:
+        """Forget the cached value, so it is computed again on the next access"""
+        with self._lock:
+            self._value = None
+            self._loaded = False
+
+
+class LazyMapping(Mapping, Generic[_K, _V]):
+    """Read-only mapping that built by `loader` on the first access"""
+
+    def __init__(self, loader: Callable[[], Dict[_K, _V]]) -> None:
+        self._loader = loader
+        self._data: Optional[Dict[_K, _V]] = None
+        self._lock = threading.Lock()
+
+    @property
+    def _loaded(self) -> Dict[_K, _V]:
+        if self._data is None:
+            with self._lock:
+                if self._data is None:
+                    self._data = self._loader()
+
+        return self._data
+
+    def __getitem__(self, key: _K) -> _V:
+        return self._loaded[key]
+
+    def __iter__(self) -> Iterator[_K]:
+        return iter(self._loaded)
+
+    def __len__(self) -> int:
+        return len(self._loaded)
+
+    def __repr__(self) -> str:
+        return repr(self._loaded)
+
+    def reset(self) -> None:
+        """Forget the built mapping, so it is built again on the next access"""
+        with self._lock:
+            self._data = None
@@ -3,9 +3,11 @@
 from pathlib import Path
 from typing import Dict, Mapping, Set
 
+from . import sysfs
 from .hyphen import convert_to_set
+from .lazy import LazyMapping
 
-_BASE_PATH: Path = Path('/sys/devices/system/node')
+_BASE_PATH: Path = sysfs.path('/sys/devices/system/node')
 
 
 def get_mem_topo() -> Set[int]:
@@ -54,5 +56,6 @@ def _core_to_node() -> Dict[int, int]:
     return ret_dict
 
 
-node_to_core: Mapping[int, Set[int]] = _node_to_core()  # key: socket id, value: corresponding core ids
-core_to_node: Mapping[int, int] = _core_to_node()  # key: core id, value: corresponding socket id
+# built on the first access
+node_to_core: Mapping[int, Set[int]] = LazyMapping(_node_to_core)  # key: socket id, value: corresponding core ids
+core_to_node: Mapping[int, int] = LazyMapping(_core_to_node)  # key: core id, value: corresponding socket id
@@ -0,0 +1,193 @@
+# coding: UTF-8
+
+"""
+Minimal `perf_event_open(2)` binding through ctypes, for counting (not sampling) groups of events.
+
+A group is read with a single `read(2)` of its leader (`PERF_FORMAT_GROUP`),
+and the values are scaled by `time_enabled / time_running` when the PMU multiplexed the group.
+"""
+
+import ctypes
+import errno
+import fcntl
+import os
+import platform
+import struct
+from typing import ClassVar, Dict, List, Optional, Sequence, Tuple
+
+# perf_type_id
+TYPE_HARDWARE = 0
+TYPE_SOFTWARE = 1
+TYPE_HW_CACHE = 3
+TYPE_RAW = 4
+
+# perf_hw_id
+HW_CPU_CYCLES = 0
+HW_INSTRUCTIONS = 1
+HW_CACHE_MISSES = 3
+HW_STALLED_CYCLES_BACKEND = 8
+HW_REF_CPU_CYCLES = 9
+
+# perf_sw_ids
+SW_CPU_CLOCK = 0
+SW_TASK_CLOCK = 1
+
+# perf_event_read_format
+_FORMAT_TOTAL_TIME_ENABLED = 1 << 0
+_FORMAT_TOTAL_TIME_RUNNING = 1 << 1
+_FORMAT_GROUP = 1 << 3
+
+# bits of the flags of `perf_event_attr`
+_ATTR_DISABLED = 1 << 0
+_ATTR_INHERIT = 1 << 1
+_ATTR_EXCLUDE_HV = 1 << 6
+
+# flags of `perf_event_open(2)`
+_FLAG_FD_CLOEXEC = 1 << 3
+_FLAG_PID_CGROUP = 1 << 2
+
+_IOC_ENABLE = 0x2400
+_IOC_DISABLE = 0x2401
+_IOC_FLAG_GROUP = 1
+
+_SYSCALL_NR: Dict[str, int] = {'x86_64': 298, 'aarch64': 241, 'ppc64le': 319}
+
+Event = Tuple[int, int]  # (type, config)
+
+
+class PerfEventAttr(ctypes.Structure):
+    # PERF_ATTR_SIZE_VER5
+    _fields_ = [
+        ('type', ctypes.c_uint32),
+        ('size', ctypes.c_uint32),
+        ('config', ctypes.c_uint64),
+        ('sample_period', ctypes.c_uint64),
+        ('sample_type', ctypes.c_uint64),
+        ('read_format', ctypes.c_uint64),
+        ('flags', ctypes.c_uint64),
+        ('wakeup_events', ctypes.c_uint32),
+        ('bp_type', ctypes.c_uint32),
+        ('config1', ctypes.c_uint64),
+        ('config2', ctypes.c_uint64),
+        ('branch_sample_type', ctypes.c_uint64),
+        ('sample_regs_user', ctypes.c_uint64),
+        ('sample_stack_user', ctypes.c_uint32),
+        ('clockid', ctypes.c_int32),
+        ('sample_regs_intr', ctypes.c_uint64),
+        ('aux_watermark', ctypes.c_uint32),
+        ('sample_max_stack', ctypes.c_uint16),
+        ('reserved_2', ctypes.c_uint16),
+    ]
+
+
+_libc: Optional[ctypes.CDLL] = None
+
+
+def perf_event_open(attr: PerfEventAttr, pid: int, cpu: int, group_fd: int, flags: int) -> int:
+    """
+    :return: file descriptor of the opened event
+    :raises OSError: if the event can not be opened (e.g. `ENOENT` for an event that the PMU does not support)
+    """
+    global _libc
+
+    syscall_nr = _SYSCALL_NR.get(platform.machine())
+    if syscall_nr is None:
+        raise OSError(errno.ENOSYS, f'perf_event_open is not supported on {platform.machine()}')
+
+    if _libc is None:
+        _libc = ctypes.CDLL(None, use_errno=True)
+
+    fd = _libc.syscall(syscall_nr, ctypes.byref(attr), pid, cpu, group_fd, flags | _FLAG_FD_CLOEXEC)
+    if fd < 0:
+        err = ctypes.get_errno()
+        raise OSError(err, os.strerror(err))
+
+    return fd
+
+
+class PerfEventGroup:
+    """
+    Counting events that are scheduled on the PMU together, so their ratios (e.g. IPC) are consistent.
+
+    The group counts either a task and its children created afterwards (`pid`), or all tasks of a cgroup on a CPU
+    (`cgroup_fd` and `cpu`). The events after the leader are optional: the ones that the PMU does not support
+    are left out and read as 0. The group is created disabled.
+    """
+
+    _HEADER: ClassVar[struct.Struct] = struct.Struct('=3Q')
+
+    def __init__(self, events: Sequence[Event], pid: int = -1, cpu: int = -1, cgroup_fd: int = -1) -> None:
+        """
+        :param events: (type, config) of the events. the first one is the leader, which must be supported
+        :param pid: the task to count. ignored if `cgroup_fd` is given
+        :param cpu: the CPU to count on. -1 for any CPU
+        :param cgroup_fd: file descriptor of the cgroup directory (perf_event controller) to count
+        """
+        if cgroup_fd >= 0:
+            target, flags = cgroup_fd, _FLAG_PID_CGROUP
+        else:
+            target, flags = pid, 0
+
+        self._fds: List[int] = list()
+        # index of each opened event in `events`
+        self._indices: List[int] = list()
+        self._num_events = len(events)
+
+        try:
+            for idx, (event_type, config) in enumerate(events):
+                attr = PerfEventAttr()
+                attr.type = event_type
+                attr.size = ctypes.sizeof(PerfEventAttr)
+                attr.config = config
+                attr.read_format = _FORMAT_GROUP | _FORMAT_TOTAL_TIME_ENABLED | _FORMAT_TOTAL_TIME_RUNNING
+                attr.flags = _ATTR_EXCLUDE_HV | (_ATTR_INHERIT if cgroup_fd < 0 else 0)
+
+                if idx == 0:
+                    attr.flags |= _ATTR_DISABLED
+                    self._fds.append(perf_event_open(attr, target, cpu, -1, flags))
+                    self._indices.append(idx)
+                    continue
+
+                try:
+                    self._fds.append(perf_event_open(attr, target, cpu, self._fds[0], flags))
+                    self._indices.append(idx)
+                except OSError as e:
+                    if e.errno not in (errno.ENOENT, errno.EOPNOTSUPP, errno.EINVAL):
+                        raise
+        except OSError:
+            self.close()
+            raise
+
+        self._read_size = self._HEADER.size + 8 * len(self._fds)
+        self._values = struct.Struct(f'={len(self._fds)}Q')
+
+    @property
+    def num_opened(self) -> int:
+        return len(self._fds)
+
+    def enable(self) -> None:
+        fcntl.ioctl(self._fds[0], _IOC_ENABLE, _IOC_FLAG_GROUP)
+
+    def disable(self) -> None:
+        fcntl.ioctl(self._fds[0], _IOC_DISABLE, _IOC_FLAG_GROUP)
+
+    def read(self) -> List[float]:
+        """
+        :return: the accumulated count of each event in the order of `events`, scaled for multiplexing
+        """
+        buf = os.read(self._fds[0], self._read_size)
+        _, time_enabled, time_running = self._HEADER.unpack_from(buf)
+        counts = self._values.unpack_from(buf, self._HEADER.size)
+
+        scale = time_enabled / time_running if time_running > 0 else 0.0
+
+        ret = [0.0] * self._num_events
+        for idx, count in zip(self._indices, counts):
+            ret[idx] = count * scale
+        return ret
+
+    def close(self) -> None:
+        # the siblings first, then the leader
+        for fd in reversed(self._fds):
+            os.close(fd)
+        self._fds.clear()
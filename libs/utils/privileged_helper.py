@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+# coding: UTF-8
+
+"""
+Long-lived privileged helper that applies batched writes to resctrl and cpufreq files.
+
+It is started once by `PrivilegedWriter` (usually through `sudo`) and talks over its stdin/stdout.
+Every request is a single line holding a JSON list of `[path, content]` pairs.
+The reply is a single line holding a JSON list with one entry per pair:
+`0` on success or `[errno, message]` on failure.
+The cpufreq writes of a request are independent of each other, so they are issued in parallel.
+
+This file must not import anything outside of the standard library, because it runs as a standalone script.
+"""
+
+import errno
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, ClassVar, Dict, FrozenSet, List, Optional, Sequence, Tuple, Union
+
+Result = Union[int, Tuple[int, str]]
+WriteObserver = Callable[[str, float], None]
+
+
+class Applier:
+    ALLOWED_PREFIXES: ClassVar[Tuple[str, ...]] = ('/sys/fs/resctrl/', '/sys/devices/system/cpu/')
+    # the only files that can be written under the allowed directories
+    ALLOWED_FILES: ClassVar[FrozenSet[str]] = frozenset(('schemata', 'tasks', 'scaling_max_freq'))
+
+    def __init__(self, allowed_prefixes: Optional[Tuple[str, ...]] = None, truncate: bool = False,
+                 observer: Optional[WriteObserver] = None, max_workers: int = 8) -> None:
+        """
+        :param allowed_prefixes: only the files under these directories can be written
+        :param truncate: truncate the file after each write, and merge the lines of a `schemata` file like resctrl.
+                         used for regular files that emulate the kernel interfaces
+        :param observer: called with the path and the latency (sec) of every write
+        :param max_workers: max number of the writes that issued in parallel
+        """
+        allowed_prefixes = self.ALLOWED_PREFIXES if allowed_prefixes is None else allowed_prefixes
+        # the written paths are compared after resolving their symlinks, so are the prefixes
+        self._allowed_prefixes = tuple(os.path.join(os.path.realpath(prefix), '') for prefix in allowed_prefixes)
+        self._truncate = truncate
+        self._observer = observer
+        self._fds: Dict[str, int] = dict()
+        self._fd_lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers)
+
+    def _fd_of(self, path: str) -> int:
+        """
+        :raises PermissionError: if `path` resolves to a file out of the allowed directories, or to a file that is
+                                 not one of `ALLOWED_FILES` (e.g. `cpu1/online` or `smt/control`)
+        """
+        with self._fd_lock:
+            fd = self._fds.get(path)
+
+            if fd is None:
+                # symlinks under sysfs (e.g. `cpu0/subsystem` or `cpu0/node0`) lead out of the allowed directories,
+                # so the check is done on the resolved path, and the path is not followed again on the open
+                real_path = os.path.realpath(path)
+                if not real_path.startswith(self._allowed_prefixes) or \
+                        os.path.basename(real_path) not in self.ALLOWED_FILES:
+                    raise PermissionError(errno.EPERM, f'{path} is not allowed')
+
+                # the emulated files are read back to merge the writes (see `_merge_schemata()`)
+                mode = os.O_RDWR if self._truncate else os.O_WRONLY
+                fd = os.open(real_path, mode | os.O_CLOEXEC | os.O_NOFOLLOW)
+                self._fds[path] = fd
+
+            return fd
+
+    def apply(self, path: str, content: str) -> Result:
+        """Write `content` to `path` with a single `pwrite(2)` on a cached file descriptor"""
+        start = time.perf_counter()
+
+        try:
+            data = content.encode('ASCII')
+            fd = self._fd_of(path)
+            if self._truncate and os.path.basename(path) == 'schemata':
+                data = self._merge_schemata(os.pread(fd, 4096, 0), data)
+            os.pwrite(fd, data, 0)
+            if self._truncate:
+                os.ftruncate(fd, len(data))
+
+        except OSError as e:
+            # the file may belong to a removed group. reopen it next time
+            with self._fd_lock:
+                fd = self._fds.pop(path, None)
+            if fd is not None:
+                os.close(fd)
+            return e.errno, e.strerror
+
+        if self._observer is not None:
+            self._observer(path, time.perf_counter() - start)
+        return 0
+
+    @staticmethod
+    def _merge_schemata(current: bytes, written: bytes) -> bytes:
+        """
+        resctrl updates only the resources and the domains that are written (e.g. `MB:1=50` keeps the `L3` line and
+        the other sockets), so does the emulated `schemata` file
+        :return: the content of the file after `written` is written on `current`
+        """
+        # resource -> domain -> value. e.g. {b'L3': {b'0': b'fffff'}}
+        schemata: Dict[bytes, Dict[bytes, bytes]] = dict()
+
+        for content in (current, written):
+            for line in content.split():
+                resource, _, domains = line.partition(b':')
+                schemata.setdefault(resource, dict()).update(domain.split(b'=', 1)
+                                                             for domain in domains.split(b';') if domain)
+
+        return b''.join(resource + b':' + b';'.join(domain + b'=' + value for domain, value in domains.items()) + b'\n'
+                        for resource, domains in schemata.items())
+
+    def apply_all(self, writes: Sequence[Tuple[str, str]]) -> List[Result]:
+        """
+        Apply the writes in order, except the cpufreq ones that are issued in parallel.
+        """
+        parallel = [idx for idx, (path, _) in enumerate(writes) if '/cpufreq/' in path]
+        if len(parallel) < 2:
+            return [self.apply(path, content) for path, content in writes]
+
+        futures = dict((idx, self._pool.submit(self.apply, *writes[idx])) for idx in parallel)
+        results = [self.apply(path, content) if idx not in futures else None
+                   for idx, (path, content) in enumerate(writes)]
+
+        for idx, future in futures.items():
+            results[idx] = future.result()
+
+        return results
+
+    def close(self) -> None:
+        self._pool.shutdown()
+
+        with self._fd_lock:
+            for fd in self._fds.values():
+                os.close(fd)
+            self._fds.clear()
+
+
+def main() -> None:
+    applier = Applier()
+
+    for line in sys.stdin:
+        results = applier.apply_all(json.loads(line))
+        sys.stdout.write(json.dumps(results) + '\n')
+        sys.stdout.flush()
+
+    applier.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,180 @@
+# coding: UTF-8
+
+import atexit
+import errno
+import json
+import logging
+import os
+import subprocess
+import sys
+import threading
+from contextlib import contextmanager
+from typing import ClassVar, Iterator, List, Optional, Tuple
+
+from . import sysfs
+from .privileged_helper import Applier, Result
+
+
+class PrivilegedWriter:
+    """
+    Client of the long-lived privileged helper (`privileged_helper.py`).
+
+    Writes are queued per thread while a `batch()` is open and are shipped to the helper in one round trip
+    when the outermost batch is closed. Outside of a batch, every write is flushed immediately.
+    If the controller already runs as root or on an emulated tree (see `sysfs`), the writes are applied in-process
+    without the helper.
+
+    The batches of different threads are applied concurrently: each one takes an idle helper,
+    and up to `MAX_HELPERS` helpers are spawned on demand.
+    """
+    _HELPER_PATH: ClassVar[str] = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'privileged_helper.py')
+    _instance: ClassVar[Optional['PrivilegedWriter']] = None
+    _instance_lock: ClassVar[threading.Lock] = threading.Lock()
+
+    # max number of the helpers, i.e. of the batches that are applied concurrently
+    MAX_HELPERS: ClassVar[int] = 4
+
+    def __init__(self) -> None:
+        self._idle_helpers: List[subprocess.Popen] = list()
+        self._num_helpers: int = 0
+        self._helper_cond = threading.Condition()
+        self._local_applier: Optional[Applier] = None
+
+        if sysfs.is_emulated():
+            self._local_applier = Applier(tuple(str(sysfs.path(p)) + '/' for p in Applier.ALLOWED_PREFIXES),
+                                          truncate=True, observer=sysfs.notify_write)
+        elif os.geteuid() == 0:
+            self._local_applier = Applier(observer=sysfs.notify_write)
+        self._thread_state = threading.local()
+
+    @classmethod
+    def instance(cls) -> 'PrivilegedWriter':
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = PrivilegedWriter()
+                atexit.register(cls._instance.close)
+            return cls._instance
+
+    @property
+    def _pending(self) -> List[Tuple[str, str]]:
+        if not hasattr(self._thread_state, 'pending'):
+            self._thread_state.pending = list()
+            self._thread_state.depth = 0
+        return self._thread_state.pending
+
+    def write(self, path: str, content: str) -> None:
+        self._pending.append((path, content))
+
+        if self._thread_state.depth == 0:
+            self.flush()
+
+    @contextmanager
+    def batch(self) -> Iterator['PrivilegedWriter']:
+        """Defer the writes of the current thread until the outermost batch is closed"""
+        self._pending  # initialize the thread-local state
+        self._thread_state.depth += 1
+
+        try:
+            yield self
+        finally:
+            self._thread_state.depth -= 1
+
+            if self._thread_state.depth == 0:
+                self.flush()
+
+    def flush(self) -> None:
+        """
+        Apply all queued writes of the current thread.
+        Every write is attempted even if some of them fail, and the first failure is raised afterwards.
+
+        :raises ProcessLookupError: when the target group or task of a write has vanished
+        :raises OSError: when any other write fails
+        """
+        writes = self._pending
+        if not writes:
+            return
+        self._thread_state.pending = list()
+
+        results = self._apply(writes)
+
+        for (path, content), result in zip(writes, results):
+            if result == 0:
+                continue
+
+            err_no, message = result
+            if err_no in (errno.ENOENT, errno.ESRCH):
+                raise ProcessLookupError(err_no, message, path)
+            raise OSError(err_no, f'{message} (while writing {content!r})', path)
+
+    def _apply(self, writes: List[Tuple[str, str]]) -> List[Result]:
+        # `Applier` is thread-safe, so the batches of the threads are applied concurrently in-process
+        if self._local_applier is not None:
+            return self._local_applier.apply_all(writes)
+
+        request = json.dumps(writes) + '\n'
+        proc = self._acquire_helper()
+
+        try:
+            for retry in (False, True):
+                if proc is None or proc.poll() is not None:
+                    proc = self._spawn_helper()
+
+                try:
+                    proc.stdin.write(request)
+                    proc.stdin.flush()
+                    response = proc.stdout.readline()
+                except BrokenPipeError:
+                    response = ''
+
+                if response:
+                    return [r if r == 0 else tuple(r) for r in json.loads(response)]
+
+                logger = logging.getLogger(__name__)
+                logger.warning(f'privileged helper is terminated (exit code: {proc.poll()})')
+                proc = None
+
+                if retry:
+                    raise OSError(errno.EPIPE, 'privileged helper is not responding')
+
+        finally:
+            self._release_helper(proc)
+
+    def _acquire_helper(self) -> Optional[subprocess.Popen]:
+        """
+        Wait until a helper is idle or another one can be spawned
+        :return: the idle helper or `None` if the caller has to spawn one
+        """
+        with self._helper_cond:
+            while not self._idle_helpers and self._num_helpers >= self.MAX_HELPERS:
+                self._helper_cond.wait()
+
+            if self._idle_helpers:
+                return self._idle_helpers.pop()
+
+            self._num_helpers += 1
+            return None
+
+    def _release_helper(self, proc: Optional[subprocess.Popen]) -> None:
+        with self._helper_cond:
+            if proc is None or proc.poll() is not None:
+                self._num_helpers -= 1
+            else:
+                self._idle_helpers.append(proc)
+
+            self._helper_cond.notify()
+
+    def _spawn_helper(self) -> subprocess.Popen:
+        return subprocess.Popen(args=('sudo', '-n', sys.executable, self._HELPER_PATH),
+                                stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                encoding='ASCII', bufsize=1)
+
+    def close(self) -> None:
+        if self._local_applier is not None:
+            self._local_applier.close()
+
+        with self._helper_cond:
+            for proc in self._idle_helpers:
+                proc.stdin.close()
+                proc.wait()
+            self._num_helpers -= len(self._idle_helpers)
+            self._idle_helpers.clear()
@@ -0,0 +1,41 @@
+# coding: UTF-8
+
+import threading
+from typing import Generic, Hashable, Optional, Set, TypeVar
+
+T = TypeVar('T', bound=Hashable)
+
+
+class Readiness(Generic[T]):
+    """
+    Set of the keys (e.g. the isolation groups) that became ready to be handled.
+    The keys are signalled from other threads (e.g. on the arrival of a metric),
+    and the waiter wakes up as soon as any of them is ready and takes all the ready ones at once.
+    A key that is signalled again before it is taken is handled once.
+    """
+
+    def __init__(self) -> None:
+        self._cond = threading.Condition()
+        self._ready: Set[T] = set()
+
+    def signal(self, key: T) -> None:
+        with self._cond:
+            self._ready.add(key)
+            self._cond.notify()
+
+    def discard(self, key: T) -> None:
+        with self._cond:
+            self._ready.discard(key)
+
+    def wait(self, timeout: Optional[float] = None) -> Set[T]:
+        """
+        Wait until any key is ready
+        :param timeout: max time (sec) to wait. `None` waits forever, 0 or negative does not wait
+        :return: the ready keys, which are not ready anymore. empty if it timed out
+        """
+        with self._cond:
+            if not self._ready and (timeout is None or timeout > 0):
+                self._cond.wait_for(lambda: self._ready, timeout)
+
+            ready, self._ready = self._ready, set()
+            return ready
@@ -3,7 +3,11 @@
 import re
 import subprocess
 from pathlib import Path
-from typing import ClassVar, List, Pattern, Tuple
+from typing import ClassVar, List, Optional, Pattern, Tuple
+
+from . import sysfs
+from .lazy import LazyClassVar
+from .privileged_writer import PrivilegedWriter
 
 
 def len_of_mask(mask: str) -> int:
@@ -20,17 +24,28 @@ def bits_to_mask(bits: int) -> str:
 
 
 class ResCtrl:
-    MOUNT_POINT: ClassVar[Path] = Path('/sys/fs/resctrl')
-    MAX_MASK: ClassVar[str] = Path('/sys/fs/resctrl/info/L3/cbm_mask').read_text(encoding='ASCII').strip()
-    MAX_BITS: ClassVar[int] = len_of_mask((MOUNT_POINT / 'info' / 'L3' / 'cbm_mask').read_text())
-    MIN_BITS: ClassVar[int] = int((MOUNT_POINT / 'info' / 'L3' / 'min_cbm_bits').read_text())
-    MIN_MASK: ClassVar[str] = bits_to_mask(MIN_BITS)
+    MOUNT_POINT: ClassVar[Path] = sysfs.path('/sys/fs/resctrl')
+    # read on the first access, so importing this module does not require resctrl
+    MAX_MASK: ClassVar[str] = LazyClassVar(
+            lambda: (ResCtrl.MOUNT_POINT / 'info' / 'L3' / 'cbm_mask').read_text(encoding='ASCII').strip())
+    MAX_BITS: ClassVar[int] = LazyClassVar(lambda: len_of_mask(ResCtrl.MAX_MASK))
+    MIN_BITS: ClassVar[int] = LazyClassVar(
+            lambda: int((ResCtrl.MOUNT_POINT / 'info' / 'L3' / 'min_cbm_bits').read_text()))
+    MIN_MASK: ClassVar[str] = LazyClassVar(lambda: bits_to_mask(ResCtrl.MIN_BITS))
     STEP: ClassVar[int] = 1
+    # memory bandwidth allocation (Intel MBA), in percentage of the max bandwidth
+    MAX_MB: ClassVar[int] = 100
+    MIN_MB: ClassVar[int] = LazyClassVar(
+            lambda: int((ResCtrl.MOUNT_POINT / 'info' / 'MB' / 'min_bandwidth').read_text()))
+    MB_STEP: ClassVar[int] = LazyClassVar(
+            lambda: int((ResCtrl.MOUNT_POINT / 'info' / 'MB' / 'bandwidth_gran').read_text()))
     _read_regex: ClassVar[Pattern] = re.compile(r'L3:((\d+=[0-9a-fA-F]+;?)*)', re.MULTILINE)
+    _read_mb_regex: ClassVar[Pattern] = re.compile(r'MB:((\d+=\d+;?)*)', re.MULTILINE)
 
     def __init__(self, group_name: str) -> None:
         self._group_name: str = group_name
         self._group_path: Path = ResCtrl.MOUNT_POINT / f'{group_name}'
+        self._mon_dirs: Optional[Tuple[Path, ...]] = None
 
     @property
     def group_name(self):
@@ -40,17 +55,66 @@ class ResCtrl:
     def group_name(self, new_name):
         self._group_name = new_name
         self._group_path: Path = ResCtrl.MOUNT_POINT / new_name
+        self._mon_dirs = None
 
     def add_task(self, pid: int) -> None:
-        subprocess.run(args=('sudo', 'tee', str(self._group_path / 'tasks')),
-                       input=f'{pid}\n', check=True, encoding='ASCII', stdout=subprocess.DEVNULL)
+        PrivilegedWriter.instance().write(str(self._group_path / 'tasks'), f'{pid}\n')
 
     def assign_llc(self, *masks: str) -> None:
         masks = (f'{i}={mask}' for i, mask in enumerate(masks))
         mask = ';'.join(masks)
-        # subprocess.check_call('ls -ll /sys/fs/resctrl/', shell=True)
-        subprocess.run(args=('sudo', 'tee', str(self._group_path / 'schemata')),
-                       input=f'L3:{mask}\n', check=True, encoding='ASCII', stdout=subprocess.DEVNULL)
+        PrivilegedWriter.instance().write(str(self._group_path / 'schemata'), f'L3:{mask}\n')
+
+    def assign_mb(self, *percents: int) -> None:
+        """
+        Throttle the memory bandwidth of this group
+        :param percents: bandwidth of each socket in percentage of the max bandwidth
+        """
+        percents = (f'{i}={percent}' for i, percent in enumerate(percents))
+        mb = ';'.join(percents)
+        PrivilegedWriter.instance().write(str(self._group_path / 'schemata'), f'MB:{mb}\n')
+
+    def get_mb(self) -> List[int]:
+        """
+        :return: the memory bandwidth (in percentage) of each socket, or an empty list if MBA is not supported
+        """
+        schemata = self._group_path / 'schemata'
+        if not schemata.is_file():
+            raise ProcessLookupError()
+
+        matched = ResCtrl._read_mb_regex.search(schemata.read_text(encoding='ASCII'))
+        if matched is None:
+            return list()
+
+        # example: [('0', '100'), ('1', '50')]
+        pairs: List[Tuple[int, int]] = sorted(tuple(map(int, pair.split('=')))
+                                              for pair in matched.group(1).split(';') if pair)
+        return [percent for socket, percent in pairs]
+
+    def read_mon_data(self) -> Tuple[int, int, int]:
+        """
+        Read the monitoring counters (Intel CMT/MBM) of this group, summed over all L3 domains (sockets)
+        :return: LLC occupancy (bytes), local and total memory traffic (bytes) since the group was created
+        """
+        if self._mon_dirs is None:
+            self._mon_dirs = tuple(sorted((self._group_path / 'mon_data').glob('mon_L3_*')))
+            if not self._mon_dirs:
+                self._mon_dirs = None
+                raise ProcessLookupError()
+
+        llc_occupancy = mbm_local = mbm_total = 0
+
+        try:
+            for mon_dir in self._mon_dirs:
+                # a counter that can not be read yet holds `Unavailable`, so `ValueError` is raised
+                llc_occupancy += int((mon_dir / 'llc_occupancy').read_text())
+                mbm_local += int((mon_dir / 'mbm_local_bytes').read_text())
+                mbm_total += int((mon_dir / 'mbm_total_bytes').read_text())
+        except FileNotFoundError as e:
+            self._mon_dirs = None
+            raise ProcessLookupError() from e
+
+        return llc_occupancy, mbm_local, mbm_total
 
     def read_assigned_llc(self) -> Tuple[int, ...]:
         schemata = self._group_path / 'schemata'
@@ -81,17 +145,19 @@ class ResCtrl:
 
     def get_llc_mask(self) -> List[str]:
         """
-        :return: `socket_masks` which is the elements of list in hex_str
+        :return: `socket_masks` which is the elements of list in hex_str, or an empty list if CAT is not supported
         """
-        proc = subprocess.Popen(['cat', f'{ResCtrl.MOUNT_POINT}/{self._group_name}/schemata'],
-                                stdout=subprocess.PIPE)
-        line = proc.communicate()[0].decode().lstrip()
-        striped_schema_line = line.lstrip('L3:').rstrip('\n').split(';')
-        socket_masks = list()
-        for i, item in enumerate(striped_schema_line):
-            mask = item.lstrip(f'{i}=')
-            socket_masks.append(mask)
-        return socket_masks
+        schemata = self._group_path / 'schemata'
+        if not schemata.is_file():
+            raise ProcessLookupError()
+
+        matched = ResCtrl._read_regex.search(schemata.read_text(encoding='ASCII'))
+        if matched is None:
+            return list()
+
+        # example: [('0', '00fff'), ('1', 'fff00')]
+        pairs: List[Tuple[str, str]] = sorted(tuple(pair.split('=')) for pair in matched.group(1).split(';') if pair)
+        return [mask for socket, mask in pairs]
 
     @staticmethod
     def get_llc_bits_from_mask(input_list: List[str]) -> List[int]:
@@ -0,0 +1,73 @@
+# coding: UTF-8
+
+"""
+Root of the kernel interfaces (sysfs, cgroupfs, resctrl, procfs) that the controller reads and writes.
+
+The root is `/` by default and can be replaced by the `ISO_SCHED_SYSFS_ROOT` environment variable or `set_root()`
+to run the controller on an emulated tree (see `sysfs_emulator.py`).
+It must be configured before importing the other modules of `libs`.
+"""
+
+import os
+import time
+from pathlib import Path
+from typing import Callable, List
+
+WriteObserver = Callable[[str, float], None]
+
+_DEFAULT_ROOT: Path = Path('/')
+
+_root: Path = Path(os.environ.get('ISO_SCHED_SYSFS_ROOT', str(_DEFAULT_ROOT)))
+_write_observers: List[WriteObserver] = list()
+
+
+def root() -> Path:
+    return _root
+
+
+def set_root(new_root: str) -> None:
+    global _root
+    _root = Path(new_root)
+
+
+def is_emulated() -> bool:
+    return _root != _DEFAULT_ROOT
+
+
+def path(abs_path: str) -> Path:
+    """
+    :param abs_path: absolute path on a real system. e.g. `/sys/fs/resctrl`
+    :return: the corresponding path under the current root
+    """
+    return _root / abs_path.lstrip('/')
+
+
+def add_write_observer(observer: WriteObserver) -> None:
+    """
+    :param observer: called with the path and the latency (sec) of every write to the kernel interfaces
+    """
+    _write_observers.append(observer)
+
+
+def remove_write_observer(observer: WriteObserver) -> None:
+    _write_observers.remove(observer)
+
+
+def notify_write(file_path: str, latency: float) -> None:
+    for observer in _write_observers:
+        observer(file_path, latency)
+
+
+def pwrite(fd: int, data: bytes, file_path: str) -> None:
+    """
+    Write `data` to the control file with a single `pwrite(2)` at offset 0.
+    Regular files of an emulated tree are truncated afterwards to behave like the kernel interfaces.
+    """
+    start = time.perf_counter()
+
+    os.pwrite(fd, data, 0)
+    if _root != _DEFAULT_ROOT:
+        os.ftruncate(fd, len(data))
+
+    if _write_observers:
+        notify_write(file_path, time.perf_counter() - start)
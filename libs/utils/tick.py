@@ -0,0 +1,25 @@
+# coding: UTF-8
+
+"""
+Scheduling tick of the controller.
+
+The values derived from the metrics of a workload (the current metric and its `MetricDiff`s) are memoized for a tick,
+so they are computed once per workload no matter how many isolators and policies ask for them in the tick,
+and every decision of a tick sees the same metrics. The controller advances the tick at the start of each tick.
+"""
+
+_current: int = 0
+
+
+def current() -> int:
+    return _current
+
+
+def advance() -> int:
+    """
+    Start a new tick, which invalidates the memoized values of the previous one
+    :return: the new tick
+    """
+    global _current
+    _current += 1
+    return _current
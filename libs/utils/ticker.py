@@ -0,0 +1,115 @@
+# coding: UTF-8
+
+import logging
+import math
+import time
+from typing import ClassVar, Optional
+
+
+class Ticker:
+    """
+    Deadline-driven scheduler of a periodic loop on the monotonic clock.
+
+    The deadlines are on a fixed grid (`start + k * interval`), so the period does not stretch with the time that
+    the work of a tick takes. `wait()` sleeps until the next deadline.
+    If the work overran the deadline, the tick is late and runs immediately. Then the missed deadlines are either
+    skipped (the grid moves to the first deadline after now) or caught up by running the ticks back to back,
+    at most `max_catch_up` of them.
+    """
+    # lateness (sec) that is the timer slack of a wakeup at the deadline rather than an overrun
+    SLACK: ClassVar[float] = 0.001
+
+    def __init__(self, interval: float, catch_up: bool = False, max_catch_up: int = 5) -> None:
+        """
+        :param interval: period (sec)
+        :param catch_up: run the missed ticks back to back instead of skipping them
+        :param max_catch_up: max number of the missed ticks to catch up. the older ones are skipped
+        """
+        if interval <= 0:
+            raise ValueError(f'interval must be positive: {interval}')
+
+        self._interval = interval
+        self._catch_up = catch_up
+        self._max_catch_up = max_catch_up
+
+        self._deadline: Optional[float] = None
+
+        self._num_ticks: int = 0
+        self._num_overruns: int = 0
+        self._num_skipped: int = 0
+        self._max_lateness: float = 0.0
+
+    @property
+    def interval(self) -> float:
+        return self._interval
+
+    @property
+    def deadline(self) -> Optional[float]:
+        """deadline of the current tick on the grid. `None` before the first tick"""
+        return self._deadline
+
+    @property
+    def num_ticks(self) -> int:
+        return self._num_ticks
+
+    @property
+    def num_overruns(self) -> int:
+        """number of the ticks that started after their deadlines"""
+        return self._num_overruns
+
+    @property
+    def num_skipped(self) -> int:
+        """number of the deadlines that were skipped without a tick"""
+        return self._num_skipped
+
+    @property
+    def max_lateness(self) -> float:
+        """max delay (sec) of the start of a tick from its deadline"""
+        return self._max_lateness
+
+    def time_left(self) -> float:
+        """
+        :return: time (sec) until the deadline of the next tick. 0 or negative if it has passed
+        """
+        if self._deadline is None:
+            return 0.0
+        return self._deadline + self._interval - time.monotonic()
+
+    def wait(self) -> float:
+        """
+        Sleep until the deadline of the next tick
+        :return: how late (sec) the tick starts. 0 if it starts on time
+        """
+        now = time.monotonic()
+
+        if self._deadline is None:
+            self._deadline = now
+        else:
+            self._deadline += self._interval
+
+        lateness = now - self._deadline
+        self._num_ticks += 1
+
+        if lateness <= self.SLACK:
+            if lateness < 0:
+                time.sleep(-lateness)
+            return 0.0
+
+        self._num_overruns += 1
+        self._max_lateness = max(self._max_lateness, lateness)
+
+        # number of the deadlines after this one that have already passed
+        missed = math.floor(lateness / self._interval)
+        skipped = missed if not self._catch_up else max(0, missed - self._max_catch_up)
+        if skipped > 0:
+            self._deadline += skipped * self._interval
+            self._num_skipped += skipped
+
+        logger = logging.getLogger(__name__)
+        logger.debug(f'tick is {lateness * 1000:.1f} ms late. {skipped} ticks are skipped')
+
+        return lateness
+
+    def summary(self) -> str:
+        return f'{self._num_ticks} ticks, {self._num_overruns} overruns, {self._num_skipped} skipped, ' \
+            f'max lateness {self._max_lateness * 1000:.1f} ms'
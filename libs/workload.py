@@ -1,48 +1,109 @@
 # coding: UTF-8
 
-from collections import deque
+import functools
+import logging
+import time
 from itertools import chain
-from typing import Deque, Iterable, Optional, Set, Tuple
+from typing import Callable, ClassVar, Dict, Iterable, Mapping, Optional, Set, Tuple
 
 import psutil
 
 from .metric_container.basic_metric import BasicMetric, MetricDiff
-from .solorun_data.datas import data_map
-from .utils import DVFS, ResCtrl, numa_topology
-from .utils.cgroup import Cpu, CpuSet
+from .metric_container.metric_buffer import MetricBuffer
+from .metric_container.phase_detector import PhaseDetector
+from .metric_container.rdt_sample import RdtSample
+from .metric_container.streaming_stats import Estimator, MetricStats
+from .solorun_data.datas import solorun_profile
+from .solorun_data.profile_store import ProfileKey, ProfileStore
+from .utils import DVFS, ResCtrl, numa_topology, tick
+from .utils.actuator import Actuator
+from .utils import cgroup
+from .utils.cgroup import BaseCgroupV2, Cpu, CpuSet
 
 
 class Workload:
     """
     This class abstracts the process and contains the related metrics to represent its characteristics
     Controller schedules the groups of `Workload' instances to enforce their scheduling decisions
+
+    The controller is the only writer of the cgroups, resctrl groups and frequencies of a workload.
+    So their applied values are cached here, updated by every setter
+    and verified against the kernel every `CACHE_VERIFY_INTERVAL` seconds or after a failed write.
+    The setters stage the desired configurations to the `Actuator`, so inside of a transaction the getters return
+    the desired ones and the kernel is written only when the transaction is committed.
     """
+    CACHE_VERIFY_INTERVAL: ClassVar[float] = 5.0
+    # initial capacity of the metric buffer. resized to the `max_len` of `append_metrics()`
+    METRIC_BUF_SIZE: ClassVar[int] = 50
+    # how the current metric is estimated from the recent ones for the diffs from the solorun data
+    METRIC_ESTIMATOR: ClassVar[Estimator] = Estimator.EWMA
+    # number of the latest metrics of the windowed statistics (median, variance) and the smoothing factor of the EWMA
+    STATS_WINDOW: ClassVar[int] = 10
+    STATS_ALPHA: ClassVar[float] = 0.5
+    # confidence level of the margins of the diffs. the changes within the margins are not acted on. 0 to disable
+    DECISION_CONFIDENCE: ClassVar[float] = 0.95
 
     def __init__(self, name: str, wl_type: str, pid: int, perf_pid: int, perf_interval: int) -> None:
         self._name = name
         self._wl_type = wl_type
         self._pid = pid
-        self._metrics: Deque[BasicMetric] = deque()
+        self._metrics = MetricBuffer(self.METRIC_BUF_SIZE)
+        self._metric_stats = MetricStats(self.STATS_WINDOW, self.STATS_ALPHA)
+        self._phase_detector = PhaseDetector()
+        # `time.monotonic()` when the perf agent sent the latest metric
+        self._metrics_received_at: float = float('-inf')
+        # called with this workload from the ingestion thread after new metrics are appended
+        self._metric_listener: Optional[Callable[['Workload'], None]] = None
+        # the latest in-process resctrl monitoring sample
+        self._rdt_sample: Optional[RdtSample] = None
         self._perf_pid = perf_pid
         self._perf_interval = perf_interval
 
         self._proc_info = psutil.Process(pid)
-        self._perf_info = psutil.Process(perf_pid)
+        # the metrics of a workload without a perf agent (`perf_pid` is 0) are collected in-process
+        self._perf_info: Optional[psutil.Process] = psutil.Process(perf_pid) if perf_pid != 0 else None
 
-        self._cgroup_cpuset = CpuSet(self.group_name)
-        self._cgroup_cpu = Cpu(self.group_name)
+        cpuset_type, cpu_type = cgroup.backend()
+        self._cgroup_cpuset: CpuSet = cpuset_type(self.group_name)
+        self._cgroup_cpu: Cpu = cpu_type(self.group_name)
         self._resctrl = ResCtrl(self.group_name)
         self._dvfs = DVFS(self.group_name)
 
         # This variable is used to contain the recent avg. status
         self._avg_solorun_data: Optional[BasicMetric] = None
+        # the number of cores of the shipped profile in `_avg_solorun_data`. `None` if it is not a shipped one
+        self._shipped_profile_cores: Optional[int] = None
 
-        if wl_type == 'bg':
-            self._avg_solorun_data = data_map[name]
+        # the latest metric and its diffs (key: `core_norm`) memoized for the tick `_snapshot_tick`
+        self._snapshot_tick: int = -1
+        self._cur_metric: Optional[BasicMetric] = None
+        self._metric_diffs: Dict[float, MetricDiff] = dict()
 
         self._orig_bound_cores: Tuple[int, ...] = tuple(self._cgroup_cpuset.read_cpus())
         self._orig_bound_mems: Set[int] = self._cgroup_cpuset.read_mems()
 
+        # write-through cache of the applied configurations
+        self._bound_cores: Tuple[int, ...] = self._orig_bound_cores
+        self._bound_mems: Tuple[int, ...] = tuple(self._orig_bound_mems)
+        self._llc_masks: Optional[Tuple[str, ...]] = None
+        self._mb_percents: Optional[Tuple[int, ...]] = None
+        self._freq_caps: Dict[int, int] = dict()
+        self._cpu_quota: Optional[Tuple[int, int]] = None
+        self._cache_verified_at: float = time.monotonic()
+
+        # the setters stage the desired configurations to the actuator
+        self._actuator: Actuator = Actuator.instance()
+
+        # the profile of the same application in the same configuration is reused, so it is not profiled again
+        profile = ProfileStore.instance().get(self.profile_key)
+        if profile is not None:
+            logger = logging.getLogger(__name__)
+            logger.info(f'reusing the stored solorun profile of {self}')
+            self._avg_solorun_data = profile
+        elif wl_type == 'bg':
+            self._shipped_profile_cores = len(self._bound_cores)
+            self._avg_solorun_data = solorun_profile(name, self._shipped_profile_cores)
+
     def __repr__(self) -> str:
         return f'{self._name} (pid: {self._pid})'
 
@@ -78,16 +139,78 @@ class Workload:
         return self._wl_type
 
     @property
-    def metrics(self) -> Deque[BasicMetric]:
+    def metrics(self) -> MetricBuffer:
         return self._metrics
 
+    @property
+    def metrics_received_at(self) -> float:
+        return self._metrics_received_at
+
+    @metrics_received_at.setter
+    def metrics_received_at(self, timestamp: float) -> None:
+        self._metrics_received_at = timestamp
+
+    @property
+    def metric_listener(self) -> Optional[Callable[['Workload'], None]]:
+        return self._metric_listener
+
+    @metric_listener.setter
+    def metric_listener(self, listener: Optional[Callable[['Workload'], None]]) -> None:
+        self._metric_listener = listener
+
+    @property
+    def rdt_sample(self) -> Optional[RdtSample]:
+        return self._rdt_sample
+
+    @rdt_sample.setter
+    def rdt_sample(self, sample: RdtSample) -> None:
+        self._rdt_sample = sample
+
+    def append_metrics(self, metrics: Iterable[BasicMetric], max_len: int) -> None:
+        """
+        Append the metrics that received from the perf agent
+        :param metrics: the metrics in the order that they were sampled
+        :param max_len: max number of metrics to keep. the oldest ones are dropped
+        """
+        self._metrics_received_at = time.monotonic()
+
+        if self._metrics.capacity != max_len:
+            self._metrics.resize(max_len)
+
+        metrics = tuple(metrics)
+        self._add_metrics(metrics)
+
+        listener = self._metric_listener
+        if listener is not None and metrics:
+            listener(self)
+
+    def append_synthesized_metric(self, metric: BasicMetric) -> None:
+        """
+        Append a metric that is not from the perf agent (e.g. the latest one with the fresh resctrl samples while
+        the agent lags behind), so the statistics and the phase detector see it like the others.
+        `metrics_received_at` is not updated and the listener is not notified, because the agent sent nothing
+        """
+        self._add_metrics((metric,))
+
+    def _add_metrics(self, metrics: Tuple[BasicMetric, ...]) -> None:
+        self._metrics.extend(metrics)
+        for metric in metrics:
+            self._metric_stats.update(metric)
+            if self._phase_detector.update(metric):
+                logger = logging.getLogger(__name__)
+                logger.debug(f'phase change of {self} is detected on {self._phase_detector.changed_rate}')
+
     @property
     def bound_cores(self) -> Tuple[int, ...]:
-        return tuple(self._cgroup_cpuset.read_cpus())
+        self._verify_cache_if_expired()
+        return self._actuator.desired((self, 'cores'), self._bound_cores)
 
     @bound_cores.setter
     def bound_cores(self, core_ids: Iterable[int]):
-        self._cgroup_cpuset.assign_cpus(core_ids)
+        self._actuator.stage((self, 'cores'), tuple(sorted(frozenset(core_ids))), self._bound_cores,
+                             self._cgroup_cpuset.assign_cpus,
+                             functools.partial(setattr, self, '_bound_cores'),
+                             self.invalidate_cache)
 
     @property
     def orig_bound_cores(self) -> Tuple[int, ...]:
@@ -99,11 +222,15 @@ class Workload:
 
     @property
     def bound_mems(self) -> Tuple[int, ...]:
-        return tuple(self._cgroup_cpuset.read_mems())
+        self._verify_cache_if_expired()
+        return self._actuator.desired((self, 'mems'), self._bound_mems)
 
     @bound_mems.setter
     def bound_mems(self, affinity: Iterable[int]):
-        self._cgroup_cpuset.assign_mems(affinity)
+        self._actuator.stage((self, 'mems'), tuple(sorted(frozenset(affinity))), self._bound_mems,
+                             self._cgroup_cpuset.assign_mems,
+                             functools.partial(setattr, self, '_bound_mems'),
+                             self.invalidate_cache)
 
     @property
     def orig_bound_mems(self) -> Set[int]:
@@ -113,10 +240,137 @@ class Workload:
     def orig_bound_mems(self, orig_bound_mems: Set[int]) -> None:
         self._orig_bound_mems = orig_bound_mems
 
+    @property
+    def llc_masks(self) -> Optional[Tuple[str, ...]]:
+        """
+        :return: the LLC mask of each socket that assigned by the controller, or `None` if it has never been assigned
+        """
+        self._verify_cache_if_expired()
+        return self._actuator.desired((self, 'llc'), self._llc_masks)
+
+    @llc_masks.setter
+    def llc_masks(self, masks: Iterable[str]) -> None:
+        self._actuator.stage((self, 'llc'), tuple(masks), self._llc_masks,
+                             lambda m: self._resctrl.assign_llc(*m),
+                             functools.partial(setattr, self, '_llc_masks'),
+                             self.invalidate_cache)
+
+    @property
+    def mb_percents(self) -> Optional[Tuple[int, ...]]:
+        """
+        :return: the memory bandwidth (in percentage) of each socket that assigned by the controller,
+        or `None` if it has never been assigned
+        """
+        self._verify_cache_if_expired()
+        return self._actuator.desired((self, 'mb'), self._mb_percents)
+
+    @mb_percents.setter
+    def mb_percents(self, percents: Iterable[int]) -> None:
+        self._actuator.stage((self, 'mb'), tuple(percents), self._mb_percents,
+                             lambda p: self._resctrl.assign_mb(*p),
+                             functools.partial(setattr, self, '_mb_percents'),
+                             self.invalidate_cache)
+
+    @property
+    def freq_caps(self) -> Mapping[int, int]:
+        """
+        :return: the applied max frequency of each core that limited by the controller
+        """
+        self._verify_cache_if_expired()
+        return self._freq_caps
+
+    def limit_freq(self, freq: int, cores: Optional[Iterable[int]] = None) -> None:
+        """
+        Limit the max frequency of the given cores (the currently bound cores by default)
+        :param freq: freq. to set
+        :param cores:
+        """
+        cores = self.bound_cores if cores is None else tuple(cores)
+
+        # the freq. cap is a property of the core, so the key is shared by all workloads
+        # and the applied one is taken from the table of `DVFS`
+        for core in cores:
+            self._actuator.stage(('freq', core), freq, DVFS.freq_cap(core),
+                                 functools.partial(self._apply_freq, core),
+                                 functools.partial(self._freq_caps.__setitem__, core),
+                                 functools.partial(self._abort_freq, core))
+
+    @staticmethod
+    def _apply_freq(core: int, freq: int) -> None:
+        DVFS.set_freq(freq, (core,))
+
+    def _abort_freq(self, core: int) -> None:
+        # the whole domain of the core was marked as applied, even if the write was never flushed
+        DVFS.invalidate(DVFS.domain_of(core))
+        self.invalidate_cache()
+
+    @property
+    def cpu_quota(self) -> Optional[Tuple[int, int]]:
+        """
+        :return: the CFS quota and period (in us) that assigned by the controller, or `None` if it has never been
+        """
+        return self._actuator.desired((self, 'quota'), self._cpu_quota)
+
+    @cpu_quota.setter
+    def cpu_quota(self, quota_period: Tuple[int, int]) -> None:
+        self._actuator.stage((self, 'quota'), tuple(quota_period), self._cpu_quota,
+                             lambda qp: self._cgroup_cpu.limit_cpu_quota(*qp),
+                             functools.partial(setattr, self, '_cpu_quota'),
+                             self.invalidate_cache)
+
+    def invalidate_cache(self) -> None:
+        """Make the next access to the cached configurations verify them against the kernel"""
+        self._cache_verified_at = float('-inf')
+
+    def _verify_cache_if_expired(self) -> None:
+        if time.monotonic() - self._cache_verified_at >= self.CACHE_VERIFY_INTERVAL:
+            self.verify_cache()
+
+    def verify_cache(self) -> None:
+        """Read the applied configurations back from the kernel and replace the cached ones if they drifted"""
+        logger = logging.getLogger(__name__)
+
+        cores = tuple(sorted(self._cgroup_cpuset.read_cpus()))
+        if cores != self._bound_cores:
+            logger.warning(f'cached cores of {self} is drifted. cached: {self._bound_cores}, kernel: {cores}')
+            self._bound_cores = cores
+
+        mems = tuple(sorted(self._cgroup_cpuset.read_mems()))
+        if mems != self._bound_mems:
+            logger.warning(f'cached mems of {self} is drifted. cached: {self._bound_mems}, kernel: {mems}')
+            self._bound_mems = mems
+
+        if self._llc_masks is not None:
+            masks = tuple(self._resctrl.get_llc_mask())
+            # the masks were assigned, so a missing `L3` line is a drift too. it is assigned again on the next enforce
+            if tuple(map(lambda m: int(m, 16), masks)) != tuple(map(lambda m: int(m, 16), self._llc_masks)):
+                logger.warning(f'cached LLC masks of {self} is drifted. cached: {self._llc_masks}, kernel: {masks}')
+                self._llc_masks = masks if masks else None
+
+        if self._mb_percents is not None:
+            percents = tuple(self._resctrl.get_mb())
+            # an empty result means that the `MB` line is not exposed, so it can not be verified
+            if percents and percents != self._mb_percents:
+                logger.warning(f'cached MB of {self} is drifted. cached: {self._mb_percents}, kernel: {percents}')
+                self._mb_percents = percents
+
+        DVFS.verify_freq(self._freq_caps)
+        for core, cached_freq in self._freq_caps.items():
+            freq = DVFS.freq_cap(core)
+            if freq != cached_freq:
+                logger.warning(f'cached freq. of core {core} is drifted. cached: {cached_freq}, kernel: {freq}')
+                self._freq_caps[core] = freq
+
+        self._cache_verified_at = time.monotonic()
+
     @property
     def perf_interval(self):
         return self._perf_interval
 
+    @property
+    def has_perf_agent(self) -> bool:
+        return self._perf_info is not None
+
     @property
     def is_running(self) -> bool:
         return self._proc_info.is_running()
@@ -134,15 +388,91 @@ class Workload:
 
     @property
     def avg_solorun_data(self) -> Optional[BasicMetric]:
+        # the shipped profile follows the applied number of cores (e.g. shrunk by `SchedIsolator`)
+        if self._shipped_profile_cores is not None and self._shipped_profile_cores != len(self._bound_cores):
+            self._shipped_profile_cores = len(self._bound_cores)
+            self._avg_solorun_data = solorun_profile(self._name, self._shipped_profile_cores)
         return self._avg_solorun_data
 
     @avg_solorun_data.setter
     def avg_solorun_data(self, new_data: BasicMetric) -> None:
         self._avg_solorun_data = new_data
+        self._shipped_profile_cores = None
+        self.invalidate_snapshot()
+
+    @property
+    def profile_key(self) -> ProfileKey:
+        """
+        :return: the key of the solorun profile of this workload in its current configuration
+        """
+        sockets = frozenset(numa_topology.core_to_node[core_id] for core_id in self._bound_cores)
+        socket = next(iter(sockets)) if len(sockets) == 1 else -1
+        return ProfileKey(self._name, self.number_of_threads, len(self._bound_cores), socket)
+
+    def invalidate_snapshot(self) -> None:
+        """Forget the memoized metric and diffs of the current tick"""
+        self._snapshot_tick = -1
+
+    def _refresh_snapshot(self) -> None:
+        if self._snapshot_tick != tick.current():
+            self._snapshot_tick = tick.current()
+            self._cur_metric = None
+            self._metric_diffs.clear()
+
+    @property
+    def cur_metric(self) -> BasicMetric:
+        """
+        :return: the latest metric as of the first access in the current tick
+        """
+        self._refresh_snapshot()
+
+        if self._cur_metric is None:
+            self._cur_metric = self._metrics[0]
+        return self._cur_metric
+
+    @property
+    def metric_stats(self) -> MetricStats:
+        return self._metric_stats
+
+    @property
+    def phase_detector(self) -> PhaseDetector:
+        return self._phase_detector
+
+    def clear_metrics(self) -> None:
+        self._metrics.clear()
+        self._metric_stats.clear()
+        self._phase_detector.reset()
+        self.invalidate_snapshot()
 
     def calc_metric_diff(self, core_norm: float = 1) -> MetricDiff:
-        curr_metric: BasicMetric = self._metrics[0]
-        return MetricDiff(curr_metric, self._avg_solorun_data, core_norm)
+        """
+        :return: the diff of the current metric (estimated by `METRIC_ESTIMATOR`) from the solorun data,
+                 with the margins of `DECISION_CONFIDENCE`. memoized for the current tick
+        """
+        self._refresh_snapshot()
+
+        metric_diff = self._metric_diffs.get(core_norm)
+        if metric_diff is None:
+            metric_diff = MetricDiff.from_stats(self._metric_stats, self.avg_solorun_data, core_norm,
+                                                self.METRIC_ESTIMATOR, self.DECISION_CONFIDENCE)
+            self._metric_diffs[core_norm] = metric_diff
+        return metric_diff
+
+    def core_norm_for(self, num_cores: int) -> float:
+        """
+        :return: the expected ratio of the solorun throughput (instructions per sec.) with `num_cores` cores
+                 to the one with the current cores, for `calc_metric_diff()` of the other number of cores
+        """
+        cur_cores = len(self._bound_cores)
+        if self._shipped_profile_cores is None:
+            return num_cores / cur_cores
+
+        return solorun_profile(self._name, num_cores).instruction_ps / self.avg_solorun_data.instruction_ps
+
+    def memoize_metric_diff(self, metric_diff: MetricDiff, core_norm: float = 1) -> None:
+        """Memoize a diff that computed elsewhere (e.g. in a batch) like `calc_metric_diff()` for the current tick"""
+        self._refresh_snapshot()
+        self._metric_diffs[core_norm] = metric_diff
 
     def all_child_tid(self) -> Tuple[int, ...]:
         try:
@@ -163,9 +493,18 @@ class Workload:
             return next(iter(sockets))
 
     def pause(self) -> None:
-        self._proc_info.suspend()
-        self._perf_info.suspend()
+        # the whole group is frozen at once on cgroup v2
+        if isinstance(self._cgroup_cpuset, BaseCgroupV2):
+            self._cgroup_cpuset.freeze()
+        else:
+            self._proc_info.suspend()
+        if self._perf_info is not None:
+            self._perf_info.suspend()
 
     def resume(self) -> None:
-        self._proc_info.resume()
-        self._perf_info.resume()
+        if isinstance(self._cgroup_cpuset, BaseCgroupV2):
+            self._cgroup_cpuset.thaw()
+        else:
+            self._proc_info.resume()
+        if self._perf_info is not None:
+            self._perf_info.resume()
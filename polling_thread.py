@@ -1,9 +1,9 @@
 # coding: UTF-8
 
 import functools
-import json
 import logging
 from threading import Thread
+from typing import ClassVar, Dict, List, Optional
 
 import pika
 import psutil
@@ -12,6 +12,9 @@ from pika.adapters.blocking_connection import BlockingChannel
 from pika.spec import Basic
 
 from libs.metric_container.basic_metric import BasicMetric
+from libs.metric_container.resctrl_sampler import ResCtrlSampler
+from libs.metric_container.shm_ring import ShmRing, ShmRingError, ShmRingReader
+from libs.metric_container.wire import MetricCodec
 from libs.workload import Workload
 from pending_queue import PendingQueue
 
@@ -26,15 +29,30 @@ class Singleton(type):
 
 
 class PollingThread(Thread, metaclass=Singleton):
-    def __init__(self, metric_buf_size: int, pending_queue: PendingQueue) -> None:
+    # the metric messages are acknowledged at once every `ACK_BATCH` messages or `ACK_INTERVAL` seconds
+    ACK_BATCH: ClassVar[int] = 64
+    ACK_INTERVAL: ClassVar[float] = 0.1
+    # interval (sec) to read the shared memory rings of the agents on the same host, only while any ring exists
+    SHM_POLL_INTERVAL: ClassVar[float] = 0.005
+    REAP_INTERVAL: ClassVar[float] = 5.0
+
+    def __init__(self, metric_buf_size: int, pending_queue: PendingQueue,
+                 rdt_sampler: Optional[ResCtrlSampler] = None) -> None:
         super().__init__(daemon=True)
         self._metric_buf_size = metric_buf_size
+        self._rdt_sampler = rdt_sampler
 
         self._rmq_host = 'localhost'
         self._rmq_creation_queue = 'workload_creation'
 
         self._pending_wl = pending_queue
 
+        self._last_delivery_tag: int = 0
+        self._num_unacked: int = 0
+
+        self._rings: Dict[Workload, ShmRingReader] = dict()
+        self._polling_rings: bool = False
+
     def _cbk_wl_creation(self, ch: BlockingChannel, method: Basic.Deliver, _: BasicProperties, body: bytes) -> None:
         ch.basic_ack(method.delivery_tag)
 
@@ -43,10 +61,10 @@ class PollingThread(Thread, metaclass=Singleton):
         logger = logging.getLogger('monitoring.workload_creation')
         logger.debug(f'{arr} is received from workload_creation queue')
 
-        if len(arr) != 5:
+        if len(arr) not in (5, 6):
             return
 
-        wl_identifier, wl_type, pid, perf_pid, perf_interval = arr
+        wl_identifier, wl_type, pid, perf_pid, perf_interval = arr[:5]
         pid = int(pid)
         perf_pid = int(perf_pid)
         perf_interval = int(perf_interval)
@@ -57,44 +75,105 @@ class PollingThread(Thread, metaclass=Singleton):
             return
 
         workload = Workload(wl_name, wl_type, pid, perf_pid, perf_interval)
+
+        ring: Optional[ShmRingReader] = None
+        if len(arr) == 6:
+            try:
+                ring = ShmRingReader.open(ShmRing.path_of(arr[5]))
+            except (OSError, ShmRingError) as e:
+                logger.warning(f'failed to register {workload}: {e}')
+                return
+
         if wl_type == 'bg':
             logger.info(f'{workload} is background process')
         else:
             logger.info(f'{workload} is foreground process')
 
+        if self._rdt_sampler is not None:
+            self._rdt_sampler.register(workload)
+
         self._pending_wl.add(workload)
 
+        if ring is not None:
+            logger.debug(f'metrics of {workload} are read from {ring.path}')
+            self._rings[workload] = ring
+
+            if not self._polling_rings:
+                self._polling_rings = True
+                ch.connection.add_timeout(self.SHM_POLL_INTERVAL,
+                                          functools.partial(self._poll_rings_periodically, ch.connection))
+            return
+
         wl_queue_name = '{}({})'.format(wl_name, pid)
         ch.queue_declare(wl_queue_name)
         ch.basic_consume(functools.partial(self._cbk_wl_monitor, workload), wl_queue_name)
 
     def _cbk_wl_monitor(self, workload: Workload,
                         ch: BlockingChannel, method: Basic.Deliver, _: BasicProperties, body: bytes) -> None:
-        metric = json.loads(body.decode())
-        ch.basic_ack(method.delivery_tag)
+        logger = logging.getLogger(f'monitoring.metric.{workload}')
 
-        item = BasicMetric(metric['l2miss'],
-                           metric['l3miss'],
-                           metric['instructions'],
-                           metric['cycles'],
-                           metric['stall_cycles'],
-                           metric['wall_cycles'],
-                           metric['intra_coh'],
-                           metric['inter_coh'],
-                           metric['llc_size'],
-                           metric['local_mem'],
-                           metric['remote_mem'],
-                           workload.perf_interval)
+        try:
+            # a message holds a batch of binary records, or a single JSON document from old agents
+            metrics: List[BasicMetric] = MetricCodec.decode(body, workload.perf_interval)
+        except (ValueError, KeyError) as e:
+            logger.warning(f'malformed metric message is dropped: {e}')
+            metrics = list()
 
-        logger = logging.getLogger(f'monitoring.metric.{workload}')
-        logger.debug(f'{metric} is given from ')
+        self._ack(ch, method.delivery_tag)
+
+        # the in-process resctrl samples are fresher than the ones relayed by the perf agent
+        if self._rdt_sampler is not None and metrics:
+            metrics[-1] = self._rdt_sampler.merge(workload, metrics[-1])
+
+        logger.debug(f'{len(metrics)} metrics are given')
+
+        workload.append_metrics(metrics, self._metric_buf_size)
+
+    def _ack(self, ch: BlockingChannel, delivery_tag: int) -> None:
+        """Acknowledge the messages up to `delivery_tag` at once, every `ACK_BATCH` messages"""
+        self._last_delivery_tag = delivery_tag
+        self._num_unacked += 1
+
+        if self._num_unacked >= self.ACK_BATCH:
+            self._flush_acks(ch)
+
+    def _flush_acks(self, ch: BlockingChannel) -> None:
+        if self._num_unacked > 0:
+            ch.basic_ack(self._last_delivery_tag, multiple=True)
+            self._num_unacked = 0
+
+    def _flush_acks_periodically(self, connection: pika.BlockingConnection, ch: BlockingChannel) -> None:
+        # the remaining messages of a quiet period are not left unacknowledged
+        self._flush_acks(ch)
+        connection.add_timeout(self.ACK_INTERVAL,
+                               functools.partial(self._flush_acks_periodically, connection, ch))
+
+    def _poll_rings_periodically(self, connection: pika.BlockingConnection) -> None:
+        # stops when the last ring is reaped, and started again by the next registered ring
+        if not self._rings:
+            self._polling_rings = False
+            return
+
+        for workload, ring in self._rings.items():
+            metrics = ring.read()
+            if not metrics:
+                continue
+
+            if self._rdt_sampler is not None:
+                metrics[-1] = self._rdt_sampler.merge(workload, metrics[-1])
+
+            workload.append_metrics(metrics, self._metric_buf_size)
 
-        metric_que = workload.metrics
+        connection.add_timeout(self.SHM_POLL_INTERVAL,
+                               functools.partial(self._poll_rings_periodically, connection))
 
-        if len(metric_que) == self._metric_buf_size:
-            metric_que.pop()
+    def _reap_rings_periodically(self, connection: pika.BlockingConnection) -> None:
+        for workload, ring in tuple(self._rings.items()):
+            if not workload.is_running:
+                ring.close()
+                del self._rings[workload]
 
-        metric_que.appendleft(item)
+        connection.add_timeout(self.REAP_INTERVAL, functools.partial(self._reap_rings_periodically, connection))
 
     def run(self) -> None:
         connection = pika.BlockingConnection(pika.ConnectionParameters(host=self._rmq_host))
@@ -102,6 +181,9 @@ class PollingThread(Thread, metaclass=Singleton):
 
         channel.queue_declare(self._rmq_creation_queue)
         channel.basic_consume(self._cbk_wl_creation, self._rmq_creation_queue)
+        connection.add_timeout(self.ACK_INTERVAL,
+                               functools.partial(self._flush_acks_periodically, connection, channel))
+        connection.add_timeout(self.REAP_INTERVAL, functools.partial(self._reap_rings_periodically, connection))
 
         try:
             logger = logging.getLogger('monitoring')
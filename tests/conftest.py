@@ -0,0 +1,53 @@
+# coding: UTF-8
+
+import gc
+import subprocess
+
+import pytest
+
+from libs.sysfs_emulator import SysfsEmulator
+
+
+# the modules of `libs` read the root of the tree on import, so a single tree serves all tests
+@pytest.fixture(scope='session')
+def emulator():
+    emulator = SysfsEmulator(num_sockets=1, cores_per_socket=4)
+    emulator.install()
+
+    # `libs` reads the tree on import, so everything is imported after the emulator is installed
+    from libs.solorun_data.profile_store import ProfileStore
+    ProfileStore.PATH = str(emulator.root / 'solorun_profiles.db')
+
+    yield emulator
+
+    gc.collect()
+    emulator.cleanup()
+
+
+@pytest.fixture
+def process():
+    proc = subprocess.Popen(('sleep', 'infinity'))
+    yield proc
+    proc.kill()
+    proc.wait()
+
+
+@pytest.fixture
+def group(emulator: SysfsEmulator, process: subprocess.Popen):
+    from libs.isolation.policies import AggressiveWViolationPolicy
+    from libs.solorun_data.datas import data_map
+    from libs.workload import Workload
+
+    bg_proc = subprocess.Popen(('sleep', 'infinity'))
+
+    emulator.add_group(f'canneal_{process.pid}', range(2), (0,))
+    emulator.add_group(f'bfs_{bg_proc.pid}', range(2, 4), (0,))
+
+    fg = Workload('canneal', 'fg', process.pid, process.pid, 200)
+    fg.avg_solorun_data = data_map['canneal']
+    bg = Workload('bfs', 'bg', bg_proc.pid, bg_proc.pid, 200)
+
+    yield AggressiveWViolationPolicy(fg, (bg,))
+
+    bg_proc.kill()
+    bg_proc.wait()
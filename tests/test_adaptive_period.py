@@ -0,0 +1,46 @@
+# coding: UTF-8
+
+import time
+
+
+def _metric(base, factor: float):
+    """
+    :return: the metric of `base` whose amounts are scaled by `factor`, e.g. 0.5 for a foreground at half its speed
+    """
+    from libs.metric_container.basic_metric import BasicMetric
+
+    return BasicMetric(*(value * factor for value in base.astuple()[:8]), base.llc_size,
+                       base.local_mem * factor, base.remote_mem * factor, 200)
+
+
+def test_contention_change_tightens_backed_off_period(group) -> None:
+    from libs.solorun_data.datas import data_map
+
+    group.foreground_workload.append_metrics((_metric(data_map['canneal'], 1),) * 10, 50)
+    for _ in range(3):
+        group.back_off_period()
+    backed_off_period = group.period
+
+    group.foreground_workload.append_metrics((_metric(data_map['canneal'], 1),), 50)
+    assert not group.contention_changed()
+    assert group.period == backed_off_period
+
+    # a background starts to contend
+    group.foreground_workload.append_metrics((_metric(data_map['canneal'], 0.5),), 50)
+    assert group.contention_changed()
+    assert group.period == group.MIN_PERIOD
+
+
+def test_stale_group_is_isolated_by_max_period(group) -> None:
+    from controller import Controller
+
+    controller = Controller(metric_buf_size=50, swap_off=True, num_workers=1)
+    controller._isolation_groups[group] = 0
+
+    now = time.monotonic()
+    controller._isolated_at[group] = now
+    controller._evaluated_metric_at[group] = group.foreground_workload.metrics_received_at
+
+    # the metrics of the foreground stall
+    assert not controller._isolation_due(group, now + group.period)
+    assert controller._isolation_due(group, now + group.MAX_PERIOD + group.MIN_PERIOD)
@@ -0,0 +1,30 @@
+# coding: UTF-8
+
+import itertools
+import math
+
+_DIFFS = (-0.5, -0.03, -0.003, 0.0, 0.003, 0.03, 0.5, math.nan, math.inf, -math.inf)
+_MARGINS = (0.0, 0.02, math.nan)
+
+
+def test_batch_agrees_with_scalar_decisions(group) -> None:
+    from libs.isolation.batch_decision import BatchDecision
+    from libs.metric_container.basic_metric import MetricDiff
+
+    def _diff(value: float, margin: float) -> MetricDiff:
+        return MetricDiff.from_values(value, value, value, (margin, margin, margin))
+
+    isolators = tuple(isolator for isolator in group._isolator_map.values() if isolator.is_batchable())
+    assert isolators
+
+    fg = group.foreground_workload
+    for isolator in isolators:
+        for prev, curr, margin in itertools.product((None,) + _DIFFS, _DIFFS, _MARGINS):
+            steps = list()
+            for decide in (lambda: BatchDecision.decide((isolator,))[0], isolator.decide_next_step):
+                isolator._is_first_decision = prev is None
+                isolator._prev_metric_diff = None if prev is None else _diff(prev, margin)
+                fg.memoize_metric_diff(_diff(curr, margin))
+                steps.append(decide())
+
+            assert steps[0] == steps[1], f'{isolator.__class__.__name__}: prev {prev}, curr {curr}, margin {margin}'
@@ -0,0 +1,56 @@
+# coding: UTF-8
+
+import subprocess
+
+import pytest
+
+from libs.sysfs_emulator import SysfsEmulator
+
+
+@pytest.fixture
+def shared_domain(emulator: SysfsEmulator):
+    """cores 0 and 1 share a frequency domain"""
+    from libs.utils.dvfs import DVFS
+
+    for core in (0, 1):
+        (emulator.root / f'sys/devices/system/cpu/cpu{core}/cpufreq/related_cpus').write_text('0 1\n')
+    DVFS._domains.clear()
+    DVFS.invalidate()
+
+    yield DVFS
+
+    for core in (0, 1):
+        (emulator.root / f'sys/devices/system/cpu/cpu{core}/cpufreq/related_cpus').write_text(f'{core}\n')
+    DVFS._domains.clear()
+    DVFS.invalidate()
+
+
+def test_abort_forgets_the_whole_domain(emulator: SysfsEmulator, process: subprocess.Popen, shared_domain) -> None:
+    from libs.workload import Workload
+
+    emulator.add_group(f'bfs_{process.pid}', range(2), (0,))
+    workload = Workload('bfs', 'bg', process.pid, process.pid, 200)
+
+    # a write of the domain was staged, but never flushed
+    for core in (0, 1):
+        shared_domain._freq_caps[core] = shared_domain.MIN
+    workload._abort_freq(0)
+
+    assert shared_domain.freq_cap(1) == shared_domain.read_max_freq(1)
+
+
+def test_freq_above_the_cap_is_reported(emulator: SysfsEmulator, shared_domain, caplog) -> None:
+    cpufreq = emulator.root / 'sys/devices/system/cpu/cpu2/cpufreq'
+    max_freq = (cpufreq / 'scaling_max_freq').read_text()
+    (cpufreq / 'scaling_max_freq').write_text(f'{shared_domain.MIN}\n')
+
+    try:
+        for _ in range(shared_domain.ABOVE_CAP_CHECKS + 1):
+            shared_domain.verify_freq((2,))
+    finally:
+        (cpufreq / 'scaling_max_freq').write_text(max_freq)
+        shared_domain._above_cap.clear()
+
+    warnings = [record for record in caplog.records if record.levelname == 'WARNING']
+    assert len(warnings) == 1
+    assert 'core 2' in warnings[0].getMessage()
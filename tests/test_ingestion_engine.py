@@ -0,0 +1,83 @@
+# coding: UTF-8
+
+import subprocess
+import time
+from typing import Callable
+
+import pytest
+
+_METRICS_PER_WORKLOAD = 10
+
+
+def _wait_until(predicate: Callable[[], bool], timeout: float = 5) -> bool:
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+@pytest.fixture
+def engine(emulator, monkeypatch):
+    from libs.ingestion import FakeBroker, IngestionEngine
+
+    monkeypatch.setattr(IngestionEngine, 'ACK_INTERVAL', 0.02)
+    monkeypatch.setattr(IngestionEngine, 'REAP_INTERVAL', 0.05)
+
+    broker = FakeBroker()
+    # the prefetch window is smaller than the metrics of a workload, so they arrive only if they are acknowledged
+    engine = IngestionEngine(broker, 50, set(), num_shards=2, prefetch=4)
+    engine.start()
+    assert engine.wait_ready(5)
+
+    yield engine, broker
+
+    engine.stop()
+    engine.join(5)
+
+
+def test_metrics_are_consumed_and_reaped(emulator, engine, process: subprocess.Popen) -> None:
+    from libs.ingestion import IngestionEngine
+    from libs.metric_container.wire import MetricCodec
+
+    engine, broker = engine
+    bg_proc = subprocess.Popen(('sleep', 'infinity'))
+
+    try:
+        emulator.add_group(f'canneal_{process.pid}', range(2), (0,))
+        emulator.add_group(f'bfs_{bg_proc.pid}', range(2, 4), (0,))
+        for name, wl_type, pid in (('canneal', 'fg', process.pid), ('bfs', 'bg', bg_proc.pid)):
+            broker.publish(IngestionEngine.CREATION_QUEUE, f'{name}_{pid},{wl_type},{pid},{pid},100'.encode())
+        assert _wait_until(lambda: engine.num_consumers == 2)
+
+        workloads = {wl.pid: wl for wl in engine._pending_wl}
+        assert workloads.keys() == {process.pid, bg_proc.pid}
+
+        for idx in range(_METRICS_PER_WORKLOAD):
+            # the index is carried in `l2miss`
+            record = (float(idx),) + (1.0,) * (len(MetricCodec.FIELDS) - 1)
+            broker.publish(f'canneal({process.pid})', MetricCodec.encode((record,), 100))
+            broker.publish(f'bfs({bg_proc.pid})', MetricCodec.encode((record,), 100))
+
+        assert _wait_until(lambda: all(len(wl.metrics) == _METRICS_PER_WORKLOAD for wl in workloads.values()))
+        for wl in workloads.values():
+            assert [metric.l2miss for metric in wl.metrics] == list(reversed(range(_METRICS_PER_WORKLOAD)))
+
+        # the rest of the batched acks are flushed periodically
+        assert _wait_until(lambda: broker.num_unacked == 0)
+
+        bg_proc.kill()
+        bg_proc.wait()
+        assert _wait_until(lambda: engine.num_consumers == 1)
+        assert workloads[process.pid] in engine._consumers
+
+        # the queue of the ended workload is no longer consumed
+        broker.publish(f'bfs({bg_proc.pid})', MetricCodec.encode((record,), 100))
+        broker.publish(f'canneal({process.pid})', MetricCodec.encode((record,), 100))
+        assert _wait_until(lambda: len(workloads[process.pid].metrics) == _METRICS_PER_WORKLOAD + 1)
+        assert broker.num_ready(f'bfs({bg_proc.pid})') == 1
+
+    finally:
+        bg_proc.kill()
+        bg_proc.wait()
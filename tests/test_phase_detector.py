@@ -0,0 +1,33 @@
+# coding: UTF-8
+
+import math
+
+
+def _metric(l2miss: float, instructions: float, cycles: float = 1e9):
+    from libs.metric_container.basic_metric import BasicMetric
+
+    return BasicMetric(l2miss, l2miss / 2, instructions, cycles, cycles / 5, 1e9, 0, 0, 1e6, 1e8, 1e7, 200)
+
+
+def test_idle_metric_has_no_rates(emulator) -> None:
+    metric = _metric(10, 0, 100)
+
+    assert math.isnan(metric.l2_mpki)
+    assert math.isnan(metric.core_cpi)
+
+
+def test_failed_rate_does_not_hide_the_others(emulator) -> None:
+    from libs.metric_container.phase_detector import PhaseDetector
+
+    class Detector(PhaseDetector):
+        # `ipc` of a metric of no cycles raises `ZeroDivisionError`
+        RATES = ('ipc', 'l2_mpki')
+
+    detector = Detector(warmup=5)
+    for _ in range(5):
+        detector.update(_metric(1e6, 1e9, cycles=0))
+    assert not detector.changed
+
+    for _ in range(10):
+        detector.update(_metric(2e6, 1e9, cycles=0))
+    assert detector.changed_rate == 'l2_mpki'
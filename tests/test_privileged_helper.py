@@ -0,0 +1,34 @@
+# coding: UTF-8
+
+import errno
+from pathlib import Path
+
+
+def _applier(root: Path):
+    from libs.utils.privileged_helper import Applier
+
+    return Applier((str(root / 'resctrl') + '/', str(root / 'cpu') + '/'), truncate=True)
+
+
+def test_only_the_allowed_files_are_written(emulator, tmp_path: Path) -> None:
+    for path in ('resctrl/grp/tasks', 'cpu/cpu1/cpufreq/scaling_max_freq', 'cpu/cpu1/online', 'cpu/smt/control'):
+        (tmp_path / path).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / path).write_text('')
+
+    applier = _applier(tmp_path)
+
+    assert applier.apply(str(tmp_path / 'resctrl/grp/tasks'), '1\n') == 0
+    assert applier.apply(str(tmp_path / 'cpu/cpu1/cpufreq/scaling_max_freq'), '1200000\n') == 0
+    assert applier.apply(str(tmp_path / 'cpu/cpu1/online'), '0\n')[0] == errno.EPERM
+    assert applier.apply(str(tmp_path / 'cpu/smt/control'), 'off\n')[0] == errno.EPERM
+    assert (tmp_path / 'cpu/cpu1/online').read_text() == ''
+
+
+def test_symlink_out_of_the_allowed_directories_is_rejected(emulator, tmp_path: Path) -> None:
+    (tmp_path / 'outside').mkdir()
+    (tmp_path / 'outside/tasks').write_text('')
+    (tmp_path / 'resctrl').mkdir()
+    (tmp_path / 'resctrl/grp').symlink_to(tmp_path / 'outside')
+
+    assert _applier(tmp_path).apply(str(tmp_path / 'resctrl/grp/tasks'), '1\n')[0] == errno.EPERM
+    assert (tmp_path / 'outside/tasks').read_text() == ''
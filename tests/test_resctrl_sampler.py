@@ -0,0 +1,41 @@
+# coding: UTF-8
+
+import subprocess
+import time
+
+from libs.sysfs_emulator import SysfsEmulator
+
+
+def test_synthesized_metric_changes_decisions(emulator: SysfsEmulator, process: subprocess.Popen) -> None:
+    from libs.metric_container.resctrl_sampler import ResCtrlSampler
+    from libs.solorun_data.datas import data_map
+    from libs.utils import tick
+    from libs.workload import Workload
+
+    group_name = f'bfs_{process.pid}'
+    emulator.add_group(group_name, range(2), (0,))
+
+    workload = Workload('bfs', 'bg', process.pid, process.pid, 10)
+    workload.avg_solorun_data = data_map['bfs']
+    workload.append_metrics((data_map['bfs'],) * 5, 50)
+
+    tick.advance()
+    before = workload.calc_metric_diff().local_mem_util_ps
+
+    sampler = ResCtrlSampler(0.01)
+    sampler.register(workload)
+
+    # the perf agent of the workload lags behind, while resctrl reports a much higher bandwidth
+    emulator.set_mon_data(group_name, 0, 0, 0, 0)
+    sampler.sample()
+    time.sleep(0.05)
+    traffic = int(data_map['bfs'].local_mem * 100)
+    emulator.set_mon_data(group_name, 0, 0, traffic, traffic)
+    sampler.sample()
+
+    assert len(workload.metrics) == 6
+
+    tick.advance()
+    after = workload.calc_metric_diff().local_mem_util_ps
+
+    assert after > before
@@ -0,0 +1,34 @@
+# coding: UTF-8
+
+import time
+
+import psutil
+
+
+def _becomes_stopped(pid: int, stopped: bool, timeout: float = 5) -> bool:
+    """
+    :return: whether `pid` becomes stopped (or not, if `stopped` is `False`) within `timeout`.
+             a signal is delivered asynchronously, so the status may change after `kill()` returns
+    """
+    deadline = time.monotonic() + timeout
+    while (psutil.Process(pid).status() == psutil.STATUS_STOPPED) != stopped:
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def test_stop_without_metrics_resumes_backgrounds(group) -> None:
+    foreground = group.foreground_workload
+    background, = group.background_workloads
+    prev_solorun = foreground.avg_solorun_data
+
+    group.start_solorun_profiling()
+    assert _becomes_stopped(background.pid, True)
+
+    # the foreground sends no metric during the profiling
+    group.stop_solorun_profiling()
+
+    assert not group.in_solorun_profiling
+    assert _becomes_stopped(background.pid, False)
+    assert foreground.avg_solorun_data is prev_solorun